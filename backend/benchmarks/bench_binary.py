@@ -0,0 +1,55 @@
+"""Size and encode/decode cost of binary frames against their JSON equivalents.
+
+Encode timings bypass the per-version frame cache, so they measure the work
+done once per update rather than per recipient.
+
+Run from the backend directory:
+
+    PYTHONPATH=src python benchmarks/bench_binary.py
+"""
+import json
+import timeit
+from uuid import uuid4
+
+from app.models.game import Game, GameState
+from app.services import binary
+from app.services.serialization import dumps
+
+def main(number: int = 100_000):
+    game = Game(
+        id=uuid4(), player_x=uuid4(), player_o=uuid4(),
+        x_mask=0b100010001, o_mask=0b000001010,
+        current_turn="O", status=GameState.IN_PROGRESS, version=5, last_move=8,
+    )
+    delta = game.delta()
+    json_state = dumps(game.snapshot())
+    json_delta = dumps({"type": "delta", **delta})
+    binary_state = binary.encode_state(game)
+    binary_delta = binary.encode_delta(delta)
+
+    print("Frame sizes (bytes)")
+    for name, frame in {
+        "JSON snapshot": json_state,
+        "binary state": binary_state,
+        "JSON delta": json_delta,
+        "binary delta": binary_delta,
+    }.items():
+        print(f"  {name:16} {len(frame):5}")
+
+    print("Cost per frame")
+    cases = {
+        "JSON snapshot encode": lambda: dumps(game.snapshot()),
+        "binary state encode": lambda: binary.encode_state(game),
+        "JSON delta encode": lambda: dumps({"type": "delta", **game.delta()}),
+        "binary delta encode": lambda: binary.encode_delta(game.delta()),
+        "JSON snapshot decode": lambda: json.loads(json_state),
+        "binary state decode": lambda: binary.decode(binary_state),
+        "JSON delta decode": lambda: json.loads(json_delta),
+        "binary delta decode": lambda: binary.decode(binary_delta),
+    }
+    for name, run in cases.items():
+        seconds = min(timeit.repeat(run, number=number, repeat=5))
+        print(f"  {name:22} {seconds / number * 1e9:8.0f} ns  ({number / seconds:10.0f} frames/s)")
+
+if __name__ == "__main__":
+    main()
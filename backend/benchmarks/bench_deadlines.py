@@ -0,0 +1,78 @@
+"""Cost of running clocks for many live games on the shared timer wheel.
+
+Schedules a deadline for each of N timed games, as starting them would, then
+re-schedules every one of them as a round of moves would, and times the
+wheel's ticks over the next 50 seconds, when nothing is due yet. Memory is
+the traced allocation per game for the timer and its dict entry.
+
+At 500,000 games a tick costs about 10 us of every 100 ms, and a clock about
+300 bytes.
+
+Run from the backend directory:
+
+    PYTHONPATH=src python benchmarks/bench_deadlines.py
+"""
+import asyncio
+import time
+import tracemalloc
+from uuid import uuid4
+
+from app.models.game import Game, GameState
+from app.services.deadlines import DeadlineService
+from app.services.timers import TimerWheel
+
+async def expire(game_id, version):
+    pass
+
+async def run(size: int):
+    wheel = TimerWheel()
+    deadlines = DeadlineService(expire, wheel)
+    now = time.time()
+    games = [
+        Game(
+            id=uuid4(), player_x=uuid4(), player_o=uuid4(), current_turn="X", status=GameState.IN_PROGRESS,
+            move_time=600 + i % 2400, turn_started=now,
+        )
+        for i in range(size)
+    ]
+
+    start = time.perf_counter()
+    for game in games:
+        deadlines.watch(game)
+    scheduled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for game in games:
+        game.version += 1
+        deadlines.watch(game)
+    rescheduled = time.perf_counter() - start
+
+    # Deadlines are 10 to 50 minutes away, several turns of the wheel, so each tick
+    # looks at the timers hashed to its slot for later turns
+    ticks = int(50 / wheel.tick)
+    start = time.perf_counter()
+    wheel.advance(wheel.position + ticks)
+    tick = (time.perf_counter() - start) / ticks
+    assert len(deadlines) == size
+    await wheel.stop()
+
+    wheel = TimerWheel()
+    deadlines = DeadlineService(expire, wheel)
+    tracemalloc.start()
+    for game in games:
+        deadlines.watch(game)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(
+        f"  {size:>9} games  schedule {scheduled / size * 1e6:5.2f} us  reschedule {rescheduled / size * 1e6:5.2f} us  "
+        f"tick {tick * 1e6:7.1f} us  {memory / size:5.0f} bytes/game"
+    )
+    await wheel.stop()
+
+def main():
+    for size in (10_000, 100_000, 500_000):
+        asyncio.run(run(size))
+
+if __name__ == "__main__":
+    main()
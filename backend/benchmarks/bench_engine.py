@@ -0,0 +1,69 @@
+"""Micro-benchmark: bitboard engine vs. the nested-list win check it replaced.
+
+Run from the backend directory:
+
+    PYTHONPATH=src python benchmarks/bench_engine.py
+"""
+import random
+import timeit
+from typing import List, Optional
+
+from app.services import engine
+
+def legacy_check_win(board: List[List[Optional[str]]], player: str) -> bool:
+    """The original GameService._check_win, kept here as the baseline."""
+    for row in board:
+        if all(cell == player for cell in row):
+            return True
+    for col in range(3):
+        if all(board[row][col] == player for row in range(3)):
+            return True
+    if all(board[i][i] == player for i in range(3)):
+        return True
+    if all(board[i][2-i] == player for i in range(3)):
+        return True
+    return False
+
+def legacy_move(board: List[List[Optional[str]]], player: str) -> bool:
+    """Win check followed by the original full-board draw scan."""
+    if legacy_check_win(board, player):
+        return True
+    return all(cell is not None for row in board for cell in row)
+
+def engine_move(x_mask: int, o_mask: int) -> bool:
+    """Bitboard equivalent of legacy_move."""
+    if engine.is_win(x_mask):
+        return True
+    return engine.STANDARD.is_full(x_mask, o_mask)
+
+def random_positions(count: int, seed: int = 0):
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(count):
+        cells = rng.sample(range(engine.CELLS), rng.randint(0, engine.CELLS))
+        x_mask = o_mask = 0
+        for i, cell in enumerate(cells):
+            if i % 2 == 0:
+                x_mask |= 1 << cell
+            else:
+                o_mask |= 1 << cell
+        positions.append((x_mask, o_mask, engine.STANDARD.to_rows(x_mask, o_mask)))
+    return positions
+
+def main(count: int = 10_000, repeat: int = 5):
+    positions = random_positions(count)
+    legacy = min(timeit.repeat(
+        lambda: [legacy_move(board, "X") for _, _, board in positions],
+        number=1, repeat=repeat,
+    ))
+    bitboard = min(timeit.repeat(
+        lambda: [engine_move(x, o) for x, o, _ in positions],
+        number=1, repeat=repeat,
+    ))
+    print(f"positions:        {count}")
+    print(f"nested-list scan: {legacy / count * 1e9:8.1f} ns/move")
+    print(f"bitboard engine:  {bitboard / count * 1e9:8.1f} ns/move")
+    print(f"speedup:          {legacy / bitboard:8.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Cost of a lobby page as the number of indexed games grows.
+
+Fills a ``StatusIndex`` directly (the store's per-state index) with waiting
+games, removes a share of them as joins would, then times reading a page from
+the start and from a cursor deep in the list.
+
+Run from the backend directory:
+
+    PYTHONPATH=src python benchmarks/bench_lobby.py
+"""
+import random
+import timeit
+from uuid import uuid4
+
+from app.services.store import StatusIndex
+
+def main(page: int = 50, number: int = 2_000):
+    rng = random.Random(1)
+    for size in (10_000, 100_000, 1_000_000):
+        index = StatusIndex()
+        ids = [uuid4() for _ in range(size)]
+        for seq, game_id in enumerate(ids, 1):
+            index.add(game_id, seq)
+        # Joins take games out of the waiting state in no particular order
+        for game_id in rng.sample(ids, size // 3):
+            index.discard(game_id)
+        middle = size // 2
+        cases = {
+            "first page": lambda: index.page(0, page),
+            "page from cursor": lambda: index.page(middle, page),
+        }
+        for name, run in cases.items():
+            seconds = min(timeit.repeat(run, number=number, repeat=3))
+            print(f"  {size:>9} games  {name:16} {seconds / number * 1e6:8.1f} us")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Win detection on 15x15 five-in-a-row: the lines through the last move against a full-board scan.
+
+Run from the backend directory:
+
+    PYTHONPATH=src python benchmarks/bench_mnk.py
+"""
+import random
+import timeit
+
+from app.services import engine
+
+def scan_lines(geometry: engine.Geometry):
+    """Every winning line on the board as a mask, for the full-scan baseline."""
+    lines = []
+    for row in range(geometry.rows):
+        for col in range(geometry.cols):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(row + i * dr, col + i * dc) for i in range(geometry.win_length)]
+                if all(geometry.in_bounds(r, c) for r, c in cells):
+                    lines.append(sum(1 << geometry.cell_index(r, c) for r, c in cells))
+    return lines
+
+def main(number: int = 20_000):
+    geometry = engine.geometry(15, 15, 5)
+    lines = scan_lines(geometry)
+    rng = random.Random(1)
+    cells = rng.sample(range(geometry.cells), 60)
+    # A crowded mid-game position, checked for the newest stone
+    mask = sum(1 << cell for cell in cells[::2])
+    cell = cells[-2]
+
+    print(f"{geometry.rows}x{geometry.cols}, k={geometry.win_length}: {len(lines)} lines on the board")
+    cases = {
+        "lines through move": lambda: geometry.is_win(mask, cell),
+        "full-board scan": lambda: any(mask & line == line for line in lines),
+    }
+    for name, run in cases.items():
+        seconds = min(timeit.repeat(run, number=number, repeat=5))
+        print(f"  {name:20} {seconds / number * 1e9:8.0f} ns  ({number / seconds:10.0f} checks/s)")
+
+if __name__ == "__main__":
+    main()
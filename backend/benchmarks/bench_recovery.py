@@ -0,0 +1,74 @@
+"""Startup recovery time for a journal of 1M moves.
+
+Writes a journal of complete random games (create, join, then moves until
+a win or draw) straight to a temporary file, then times
+``GameService.restore`` rebuilding the store from it.
+
+Run from the backend directory:
+
+    PYTHONPATH=src python benchmarks/bench_recovery.py [moves]
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from uuid import uuid4
+
+from app.models.game import Game, GameState
+from app.services import engine, journal
+from app.services.game_service import GameService
+from app.services.pubsub import MemoryBroker
+from app.services.store import MemoryGameStore
+
+def random_game_records(rng: random.Random):
+    game = Game(id=uuid4(), player_x=uuid4(), current_turn="X", status=GameState.WAITING)
+    yield journal.create_record(game)
+    game.player_o = uuid4()
+    game.version = 1
+    yield journal.join_record(game)
+    x_mask = o_mask = 0
+    cells = list(range(engine.CELLS))
+    rng.shuffle(cells)
+    for turn, cell in enumerate(cells):
+        if turn % 2 == 0:
+            x_mask |= 1 << cell
+            mask = x_mask
+        else:
+            o_mask |= 1 << cell
+            mask = o_mask
+        game.version += 1
+        game.last_move = cell
+        yield journal.move_record(game)
+        if engine.is_win(mask):
+            return
+
+def write_journal(path: str, moves: int) -> int:
+    rng = random.Random(0)
+    written = 0
+    records = []
+    while written < moves:
+        for record in random_game_records(rng):
+            records.append(record)
+            written += record[0] == journal.MOVE
+    with open(path, "wb") as f:
+        f.write(b"".join(records))
+    return written
+
+async def main(moves: int = 1_000_000):
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "journal")
+        written = write_journal(path, moves)
+        size = os.path.getsize(path)
+        service = GameService(MemoryGameStore(), MemoryBroker(), journal.Journal(path, fsync=False))
+
+        start = time.perf_counter()
+        await service.restore()
+        seconds = time.perf_counter() - start
+
+    print(f"Journal: {written} moves in {len(service.store.games)} games, {size / 1e6:.1f} MB")
+    print(f"Recovery (replay + snapshot): {seconds:.2f} s, {written / seconds:,.0f} moves/s")
+
+if __name__ == "__main__":
+    asyncio.run(main(*map(int, sys.argv[1:])))
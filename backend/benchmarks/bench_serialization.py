@@ -0,0 +1,52 @@
+"""Per-message encode cost of a game update, before and after the fast path.
+
+Compares the old ``json.dumps(..., cls=UUIDEncoder)`` broadcast encoding with
+``serialization.dumps`` (orjson when installed, stdlib otherwise) and with the
+per-version snapshot cache that broadcasts actually hit.
+
+Run from the backend directory:
+
+    PYTHONPATH=src python benchmarks/bench_serialization.py
+"""
+import json
+import timeit
+from uuid import UUID, uuid4
+
+from app.models.game import Game, GameState
+from app.services import serialization
+
+class UUIDEncoder(json.JSONEncoder):
+    """The encoder broadcasts used before the fast path, kept as the baseline."""
+    def default(self, obj):
+        if isinstance(obj, UUID):
+            return str(obj)
+        return json.JSONEncoder.default(self, obj)
+
+def legacy_encode(game: Game) -> str:
+    return json.dumps({
+        "game_id": game.id,
+        "board": game.board,
+        "current_turn": game.current_turn,
+        "status": game.status.value,
+        "winner": game.winner,
+        "player_count": game.player_count,
+    }, cls=UUIDEncoder)
+
+def main(number: int = 100_000):
+    game = Game(
+        id=uuid4(), player_x=uuid4(), player_o=uuid4(),
+        x_mask=0b100010001, o_mask=0b000001010,
+        current_turn="O", status=GameState.IN_PROGRESS,
+    )
+    backend = "orjson" if serialization.orjson is not None else "stdlib json"
+    cases = {
+        "UUIDEncoder json.dumps": lambda: legacy_encode(game),
+        f"serialization.dumps ({backend})": lambda: serialization.dumps(game.snapshot()),
+        "cached snapshot": lambda: game.encoded(),
+    }
+    for name, encode in cases.items():
+        seconds = min(timeit.repeat(encode, number=number, repeat=5))
+        print(f"{name:34} {seconds / number * 1e9:8.0f} ns/message")
+
+if __name__ == "__main__":
+    main()
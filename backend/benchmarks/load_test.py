@@ -0,0 +1,272 @@
+"""Load test of the REST move path and WebSocket fan-out against a real server.
+
+Starts the app under uvicorn in a subprocess (or targets ``--url``), creates
+``--games`` games with ``--spectators`` delta-frame WebSocket clients each,
+then plays every game to the end with random REST moves, all games at once.
+Each move's send time is matched against the arrival of its version at every
+spectator to get move-to-broadcast latency.
+
+Reports moves/sec, p50/p99 latency, server memory per game and per socket,
+and server CPU, and writes them as JSON to ``--output`` so runs can be
+compared across commits. Memory and CPU are read from /proc and need Linux and
+a server started by this script.
+
+Run from the backend directory:
+
+    python benchmarks/load_test.py --games 200 --spectators 5 --rounds 3 --output load.json
+
+Every spectator is a socket on both ends, so games x spectators must stay
+under the open-file limit (``ulimit -n``). The load generator is a single
+event loop; when ``client_cpu_percent`` nears 100 it is the bottleneck, so run
+several copies with ``--url`` against one server instead.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import websockets
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def rss_bytes(pid: int) -> Optional[int]:
+    """Resident memory of a process, from /proc."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+def cpu_seconds(pid: int) -> Optional[float]:
+    """User plus system CPU time of a process, from /proc."""
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            # Fields after the parenthesised command name; utime and stime are the 12th and 13th
+            fields = f.read().rsplit(")", 1)[1].split()
+    except OSError:
+        return None
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=BACKEND, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+async def start_server(port: int, workdir: str) -> subprocess.Popen:
+    """Run the app under uvicorn, logging into ``workdir``, and wait until it answers."""
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.path.join(BACKEND, "src"),
+        # Request logging would dominate the profile; broadcasts still log
+        "TTT_LOG_SAMPLE_RATE": "0",
+        "TTT_MAX_GAMES": str(10_000_000),
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL,
+    )
+    async with httpx.AsyncClient() as client:
+        for _ in range(100):
+            try:
+                await client.get(f"http://127.0.0.1:{port}/metrics")
+                return process
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("Server did not start")
+
+class Spectator:
+    """A delta-frame client recording when each version of its game arrives."""
+
+    def __init__(self, url: str, game_id: str, arrivals: Dict[Tuple[str, int], List[float]]):
+        self.url = url
+        self.game_id = game_id
+        self.arrivals = arrivals
+        self.ready = asyncio.Event()
+        self.finished = asyncio.Event()
+
+    async def run(self):
+        async with websockets.connect(f"{self.url}/api/games/{self.game_id}/ws?frames=delta") as ws:
+            async for message in ws:
+                now = time.perf_counter()
+                frame = json.loads(message)
+                if not self.ready.is_set():
+                    # The snapshot sent on connect
+                    self.ready.set()
+                    continue
+                if "seq" not in frame:
+                    continue
+                self.arrivals.setdefault((self.game_id, frame["seq"]), []).append(now)
+                status = frame["game"]["status"] if frame["type"] == "snapshot" else frame["status"]
+                if status == "finished":
+                    self.finished.set()
+                    return
+
+async def play(client: httpx.AsyncClient, game: dict, sent: Dict[Tuple[str, int], float], rng: random.Random) -> int:
+    """Play a game to the end with random moves, recording when each version was sent."""
+    cells = [[row, col] for row in range(3) for col in range(3)]
+    rng.shuffle(cells)
+    players = [game["player_x"], game["player_o"]]
+    version = game["version"]
+    moves = 0
+    for turn, position in enumerate(cells):
+        sent[(game["game_id"], version + 1)] = time.perf_counter()
+        response = await client.post(
+            f"/api/games/{game['game_id']}/move", json={"player_id": players[turn % 2], "position": position}
+        )
+        response.raise_for_status()
+        data = response.json()
+        version = data["version"]
+        moves += 1
+        if data["status"] == "finished":
+            break
+    return moves
+
+async def setup_game(client: httpx.AsyncClient) -> dict:
+    created = (await client.post("/api/games")).json()
+    joined = (await client.post(f"/api/games/{created['game_id']}/join")).json()
+    return {
+        "game_id": created["game_id"],
+        "player_x": created["player_id"],
+        "player_o": joined["player_id"],
+        "version": joined["version"],
+    }
+
+async def run_round(url: str, ws_url: str, games: int, spectators: int, pid: Optional[int], rng: random.Random) -> dict:
+    limits = httpx.Limits(max_connections=min(games, 500))
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        rss_start = rss_bytes(pid) if pid else None
+        setups = await asyncio.gather(*(setup_game(client) for _ in range(games)))
+        rss_games = rss_bytes(pid) if pid else None
+
+        arrivals: Dict[Tuple[str, int], List[float]] = {}
+        watchers = [Spectator(ws_url, game["game_id"], arrivals) for game in setups for _ in range(spectators)]
+        tasks = [asyncio.create_task(watcher.run()) for watcher in watchers]
+        await asyncio.gather(*(watcher.ready.wait() for watcher in watchers))
+        rss_sockets = rss_bytes(pid) if pid else None
+
+        sent: Dict[Tuple[str, int], float] = {}
+        cpu_start = cpu_seconds(pid) if pid else None
+        client_cpu_start = time.process_time()
+        start = time.perf_counter()
+        moves = sum(await asyncio.gather(*(play(client, game, sent, rng) for game in setups)))
+        elapsed = time.perf_counter() - start
+        cpu_end = cpu_seconds(pid) if pid else None
+        client_cpu = time.process_time() - client_cpu_start
+        try:
+            await asyncio.wait_for(asyncio.gather(*(watcher.finished.wait() for watcher in watchers)), 10)
+        except asyncio.TimeoutError:
+            pass
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    latencies = [
+        arrival - sent_at
+        for key, sent_at in sent.items()
+        for arrival in arrivals.get(key, ())
+    ]
+    expected = len(sent) * spectators
+    cpu = None if cpu_start is None or cpu_end is None else cpu_end - cpu_start
+    return {
+        "moves": moves,
+        "seconds": elapsed,
+        "moves_per_sec": moves / elapsed,
+        "deliveries": len(latencies),
+        "missed_deliveries": expected - len(latencies),
+        "latency_ms": {
+            "p50": _ms(percentile(latencies, 0.50)),
+            "p99": _ms(percentile(latencies, 0.99)),
+            "max": _ms(max(latencies, default=None)),
+        },
+        "memory_per_game_bytes": _per(rss_start, rss_games, games),
+        "memory_per_socket_bytes": _per(rss_games, rss_sockets, games * spectators),
+        "server_cpu_seconds": cpu,
+        "server_cpu_percent": None if cpu is None else 100 * cpu / elapsed,
+        # Near 100% means the load generator, not the server, is the bottleneck
+        "client_cpu_percent": 100 * client_cpu / elapsed,
+    }
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 3)
+
+def _per(before: Optional[int], after: Optional[int], count: int) -> Optional[float]:
+    if before is None or after is None or not count:
+        return None
+    return (after - before) / count
+
+async def main(args: argparse.Namespace):
+    rng = random.Random(args.seed)
+    process = None
+    workdir = tempfile.TemporaryDirectory()
+    if args.url:
+        url = args.url
+    else:
+        port = free_port()
+        process = await start_server(port, workdir.name)
+        url = f"http://127.0.0.1:{port}"
+    ws_url = "ws" + url[len("http"):]
+    pid = process.pid if process else None
+    try:
+        rounds = []
+        for number in range(args.rounds):
+            result = await run_round(url, ws_url, args.games, args.spectators, pid, rng)
+            rounds.append(result)
+            print(
+                f"round {number + 1}: {result['moves']} moves in {result['seconds']:.2f}s "
+                f"({result['moves_per_sec']:.0f}/s), latency p50 {result['latency_ms']['p50']} ms "
+                f"p99 {result['latency_ms']['p99']} ms, missed {result['missed_deliveries']}, "
+                f"server CPU {result['server_cpu_percent'] or 0:.0f}%, client CPU {result['client_cpu_percent']:.0f}%"
+            )
+        report = {
+            "commit": git_commit(),
+            "timestamp": time.time(),
+            "python": sys.version.split()[0],
+            "games": args.games,
+            "spectators": args.spectators,
+            "rounds": rounds,
+            "server_rss_bytes": rss_bytes(pid) if pid else None,
+        }
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+        workdir.cleanup()
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--games", type=int, default=100, help="concurrent games per round")
+    parser.add_argument("--spectators", type=int, default=3, help="WebSocket spectators per game")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds of fresh games, each reported separately")
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="load_test_results.json")
+    asyncio.run(main(parser.parse_args()))
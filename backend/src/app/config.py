@@ -0,0 +1,98 @@
+"""Server settings, read once from ``TTT_*`` environment variables."""
+import os
+
+def _float(name: str, default: float) -> float:
+    return float(os.getenv(name, default))
+
+# Seconds a single WebSocket send may take before the client is evicted
+BROADCAST_SEND_TIMEOUT = _float("TTT_BROADCAST_SEND_TIMEOUT", 1.0)
+
+# Frames buffered per WebSocket before the overflow policy kicks in
+OUTBOUND_QUEUE_SIZE = int(os.getenv("TTT_OUTBOUND_QUEUE_SIZE", 32))
+
+# What to do when a client's queue is full: drop_oldest, coalesce or disconnect
+OUTBOUND_OVERFLOW_POLICY = os.getenv("TTT_OUTBOUND_OVERFLOW_POLICY", "coalesce")
+
+# Where games and updates live: "memory" (single process) or "redis" (shared by workers)
+BACKEND = os.getenv("TTT_BACKEND", "memory")
+REDIS_URL = os.getenv("TTT_REDIS_URL", "redis://localhost:6379/0")
+REDIS_PREFIX = os.getenv("TTT_REDIS_PREFIX", "ttt")
+
+# Seconds a game may sit untouched in each state before the reaper evicts it
+GAME_TTL_WAITING = _float("TTT_GAME_TTL_WAITING", 600)
+GAME_TTL_IN_PROGRESS = _float("TTT_GAME_TTL_IN_PROGRESS", 3600)
+GAME_TTL_FINISHED = _float("TTT_GAME_TTL_FINISHED", 300)
+
+# Hard cap on games held in memory; the least recently used are evicted first
+MAX_GAMES = int(os.getenv("TTT_MAX_GAMES", 100_000))
+
+# Seconds between reaper sweeps
+REAPER_INTERVAL = _float("TTT_REAPER_INTERVAL", 30)
+
+# Fraction of HTTP requests the logging middleware records (0.0 - 1.0)
+LOG_SAMPLE_RATE = _float("TTT_LOG_SAMPLE_RATE", 1.0)
+
+# Also log raw POST/PUT bodies; off by default to keep the request path cheap
+LOG_REQUEST_BODIES = os.getenv("TTT_LOG_REQUEST_BODIES", "0") == "1"
+
+# Seconds a game's recent updates stay buffered after its last client disconnects, for players who resume
+RECONNECT_GRACE = _float("TTT_RECONNECT_GRACE", 30)
+
+# Delta-frame clients get a full snapshot instead of a delta every this many versions
+SNAPSHOT_INTERVAL = int(os.getenv("TTT_SNAPSHOT_INTERVAL", 16))
+
+# Recent delta frames kept per game so a resyncing client can catch up without a snapshot
+DELTA_BUFFER_SIZE = int(os.getenv("TTT_DELTA_BUFFER_SIZE", 64))
+
+# Key for the seat tokens that prove a WebSocket client is a player; give every worker the same one
+# so tokens work on any of them and survive restarts. Empty picks a random key per process
+SEAT_SECRET = os.getenv("TTT_SEAT_SECRET", "")
+
+# Longest a find-match request waits for an opponent, in seconds
+MATCHMAKING_TIMEOUT = _float("TTT_MATCHMAKING_TIMEOUT", 30)
+# Seconds between checks that a waiting find-match client is still connected; ones that hung up lose their place
+MATCHMAKING_DISCONNECT_CHECK = _float("TTT_MATCHMAKING_DISCONNECT_CHECK", 0.5)
+
+# Most moves or game IDs accepted by one batch request
+BATCH_MAX_ITEMS = int(os.getenv("TTT_BATCH_MAX_ITEMS", 1000))
+
+# Append-only journal that lets the memory backend survive restarts; empty disables it
+JOURNAL_PATH = os.getenv("TTT_JOURNAL_PATH", "")
+# fsync each group-committed journal batch; turning it off trusts the OS page cache
+JOURNAL_FSYNC = os.getenv("TTT_JOURNAL_FSYNC", "1") == "1"
+
+# Hold finished in-memory games as just their IDs and move history, rebuilt when read
+COMPACT_FINISHED = os.getenv("TTT_COMPACT_FINISHED", "1") == "1"
+
+# Chance the medium AI plays a perfect move rather than a random one (0.0 - 1.0)
+AI_MEDIUM_SKILL = _float("TTT_AI_MEDIUM_SKILL", 0.7)
+
+# Games per lobby page when the client does not ask for a size, and the most it may ask for
+LOBBY_PAGE_SIZE = int(os.getenv("TTT_LOBBY_PAGE_SIZE", 50))
+LOBBY_MAX_PAGE_SIZE = int(os.getenv("TTT_LOBBY_MAX_PAGE_SIZE", 500))
+
+# Spectators allowed per game and across this worker; players are never refused
+MAX_SPECTATORS_PER_GAME = int(os.getenv("TTT_MAX_SPECTATORS_PER_GAME", 1000))
+MAX_SPECTATORS = int(os.getenv("TTT_MAX_SPECTATORS", 50_000))
+
+# Seconds between coalesced spectator updates; 0 sends spectators every update as it happens
+SPECTATOR_UPDATE_INTERVAL = _float("TTT_SPECTATOR_UPDATE_INTERVAL", 0)
+
+# Largest board side offered for m,n,k games; moves are stored as one byte per cell index
+MAX_BOARD_SIZE = min(int(os.getenv("TTT_MAX_BOARD_SIZE", 15)), 15)
+
+# Time controls for games created without their own: seconds per move, and per player for the whole game; 0 is untimed
+DEFAULT_MOVE_TIME = _float("TTT_DEFAULT_MOVE_TIME", 0)
+DEFAULT_GAME_TIME = _float("TTT_DEFAULT_GAME_TIME", 0)
+# Longest time control a client may ask for, in seconds
+MAX_TIME_CONTROL = _float("TTT_MAX_TIME_CONTROL", 86400)
+
+# Resolution of the shared timer wheel in seconds, and its number of slots (one turn is tick x slots)
+TIMER_TICK = _float("TTT_TIMER_TICK", 0.1)
+TIMER_SLOTS = int(os.getenv("TTT_TIMER_SLOTS", 4096))
+
+# Seconds a WebSocket may stay silent before the server pings it, and then how long it has to answer.
+# Off by default: clients must answer the JSON ping, and push-only clients such as the frontend do not;
+# uvicorn's protocol-level --ws-ping-interval/--ws-ping-timeout already drop dead connections
+HEARTBEAT_INTERVAL = _float("TTT_HEARTBEAT_INTERVAL", 0)
+HEARTBEAT_TIMEOUT = _float("TTT_HEARTBEAT_TIMEOUT", 10)
@@ -1,19 +1,39 @@
+import atexit
 import logging
+import logging.handlers
+import queue
 import sys
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import games
+from app import config
+from app.routes import games, matchmaking, metrics
 from app.middleware.logging import LoggingMiddleware
+from app.services import ai
+from app.services.game_service import game_service
+from app.services.reaper import GameReaper
+from app.services.store import MemoryGameStore
+from app.services.timers import wheel
+from app.services.websocket_manager import manager
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout),
-        logging.FileHandler('game_server.log')
-    ]
-)
+# Configure logging: the event loop only enqueues records; a listener thread
+# formats them and does the stdout/file I/O
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Records stay in-process, so skip the eager formatting QueueHandler does for pickling
+        return record
+
+log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+log_handlers = [
+    logging.StreamHandler(sys.stdout),
+    logging.FileHandler('game_server.log')
+]
+for handler in log_handlers:
+    handler.setFormatter(log_formatter)
+log_listener = logging.handlers.QueueListener(log_queue, *log_handlers, respect_handler_level=True)
+log_listener.start()
+atexit.register(log_listener.stop)
+logging.basicConfig(level=logging.INFO, handlers=[LocalQueueHandler(log_queue)])
 logger = logging.getLogger(__name__)
 
 # Create FastAPI app
@@ -35,15 +55,46 @@
 
 # Include routers
 app.include_router(games.router, prefix="/api", tags=["games"])
+app.include_router(matchmaking.router, prefix="/api", tags=["matchmaking"])
+app.include_router(metrics.router, tags=["metrics"])
+
+# Shared stores expire games themselves; in-memory games need a reaper
+reaper = GameReaper(game_service.store) if isinstance(game_service.store, MemoryGameStore) else None
 
 @app.on_event("startup")
 async def startup_event():
     logger.info("=" * 50)
     logger.info("Starting up Tic-tac-toe API server...")
     logger.info("=" * 50)
+    if not config.SEAT_SECRET and (config.BACKEND != "memory" or game_service.journal is not None):
+        # Games outlive this process or are shared with other workers, but its random seat key is not
+        logger.warning(
+            "TTT_SEAT_SECRET is not set: seat tokens only work on this worker until it restarts, "
+            "so players reconnecting elsewhere or after a restart are treated as spectators"
+        )
+    # Solve the AI's positions now rather than on the first single-player move
+    ai.build()
+    # Deliver updates published by any worker to this worker's sockets
+    game_service.broker.subscribe(manager.broadcast_to_game)
+    await game_service.broker.start()
+    if game_service.journal is not None:
+        await game_service.restore()
+        game_service.journal.start()
+        game_service.store.on_evict(game_service.journal.delete)
+    if reaper is not None:
+        game_service.store.on_evict(manager.close_game)
+        reaper.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("=" * 50)
     logger.info("Shutting down Tic-tac-toe API server...")
-    logger.info("=" * 50) 
\ No newline at end of file
+    logger.info("=" * 50)
+    await game_service.broker.stop()
+    await wheel.stop()
+    if reaper is not None:
+        await reaper.stop()
+    if game_service.journal is not None:
+        # Leave a fresh snapshot so the next start has nothing to replay
+        await game_service.journal.stop()
+        await game_service.journal.checkpoint(game_service.store.all()) 
\ No newline at end of file
@@ -1,34 +1,64 @@
 import logging
+import random
 import time
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from app import config
 
 logger = logging.getLogger(__name__)
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        start_time = time.time()
-        
-        # Log request
-        logger.info(f"Request: {request.method} {request.url}")
-        if request.method in ["POST", "PUT"]:
-            try:
-                body = await request.json()
-                logger.info(f"Request Body: {body}")
-            except:
-                pass
-
-        # Get response
-        response = await call_next(request)
-        
-        # Calculate processing time
-        process_time = time.time() - start_time
-        
-        # Log response
-        logger.info(
-            f"Response: Status {response.status_code}, "
-            f"Processed in {process_time:.3f} seconds"
-        )
-        
-        return response 
\ No newline at end of file
+class LoggingMiddleware:
+    """Pure-ASGI request logger.
+
+    Logs a ``sample_rate`` fraction of HTTP requests with lazily formatted
+    records. Request bodies are only captured when ``log_bodies`` is set, and
+    then as the raw bytes the app reads, never parsed.
+    """
+
+    def __init__(
+        self,
+        app,
+        sample_rate: float = config.LOG_SAMPLE_RATE,
+        log_bodies: bool = config.LOG_REQUEST_BODIES,
+    ):
+        self.app = app
+        self.sample_rate = sample_rate
+        self.log_bodies = log_bodies
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not logger.isEnabledFor(logging.INFO)
+            or (self.sample_rate < 1 and random.random() >= self.sample_rate)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        method = scope["method"]
+        query = scope.get("query_string")
+        logger.info("Request: %s %s%s", method, scope["path"], f"?{query.decode()}" if query else "")
+
+        status_code = 500
+        body = []
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        async def receive_wrapper():
+            message = await receive()
+            if message["type"] == "http.request":
+                body.append(message.get("body", b""))
+            return message
+
+        capture = self.log_bodies and method in ("POST", "PUT")
+        try:
+            await self.app(scope, receive_wrapper if capture else receive, send_wrapper)
+        finally:
+            if body:
+                logger.info("Request Body: %r", b"".join(body))
+            logger.info(
+                "Response: Status %s, Processed in %.3f seconds",
+                status_code, time.perf_counter() - start_time,
+            )
@@ -1,39 +1,218 @@
 from enum import Enum
-from typing import List, Optional, Dict, Any
+from typing import Annotated, Any, Callable, Dict, Hashable, List, Optional
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, BeforeValidator, Field, PlainSerializer, PrivateAttr
+from app import config
+from app.services import engine
+from app.services.serialization import dumps
 
 class GameState(str, Enum):
     WAITING = "waiting"
     IN_PROGRESS = "in_progress"
     FINISHED = "finished"
 
+class Difficulty(str, Enum):
+    EASY = "easy"
+    MEDIUM = "medium"
+    HARD = "hard"
+
+def _from_hex(value: Any) -> Any:
+    return bytes.fromhex(value) if isinstance(value, str) else value
+
+def _to_hex(value: bytes) -> str:
+    return value.hex()
+
+# One byte per move, the cell index; hex in JSON so every cell index survives the round trip
+MoveHistory = Annotated[bytes, BeforeValidator(_from_hex), PlainSerializer(_to_hex, when_used="json")]
+
 class Game(BaseModel):
     id: UUID
     player_x: UUID
     player_o: Optional[UUID] = None
-    board: List[List[Optional[str]]]
+    x_mask: int = 0
+    o_mask: int = 0
     current_turn: str
     status: GameState
     winner: Optional[str] = None
+    # Bumped on every mutation; clients can use it to order updates
+    version: int = 0
+    # Cell index marked by the mutation that produced this version, if it was a move
+    last_move: Optional[int] = None
+    # Set on the version a second player's join produced, so lobby feeds can drop the game
+    joined: bool = False
+    # Every move so far, in order; X moves first
+    moves: MoveHistory = b""
+    # Set when player O is the server AI, which replies to every X move
+    ai: Optional[Difficulty] = None
+    # Board shape and the line length that wins
+    rows: int = engine.SIZE
+    cols: int = engine.SIZE
+    win_length: int = engine.SIZE
+    # Time controls: seconds allowed per move, and per player for the whole game; None is untimed
+    move_time: Optional[float] = None
+    game_time: Optional[float] = None
+    # Each player's unused game time, and when the player to move started their turn (Unix time)
+    time_left_x: Optional[float] = None
+    time_left_o: Optional[float] = None
+    turn_started: Optional[float] = None
+    # The mark that lost by running out of time
+    timed_out: Optional[str] = None
+
+    # Encoded frames for the current version, keyed by variant
+    _encoded: Dict[Hashable, bytes] = PrivateAttr(default_factory=dict)
+
+    @property
+    def geometry(self) -> engine.Geometry:
+        """Get the rules for this game's board shape."""
+        return engine.geometry(self.rows, self.cols, self.win_length)
+
+    @property
+    def board(self) -> List[List[Optional[str]]]:
+        """Get the board as rows of marks, built from the player bitboards."""
+        return self.geometry.to_rows(self.x_mask, self.o_mask)
 
     @property
     def player_count(self) -> int:
         """Get the number of players currently in the game."""
         return 1 if self.player_o is None else 2
 
+    @property
+    def timed(self) -> bool:
+        """Check whether the game has a time control."""
+        return self.move_time is not None or self.game_time is not None
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """Get when the player to move runs out of time (Unix time), while their clock is running."""
+        if self.turn_started is None:
+            return None
+        limits = []
+        if self.move_time is not None:
+            limits.append(self.move_time)
+        if self.game_time is not None:
+            limits.append(self.time_left_x if self.current_turn == "X" else self.time_left_o)
+        return self.turn_started + min(limits)
+
+    def start_clock(self, now: float):
+        """Start the clock of the player to move, if the game is timed."""
+        if self.timed:
+            self.turn_started = now
+
+    def stop_clock(self, now: float):
+        """Stop the running clock, charging the player to move for the time they took."""
+        if self.turn_started is None:
+            return
+        if self.game_time is not None:
+            spent = now - self.turn_started
+            if self.current_turn == "X":
+                self.time_left_x = max(0.0, self.time_left_x - spent)
+            else:
+                self.time_left_o = max(0.0, self.time_left_o - spent)
+        self.turn_started = None
+
+    def draft(self) -> "Game":
+        """Get a copy to mutate, so readers keep seeing this version until the copy is saved."""
+        game = self.model_copy()
+        # The shallow copy would share the frame cache with this version
+        game.__pydantic_private__["_encoded"] = {}
+        return game
+
+    def bump_version(self, move: Optional[int] = None, joined: bool = False):
+        """Record a mutation: advance the version and drop the cached frames.
+
+        ``move`` is the cell index marked by this mutation, if it was a move;
+        ``joined`` says it seated the second player.
+        """
+        self.version += 1
+        self.last_move = move
+        self.joined = joined
+        self._encoded.clear()
+
+    def snapshot(self, player_id: Optional[UUID] = None) -> Dict[str, Any]:
+        """Get the game state as a JSON-ready dict in the GameResponse shape.
+
+        Boards other than the standard 3x3 also carry their shape and win length,
+        timed games in play their clock, and games lost on time who timed out.
+        """
+        snapshot = {
+            "game_id": str(self.id),
+            "player_id": None if player_id is None else str(player_id),
+            "board": self.board,
+            "current_turn": self.current_turn,
+            "status": self.status.value,
+            "winner": self.winner,
+            "player_count": self.player_count,
+            "version": self.version,
+        }
+        if not self.geometry.standard:
+            snapshot.update(rows=self.rows, cols=self.cols, win_length=self.win_length)
+        if self.timed and self.status != GameState.FINISHED:
+            snapshot["clock"] = {
+                "move_time": self.move_time,
+                "game_time": self.game_time,
+                "time_left": None if self.game_time is None else {"X": self.time_left_x, "O": self.time_left_o},
+                "deadline": self.deadline,
+            }
+        if self.timed_out is not None:
+            snapshot["timed_out"] = self.timed_out
+        return snapshot
+
+    def delta(self) -> Dict[str, Any]:
+        """Get what the latest mutation changed, as a JSON-ready dict."""
+        cell = mark = None
+        if self.last_move is not None:
+            cell = list(divmod(self.last_move, self.cols))
+            mark = "X" if self.x_mask >> self.last_move & 1 else "O"
+        return {
+            "seq": self.version,
+            "cell": cell,
+            "mark": mark,
+            "status": self.status.value,
+            "current_turn": self.current_turn,
+            "winner": self.winner,
+        }
+
+    def cached(self, key: Hashable, encode: Callable[[], bytes]) -> bytes:
+        """Get an encoded frame for the current version, encoding it at most once."""
+        # Look the cache up directly; pydantic's __getattr__ for private attributes is slow
+        cache = self.__pydantic_private__["_encoded"]
+        data = cache.get(key)
+        if data is None:
+            data = cache[key] = encode()
+        return data
+
+    def encoded(self, player_id: Optional[UUID] = None) -> bytes:
+        """Get the snapshot as JSON bytes, encoding it at most once per version."""
+        return self.cached(player_id, lambda: dumps(self.snapshot(player_id)))
+
 class GameMove(BaseModel):
     player_id: UUID
     position: List[int]
 
+class BatchMove(GameMove):
+    game_id: UUID
+
+class BatchMoveRequest(BaseModel):
+    moves: List[BatchMove] = Field(max_length=config.BATCH_MAX_ITEMS)
+
+class BatchStateRequest(BaseModel):
+    game_ids: List[UUID] = Field(max_length=config.BATCH_MAX_ITEMS)
+
 class GameResponse(BaseModel):
     game_id: UUID
     player_id: Optional[UUID] = None
+    seat_token: Optional[str] = None
     board: List[List[Optional[str]]]
     current_turn: Optional[str] = None
     status: GameState
     winner: Optional[str] = None
     player_count: int
+    version: int = 0
+    rows: Optional[int] = None
+    cols: Optional[int] = None
+    win_length: Optional[int] = None
+    clock: Optional[Dict[str, Any]] = None
+    timed_out: Optional[str] = None
 
 class ErrorResponse(BaseModel):
     code: str
@@ -0,0 +1,51 @@
+"""Messages clients may send over a game's WebSocket.
+
+Every message carries a ``type`` and an optional client-chosen ``id`` that is
+echoed back in the reply, so clients can match replies to requests.
+"""
+from typing import Annotated, List, Literal, Optional, Union
+from uuid import UUID
+from pydantic import BaseModel, Field, TypeAdapter
+
+RequestId = Optional[Union[int, str]]
+
+class JoinMessage(BaseModel):
+    type: Literal["join"]
+    id: RequestId = None
+
+class MoveMessage(BaseModel):
+    type: Literal["move"]
+    id: RequestId = None
+    # Ignored: the move is made for the seat the socket proved with its seat token
+    player_id: Optional[UUID] = None
+    position: List[int]
+
+class PingMessage(BaseModel):
+    type: Literal["ping"]
+    id: RequestId = None
+
+class PongMessage(BaseModel):
+    """Answer to the server's heartbeat ping; needs no reply."""
+    type: Literal["pong"]
+    id: RequestId = None
+
+class ResyncMessage(BaseModel):
+    type: Literal["resync"]
+    id: RequestId = None
+    # Last delta seq the client applied; omit to get a full snapshot
+    last_seq: Optional[int] = None
+
+ClientMessage = Annotated[
+    Union[JoinMessage, MoveMessage, PingMessage, PongMessage, ResyncMessage],
+    Field(discriminator="type"),
+]
+
+client_message_adapter: TypeAdapter[ClientMessage] = TypeAdapter(ClientMessage)
+
+def error_code(error: ValueError) -> str:
+    """Map a GameService error to the code used by REST errors and error frames."""
+    if str(error) == "Game not found":
+        return "GAME_NOT_FOUND"
+    if str(error) == "Invalid position":
+        return "INVALID_POSITION"
+    return "GAME_RULE_VIOLATION"
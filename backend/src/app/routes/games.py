@@ -1,42 +1,138 @@
-from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import APIRouter, HTTPException, Query, WebSocket, WebSocketDisconnect
+from typing import List, Optional
 from uuid import UUID
-from app.models.game import GameMove, GameResponse, ErrorResponse, GameState
+from app import config
+from app.models.game import BatchMoveRequest, BatchStateRequest, Difficulty, GameMove, GameResponse, ErrorResponse, GameState
+from app.models.protocol import client_message_adapter, error_code
+from app.services import engine, seats
+from app.services.frames import BINARY_SUBPROTOCOL, Encoding, Frame, FrameMode, state_frame
 from app.services.game_service import game_service
-from app.services.websocket_manager import manager
+from app.services.serialization import FastJSONResponse, dumps, loads
+from app.services.websocket_manager import LOBBY, Connection, lobby_page, manager
 import logging
 
 logger = logging.getLogger(__name__)
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 
 @router.websocket("/games/{game_id}/ws")
-async def websocket_endpoint(websocket: WebSocket, game_id: UUID):
-    """WebSocket endpoint for real-time game updates."""
+async def websocket_endpoint(
+    websocket: WebSocket,
+    game_id: UUID,
+    frames: FrameMode = FrameMode.FULL,
+    encoding: Encoding = Encoding.JSON,
+    seat_token: Optional[str] = None,
+    last_seq: Optional[int] = None,
+):
+    """WebSocket endpoint for real-time game updates and join/move/ping/pong/resync requests.
+
+    Connecting with a seat's ``seat_token`` makes the client a player; anyone
+    else is a spectator, subject to the spectator caps and update interval.
+    A player reconnecting with the ``last_seq`` it saw resumes from there.
+    """
+    subprotocol = None
+    if BINARY_SUBPROTOCOL in websocket.scope.get("subprotocols", ()):
+        encoding = Encoding.BINARY
+        subprotocol = BINARY_SUBPROTOCOL
     try:
-        await manager.connect(websocket, game_id)
+        connection = await manager.connect(websocket, game_id, frames, encoding, subprotocol, seat_token, last_seq)
+        if connection is None:
+            return
         while True:
             try:
-                # Keep the connection alive and wait for disconnection
-                await websocket.receive_text()
+                text = await websocket.receive_text()
             except WebSocketDisconnect:
                 logger.info(f"WebSocket client disconnected from game {game_id}")
                 break
+            connection.touch()
+            for frame in await handle_client_message(connection, game_id, text):
+                manager.send(websocket, game_id, frame)
     except Exception as e:
         logger.error(f"Error in WebSocket connection: {str(e)}")
     finally:
         await manager.disconnect(websocket, game_id)
 
+async def handle_client_message(connection: Connection, game_id: UUID, text: str) -> List[Frame]:
+    """Run one client request against the game and return the reply frames."""
+    try:
+        message = client_message_adapter.validate_python(loads(text))
+    except ValueError as e:
+        return [error_frame(None, "BAD_REQUEST", "Malformed message", {"error": str(e)})]
+
+    if message.type == "pong":
+        return []
+    try:
+        if message.type == "ping":
+            reply = {"type": "pong", "id": message.id}
+        elif message.type == "join":
+            game, player_id = await game_service.join_game(game_id)
+            manager.promote(connection, game_id, player_id)
+            reply = {
+                "type": "joined", "id": message.id, "player_id": player_id,
+                "seat_token": seats.seat_token(game_id, player_id), "version": game.version,
+            }
+        elif message.type == "move":
+            if connection.player_id is None:
+                return [error_frame(message.id, "NOT_A_PLAYER", "Only players can move", {"game_id": str(game_id)})]
+            game = await game_service.make_move(game_id, connection.player_id, message.position)
+            reply = {"type": "ack", "id": message.id, "version": game.version}
+        elif connection.frames == FrameMode.DELTA or connection.encoding == Encoding.BINARY:
+            # Replay the missed deltas when they are still buffered, else send the full state
+            game = await game_service.get_game(game_id)
+            frames = None
+            if connection.frames == FrameMode.DELTA and message.last_seq is not None:
+                frames = manager.replay(game_id, message.last_seq, game.version, connection.encoding, game.cols)
+            if frames is None:
+                frames = [state_frame(game, connection.frames, connection.encoding)]
+            reply = {"type": "ack", "id": message.id, "version": game.version}
+            return frames + [dumps(reply).decode()]
+        else:
+            # Splice the cached snapshot into the reply instead of re-encoding it
+            game = await game_service.get_game(game_id)
+            return [(
+                b'{"type":"state","id":' + dumps(message.id) + b',"game":' + game.encoded() + b"}"
+            ).decode()]
+    except ValueError as e:
+        return [error_frame(message.id, error_code(e), str(e), {"game_id": str(game_id)})]
+    return [dumps(reply).decode()]
+
+def error_frame(request_id, code: str, message: str, details: dict) -> str:
+    return dumps({
+        "type": "error",
+        "id": request_id,
+        **ErrorResponse(code=code, message=message, details=details).model_dump(),
+    }).decode()
+
 @router.post("/games", response_model=GameResponse)
-async def create_game():
-    """Create a new game."""
+async def create_game(
+    ai: Optional[Difficulty] = None,
+    rows: int = engine.SIZE,
+    cols: int = engine.SIZE,
+    win_length: Optional[int] = None,
+    move_time: Optional[float] = None,
+    game_time: Optional[float] = None,
+):
+    """Create a new game, against the server AI if a difficulty is given.
+
+    ``rows``/``cols``/``win_length`` create an m,n,k game; the win length defaults
+    to the shorter side, capped at five. ``move_time``/``game_time`` set the time
+    controls, in seconds per move and per player for the whole game.
+    """
+    if win_length is None:
+        win_length = min(rows, cols, 5)
     try:
-        game, player_id = await game_service.create_game()
-        return GameResponse(
-            game_id=game.id,
-            player_id=player_id,
-            board=game.board,
-            status=game.status,
-            current_turn=game.current_turn,
-            player_count=game.player_count
+        game, player_id = await game_service.create_game(ai, rows, cols, win_length, move_time, game_time)
+        return FastJSONResponse(seats.seated(game, player_id))
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(
+                code="INVALID_GAME_OPTIONS",
+                message=str(e),
+                details={
+                    "rows": rows, "cols": cols, "win_length": win_length, "ai": ai,
+                    "move_time": move_time, "game_time": game_time,
+                }
+            ).model_dump()
         )
     except Exception as e:
         raise HTTPException(
@@ -48,19 +144,48 @@ async def create_game():
             ).model_dump()
         )
 
+@router.get("/games")
+async def list_games(
+    status: GameState = GameState.WAITING,
+    limit: int = Query(config.LOBBY_PAGE_SIZE, ge=1, le=config.LOBBY_MAX_PAGE_SIZE),
+    after: Optional[str] = None,
+):
+    """List games in a state, oldest first, a page at a time; pass ``next`` back as ``after``."""
+    try:
+        games, cursor = await game_service.list_games(status, after, limit)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(
+                code="INVALID_CURSOR",
+                message=str(e),
+                details={"after": after}
+            ).model_dump()
+        )
+    return FastJSONResponse(b"{" + lobby_page(games, cursor) + b"}")
+
+@router.websocket("/lobby/ws")
+async def lobby_websocket(websocket: WebSocket):
+    """Lobby feed: the first page of open games, then an event whenever one is added or removed."""
+    try:
+        connection = await manager.connect_lobby(websocket)
+        while True:
+            try:
+                await websocket.receive_text()
+            except WebSocketDisconnect:
+                break
+            connection.touch()
+    except Exception as e:
+        logger.error(f"Error in lobby WebSocket connection: {str(e)}")
+    finally:
+        await manager.disconnect(websocket, LOBBY)
+
 @router.post("/games/{game_id}/join", response_model=GameResponse)
 async def join_game(game_id: UUID):
     """Join an existing game."""
     try:
         game, player_id = await game_service.join_game(game_id)
-        return GameResponse(
-            game_id=game.id,
-            player_id=player_id,
-            board=game.board,
-            current_turn=game.current_turn,
-            status=game.status,
-            player_count=game.player_count
-        )
+        return FastJSONResponse(seats.seated(game, player_id))
     except ValueError as e:
         if str(e) == "Game not found":
             raise HTTPException(
@@ -85,14 +210,7 @@ async def make_move(game_id: UUID, move: GameMove):
     """Make a move in the game."""
     try:
         game = await game_service.make_move(game_id, move.player_id, move.position)
-        return GameResponse(
-            game_id=game.id,
-            board=game.board,
-            current_turn=game.current_turn,
-            status=game.status,
-            winner=game.winner,
-            player_count=game.player_count
-        )
+        return FastJSONResponse(game.encoded())
     except ValueError as e:
         if str(e) == "Game not found":
             raise HTTPException(
@@ -129,16 +247,9 @@ async def make_move(game_id: UUID, move: GameMove):
 async def get_game(game_id: UUID):
     """Get the current state of a game."""
     try:
-        game = game_service.get_game(game_id)
-        return GameResponse(
-            game_id=game.id,
-            player_id=game.player_x,  # Include player X's ID in the response
-            board=game.board,
-            current_turn=game.current_turn,
-            status=game.status,
-            winner=game.winner,
-            player_count=game.player_count
-        )
+        game = await game_service.get_game(game_id)
+        # Include player X's ID in the response
+        return FastJSONResponse(game.encoded(game.player_x))
     except ValueError as e:
         raise HTTPException(
             status_code=404,
@@ -147,4 +258,97 @@ async def get_game(game_id: UUID):
                 message="Game not found",
                 details={"game_id": str(game_id)}
             ).model_dump()
-        ) 
\ No newline at end of file
+        )
+
+@router.post("/games/batch/moves")
+async def make_moves(batch: BatchMoveRequest):
+    """Apply many moves across many games, reporting each move's outcome in request order."""
+    results = await game_service.make_moves(
+        [(move.game_id, move.player_id, move.position) for move in batch.moves]
+    )
+    items = []
+    for move, result in zip(batch.moves, results):
+        if isinstance(result, ValueError):
+            items.append({
+                "game_id": move.game_id,
+                "ok": False,
+                "error": ErrorResponse(code=error_code(result), message=str(result)),
+            })
+        else:
+            items.append({"game_id": move.game_id, "ok": True, "version": result})
+    return FastJSONResponse({"results": items})
+
+@router.post("/games/batch/states")
+async def get_games(batch: BatchStateRequest):
+    """Get the states of many games, in request order; unknown games get an error entry."""
+    games = await game_service.get_games(batch.game_ids)
+    items = []
+    for game_id, game in zip(batch.game_ids, games):
+        if game is None:
+            items.append(dumps({
+                "game_id": game_id,
+                "error": ErrorResponse(code="GAME_NOT_FOUND", message="Game not found"),
+            }))
+        else:
+            # Reuse each game's cached snapshot rather than re-encoding it
+            items.append(game.encoded())
+    return FastJSONResponse(b'{"games":[' + b",".join(items) + b"]}")
+
+@router.get("/games/{game_id}/history")
+async def get_history(game_id: UUID):
+    """Get a game's moves in the order they were played."""
+    try:
+        game = await game_service.get_game(game_id)
+    except ValueError:
+        raise HTTPException(
+            status_code=404,
+            detail=ErrorResponse(
+                code="GAME_NOT_FOUND",
+                message="Game not found",
+                details={"game_id": str(game_id)}
+            ).model_dump()
+        )
+    return FastJSONResponse({
+        "game_id": game.id,
+        "moves": [
+            {"mark": "XO"[ply % 2], "position": list(divmod(cell, game.cols))}
+            for ply, cell in enumerate(game.moves)
+        ],
+        "status": game.status,
+        "winner": game.winner,
+        "version": game.version,
+    })
+
+@router.get("/games/{game_id}/replay")
+async def replay_game(game_id: UUID, ply: Optional[int] = Query(None, ge=0)):
+    """Get the board after the first ``ply`` moves of a game (all of them by default)."""
+    try:
+        game, ply, (x_mask, o_mask, current_turn, winner, status) = await game_service.replay(game_id, ply)
+    except ValueError as e:
+        if str(e) == "Game not found":
+            raise HTTPException(
+                status_code=404,
+                detail=ErrorResponse(
+                    code="GAME_NOT_FOUND",
+                    message="Game not found",
+                    details={"game_id": str(game_id)}
+                ).model_dump()
+            )
+        raise HTTPException(
+            status_code=400,
+            detail=ErrorResponse(
+                code="INVALID_PLY",
+                message=str(e),
+                details={"game_id": str(game_id), "ply": ply}
+            ).model_dump()
+        )
+    if game.status == GameState.WAITING:
+        status = game.status
+    return FastJSONResponse({
+        "game_id": game.id,
+        "ply": ply,
+        "board": game.geometry.to_rows(x_mask, o_mask),
+        "current_turn": current_turn,
+        "status": status,
+        "winner": winner,
+    })
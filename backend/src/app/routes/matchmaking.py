@@ -0,0 +1,67 @@
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from typing import Optional
+from uuid import UUID, uuid4
+from app import config
+from app.models.game import ErrorResponse, GameResponse
+from app.services import seats
+from app.services.matchmaking import matchmaker
+from app.services.serialization import FastJSONResponse
+
+router = APIRouter(default_response_class=FastJSONResponse)
+
+# Matchmaking errors by message: (status code, error code)
+ERRORS = {
+    "Matchmaking timed out": (408, "MATCHMAKING_TIMEOUT"),
+    "Matchmaking cancelled": (409, "MATCHMAKING_CANCELLED"),
+    "Ticket already queued": (409, "TICKET_CONFLICT"),
+    "Matchmaking needs the memory backend": (503, "MATCHMAKING_UNAVAILABLE"),
+}
+
+@router.post("/matchmaking", response_model=GameResponse)
+async def find_match(
+    request: Request,
+    bucket: str = "default",
+    ticket_id: Optional[UUID] = None,
+    timeout: float = Query(config.MATCHMAKING_TIMEOUT, gt=0, le=config.MATCHMAKING_TIMEOUT),
+):
+    """Long-poll for an opponent and return the new game once paired.
+
+    Starlette does not cancel a request whose client hangs up, so the search
+    checks for that itself and withdraws its ticket rather than leave a ghost
+    in the queue for the next arrival to be paired with.
+    """
+    ticket = ticket_id or uuid4()
+    search = asyncio.ensure_future(matchmaker.find_match(bucket, ticket, timeout))
+    try:
+        while not search.done():
+            await asyncio.wait([search], timeout=config.MATCHMAKING_DISCONNECT_CHECK)
+            if not search.done() and await request.is_disconnected():
+                # Only withdraws a ticket still waiting; one already paired gets its game
+                matchmaker.cancel(ticket)
+        game, player_id = await search
+        return FastJSONResponse(seats.seated(game, player_id))
+    except ValueError as e:
+        status_code, code = ERRORS.get(str(e), (422, "MATCHMAKING_ERROR"))
+        raise HTTPException(
+            status_code=status_code,
+            detail=ErrorResponse(
+                code=code,
+                message=str(e),
+                details={"bucket": bucket, "ticket_id": None if ticket_id is None else str(ticket_id)}
+            ).model_dump()
+        )
+
+@router.delete("/matchmaking/{ticket_id}", status_code=204)
+async def cancel_match(ticket_id: UUID):
+    """Cancel a waiting find-match request."""
+    if not matchmaker.cancel(ticket_id):
+        raise HTTPException(
+            status_code=404,
+            detail=ErrorResponse(
+                code="TICKET_NOT_FOUND",
+                message="Ticket not found",
+                details={"ticket_id": str(ticket_id)}
+            ).model_dump()
+        )
+    return Response(status_code=204)
@@ -0,0 +1,75 @@
+"""Server-side opponent that answers from a precomputed table of positions.
+
+The table holds every non-terminal position reachable from the empty board
+(4,520 of them), each with its perfect-play moves and its legal moves, so a
+reply is a dict lookup instead of a search. It is solved once, at startup or
+on first use, in a fraction of a second.
+
+Perfect play prefers faster wins and slower losses. Lower difficulties mix in
+random legal moves.
+"""
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+from app import config
+from app.models.game import Difficulty, Game
+from app.services import engine
+
+logger = logging.getLogger(__name__)
+
+# x_mask | o_mask << CELLS -> (perfect-play cells, legal cells)
+Table = Dict[int, Tuple[Tuple[int, ...], Tuple[int, ...]]]
+
+# Chance of a perfect move at each difficulty; otherwise any legal move
+SKILL = {
+    Difficulty.EASY: 0.0,
+    Difficulty.MEDIUM: config.AI_MEDIUM_SKILL,
+    Difficulty.HARD: 1.0,
+}
+
+_table: Optional[Table] = None
+_random = random.Random()
+
+def _solve(x_mask: int, o_mask: int, x_to_move: bool, table: Table, values: Dict[int, int]) -> int:
+    """Score a position for the player to move, adding it and its successors to the table."""
+    key = x_mask | o_mask << engine.CELLS
+    if key in values:
+        return values[key]
+    taken = x_mask | o_mask
+    legal = [cell for cell in range(engine.CELLS) if not taken >> cell & 1]
+    scores: List[int] = []
+    for cell in legal:
+        bit = 1 << cell
+        next_x, next_o = (x_mask | bit, o_mask) if x_to_move else (x_mask, o_mask | bit)
+        if engine.is_win(next_x if x_to_move else next_o):
+            # Winning with more cells left is better
+            scores.append(len(legal))
+        elif engine.STANDARD.is_full(next_x, next_o):
+            scores.append(0)
+        else:
+            scores.append(-_solve(next_x, next_o, not x_to_move, table, values))
+    best = max(scores)
+    table[key] = (tuple(cell for cell, score in zip(legal, scores) if score == best), tuple(legal))
+    values[key] = best
+    return best
+
+def build() -> Table:
+    """Solve every reachable position, once per process."""
+    global _table
+    if _table is None:
+        start = time.perf_counter()
+        table: Table = {}
+        _solve(0, 0, True, table, {})
+        _table = table
+        logger.info(f"Solved {len(table)} positions for the AI in {time.perf_counter() - start:.3f}s")
+    return _table
+
+def choose(game: Game) -> List[int]:
+    """Pick the AI's move in a game at its difficulty, as a [row, col] position."""
+    best, legal = build()[game.x_mask | game.o_mask << engine.CELLS]
+    if _random.random() < SKILL[game.ai]:
+        cell = _random.choice(best)
+    else:
+        cell = _random.choice(legal)
+    return list(divmod(cell, engine.SIZE))
@@ -0,0 +1,139 @@
+"""Compact binary encoding of game frames, for clients that negotiate it.
+
+All integers are big-endian except the board, which is little-endian so that
+cell 0 sits in the low bits of its first byte.
+
+State frame (25 bytes), sent wherever a JSON client gets a full snapshot::
+
+    B    kind, 1
+    16s  game ID as raw UUID bytes
+    I    version
+    B    flags
+    3s   board, 2 bits per cell in row-major order: 0 empty, 1 X, 2 O
+
+Boards other than 3x3 get a board state frame instead, the same fields
+followed by their shape and a board of ``ceil(2 * rows * cols / 8)`` bytes::
+
+    B    kind, 3
+    16s  game ID as raw UUID bytes
+    I    version
+    B    flags
+    B    rows
+    B    columns
+    B    win length
+    ...  board
+
+Delta frame (7 bytes), sent wherever a JSON client gets a delta::
+
+    B    kind, 2
+    I    seq
+    B    cell index marked by the update, 255 if it was not a move
+    B    flags
+
+Flags pack the status in bits 0-1 (0 waiting, 1 in progress, 2 finished),
+the current turn in bit 2 (0 X, 1 O), the winner in bits 3-4 (0 none, 1 X,
+2 O), and either the player count minus one (state frames) or the mark placed
+(delta frames, 0 X, 1 O) in bit 5.
+"""
+import struct
+from typing import Any, Dict, Optional
+from uuid import UUID
+from app.models.game import Game, GameState
+from app.services import engine
+
+STATE = 1
+DELTA = 2
+BOARD = 3
+
+BOARD_BYTES = (2 * engine.CELLS + 7) // 8
+NO_CELL = 255
+
+_STATE = struct.Struct(f">B16sIB{BOARD_BYTES}s")
+_BOARD = struct.Struct(">B16sIBBBB")
+_DELTA = struct.Struct(">BIBB")
+
+_STATUSES = (GameState.WAITING, GameState.IN_PROGRESS, GameState.FINISHED)
+_STATUS_CODES = {status.value: code for code, status in enumerate(_STATUSES)}
+_MARKS = (None, "X", "O")
+
+# _SPREAD[b] moves bit i of the byte b to bit 2i, interleaving a mask into 2-bit cells
+_SPREAD = tuple(sum(((b >> i) & 1) << (2 * i) for i in range(8)) for b in range(256))
+
+def _spread(mask: int) -> int:
+    packed = 0
+    shift = 0
+    while mask:
+        packed |= _SPREAD[mask & 0xFF] << shift
+        mask >>= 8
+        shift += 16
+    return packed
+
+def _flags(status: str, current_turn: str, winner: Optional[str]) -> int:
+    return (
+        _STATUS_CODES[status]
+        | (current_turn == "O") << 2
+        | _MARKS.index(winner) << 3
+    )
+
+def encode_state(game: Game) -> bytes:
+    """Encode a game's full state as a binary state frame."""
+    flags = _flags(game.status.value, game.current_turn, game.winner) | (game.player_o is not None) << 5
+    board = _spread(game.x_mask) | _spread(game.o_mask) << 1
+    if game.geometry.standard:
+        return _STATE.pack(STATE, game.id.bytes, game.version, flags, board.to_bytes(BOARD_BYTES, "little"))
+    header = _BOARD.pack(BOARD, game.id.bytes, game.version, flags, game.rows, game.cols, game.win_length)
+    return header + board.to_bytes((2 * game.geometry.cells + 7) // 8, "little")
+
+def encode_delta(delta: Dict[str, Any], cols: int = engine.SIZE) -> bytes:
+    """Encode a ``Game.delta()`` dict as a binary delta frame, for a board ``cols`` wide."""
+    flags = _flags(delta["status"], delta["current_turn"], delta["winner"]) | (delta["mark"] == "O") << 5
+    cell = NO_CELL if delta["cell"] is None else delta["cell"][0] * cols + delta["cell"][1]
+    return _DELTA.pack(DELTA, delta["seq"], cell, flags)
+
+def _unflags(flags: int) -> Dict[str, Any]:
+    return {
+        "status": _STATUSES[flags & 0b11].value,
+        "current_turn": "O" if flags & 0b100 else "X",
+        "winner": _MARKS[flags >> 3 & 0b11],
+    }
+
+def decode_state(data: bytes) -> Dict[str, Any]:
+    """Decode a binary state or board state frame into the JSON snapshot shape, without ``player_id``."""
+    if data[0] == BOARD:
+        _, game_id, version, flags, rows, cols, win_length = _BOARD.unpack_from(data)
+        board_bytes = data[_BOARD.size:]
+        shape = {"rows": rows, "cols": cols, "win_length": win_length}
+    else:
+        _, game_id, version, flags, board_bytes = _STATE.unpack(data)
+        rows = cols = engine.SIZE
+        shape = {}
+    board = int.from_bytes(board_bytes, "little")
+    cells = [_MARKS[board >> (2 * cell) & 0b11] for cell in range(rows * cols)]
+    return {
+        "game_id": str(UUID(bytes=game_id)),
+        "board": [cells[row * cols:(row + 1) * cols] for row in range(rows)],
+        **_unflags(flags),
+        "player_count": 2 if flags & 0b100000 else 1,
+        "version": version,
+        **shape,
+    }
+
+def decode_delta(data: bytes, cols: int = engine.SIZE) -> Dict[str, Any]:
+    """Decode a binary delta frame into the JSON delta frame shape, for a board ``cols`` wide."""
+    _, seq, cell, flags = _DELTA.unpack(data)
+    moved = cell != NO_CELL
+    return {
+        "type": "delta",
+        "seq": seq,
+        "cell": list(divmod(cell, cols)) if moved else None,
+        "mark": ("O" if flags & 0b100000 else "X") if moved else None,
+        **_unflags(flags),
+    }
+
+def decode(data: bytes, cols: int = engine.SIZE) -> Dict[str, Any]:
+    """Decode any kind of binary frame, dispatching on its first byte."""
+    if data[0] in (STATE, BOARD):
+        return {"type": "state", **decode_state(data)}
+    if data[0] == DELTA:
+        return decode_delta(data, cols)
+    raise ValueError(f"Unknown binary frame kind: {data[0]}")
@@ -0,0 +1,64 @@
+"""Deadlines of timed games: noticing when the player to move runs out of time.
+
+Each timed game in play holds one timer on the shared timer wheel for its
+current deadline, replaced on every move, so hundreds of thousands of running
+clocks cost a dict entry and a timer each rather than a task each. Games whose
+timers fire are queued and handed to ``expire`` by one background task, all of
+the ones due at the same tick together, so their journal writes share a batch.
+
+Deadlines live in this worker's memory; the worker that applied a game's
+latest mutation watches it. ``expire`` gets the version the deadline was set
+at and must do nothing if the game has moved on since.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import UUID
+from app.models.game import Game
+from app.services.timers import Timer, TimerWheel, wheel
+
+logger = logging.getLogger(__name__)
+
+class DeadlineService:
+    def __init__(self, expire: Callable[[UUID, int], Awaitable[Any]], timers: TimerWheel = wheel):
+        self.expire = expire
+        self.timers = timers
+        # game_id -> timer for its current deadline
+        self.deadlines: Dict[UUID, Timer] = {}
+        self.due: List[Tuple[UUID, int]] = []
+        self._worker: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.deadlines)
+
+    def watch(self, game: Game):
+        """Schedule a game's current deadline, replacing its previous one; games without a running clock get none."""
+        timer = self.deadlines.pop(game.id, None)
+        if timer is not None:
+            timer.cancel()
+        deadline = game.deadline
+        if deadline is not None:
+            self.deadlines[game.id] = self.timers.schedule(
+                max(0.0, deadline - time.time()), self._fire, game.id, game.version
+            )
+
+    def _fire(self, game_id: UUID, version: int):
+        # A game's earlier timers are cancelled when it is watched again, so this is its current one
+        del self.deadlines[game_id]
+        self.due.append((game_id, version))
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self):
+        try:
+            while self.due:
+                due, self.due = self.due, []
+                results = await asyncio.gather(
+                    *(self.expire(game_id, version) for game_id, version in due), return_exceptions=True
+                )
+                for (game_id, _), result in zip(due, results):
+                    if isinstance(result, Exception):
+                        logger.error(f"Error expiring the deadline of game {game_id}: {str(result)}")
+        finally:
+            self._worker = None
@@ -0,0 +1,107 @@
+"""Bitboard tic-tac-toe engine.
+
+Cells are numbered row-major (``row * SIZE + col``) and each player's marks are
+kept as a 9-bit mask, so occupancy, win and draw checks are single integer
+operations instead of scans over a nested list.
+
+Larger m,n,k boards (e.g. 15x15 five-in-a-row) use the same layout through
+``Geometry``: masks are just wider ints, and a win is found by walking only the
+four lines through the last move.
+"""
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+SIZE = 3
+CELLS = SIZE * SIZE
+
+def _line(cells) -> int:
+    mask = 0
+    for cell in cells:
+        mask |= 1 << cell
+    return mask
+
+WIN_MASKS: Tuple[int, ...] = (
+    # Rows
+    *(_line(row * SIZE + col for col in range(SIZE)) for row in range(SIZE)),
+    # Columns
+    *(_line(row * SIZE + col for row in range(SIZE)) for col in range(SIZE)),
+    # Diagonals
+    _line(i * SIZE + i for i in range(SIZE)),
+    _line(i * SIZE + (SIZE - 1 - i) for i in range(SIZE)),
+)
+
+# _WINNING[mask] is 1 when the mask contains any winning line.
+_WINNING = bytes(
+    any(mask & line == line for line in WIN_MASKS) for mask in range(1 << CELLS)
+)
+
+def is_occupied(x_mask: int, o_mask: int, bit: int) -> bool:
+    """Check whether either player has a mark on the given cell bit."""
+    return bool((x_mask | o_mask) & bit)
+
+def is_win(mask: int) -> bool:
+    """Check whether a player's mask contains a winning line."""
+    return bool(_WINNING[mask])
+
+# Steps along a row, a column and both diagonals
+_DIRECTIONS = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+class Geometry:
+    """Board dimensions and win length, with the rules that depend on them."""
+
+    def __init__(self, rows: int, cols: int, win_length: int):
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        self.cells = rows * cols
+        self.full_mask = (1 << self.cells) - 1
+        self.standard = (rows, cols, win_length) == (SIZE, SIZE, SIZE)
+
+    def in_bounds(self, row: int, col: int) -> bool:
+        """Check whether a (row, col) position lies on the board."""
+        return 0 <= row < self.rows and 0 <= col < self.cols
+
+    def cell_index(self, row: int, col: int) -> int:
+        """Get the row-major cell number of a (row, col) position."""
+        return row * self.cols + col
+
+    def is_win(self, mask: int, cell: int) -> bool:
+        """Check whether the mark just placed on ``cell`` completes a line in the mask."""
+        if self.standard:
+            return bool(_WINNING[mask])
+        rows, cols = self.rows, self.cols
+        row, col = divmod(cell, cols)
+        for dr, dc in _DIRECTIONS:
+            count = 1
+            for step in (1, -1):
+                r, c = row + dr * step, col + dc * step
+                while 0 <= r < rows and 0 <= c < cols and mask >> (r * cols + c) & 1:
+                    count += 1
+                    r += dr * step
+                    c += dc * step
+            if count >= self.win_length:
+                return True
+        return False
+
+    def is_full(self, x_mask: int, o_mask: int) -> bool:
+        """Check whether every cell on the board is taken."""
+        return (x_mask | o_mask) == self.full_mask
+
+    def to_rows(self, x_mask: int, o_mask: int) -> List[List[Optional[str]]]:
+        """Expand the bitboards into the list-of-rows shape used by the API."""
+        rows = []
+        bit = 1
+        for _ in range(self.rows):
+            row = []
+            for _ in range(self.cols):
+                row.append("X" if x_mask & bit else "O" if o_mask & bit else None)
+                bit <<= 1
+            rows.append(row)
+        return rows
+
+@lru_cache(maxsize=None)
+def geometry(rows: int = SIZE, cols: int = SIZE, win_length: int = SIZE) -> Geometry:
+    """Get the shared Geometry for a board shape."""
+    return Geometry(rows, cols, win_length)
+
+STANDARD = geometry()
@@ -0,0 +1,78 @@
+"""Encodings of game updates for WebSocket clients.
+
+Clients choose with the ``frames`` query parameter on ``/games/{id}/ws``:
+
+- ``full`` (default): every update is the plain game snapshot, as returned by REST.
+- ``delta``: typed frames sequenced by the game version. A
+  ``{"type": "snapshot", "seq": n, "game": {...}}`` frame is sent on connect and
+  every ``SNAPSHOT_INTERVAL`` versions; other updates are
+  ``{"type": "delta", "seq": n, "cell": [row, col], "mark": ..., "status": ...,
+  "current_turn": ..., "winner": ...}``. A client that sees a gap in ``seq``
+  sends ``{"type": "resync", "last_seq": n}`` to catch up.
+
+Independently, ``encoding=binary`` (or offering the ``ttt.binary.v1``
+subprotocol) swaps JSON text frames for the compact binary frames described in
+``app.services.binary``: state frames where JSON clients get snapshots, and
+delta frames where they get deltas. Replies to client requests stay JSON.
+
+Each frame is encoded at most once per game version.
+"""
+from enum import Enum
+from typing import Any, Dict, Union
+from app import config
+from app.models.game import Game
+from app.services import binary, engine
+from app.services.serialization import dumps
+
+class FrameMode(str, Enum):
+    FULL = "full"
+    DELTA = "delta"
+
+class Encoding(str, Enum):
+    JSON = "json"
+    BINARY = "binary"
+
+# Subprotocol a client can offer instead of passing ?encoding=binary
+BINARY_SUBPROTOCOL = "ttt.binary.v1"
+
+# JSON frames are sent as text, binary frames as bytes
+Frame = Union[str, bytes]
+
+def full_frame(game: Game) -> bytes:
+    return game.encoded()
+
+def snapshot_frame(game: Game) -> bytes:
+    return game.cached("snapshot", lambda: (
+        b'{"type":"snapshot","seq":%d,"game":' % game.version + game.encoded() + b"}"
+    ))
+
+def delta_frame(game: Game) -> bytes:
+    return game.cached("delta", lambda: dumps({"type": "delta", **game.delta()}))
+
+def binary_state_frame(game: Game) -> bytes:
+    return game.cached("binary_state", lambda: binary.encode_state(game))
+
+def binary_delta_frame(game: Game) -> bytes:
+    return game.cached("binary_delta", lambda: binary.encode_delta(game.delta(), game.cols))
+
+def encode_delta(delta: Dict[str, Any], encoding: Encoding, cols: int = engine.SIZE) -> Frame:
+    """Encode a ``Game.delta()`` dict from a board ``cols`` wide, for replaying buffered deltas."""
+    if encoding == Encoding.BINARY:
+        return binary.encode_delta(delta, cols)
+    return dumps({"type": "delta", **delta}).decode()
+
+def state_frame(game: Game, mode: FrameMode, encoding: Encoding = Encoding.JSON) -> Frame:
+    """Get the complete-state frame a client gets on connect, on resync, or when its backlog is coalesced."""
+    if encoding == Encoding.BINARY:
+        return binary_state_frame(game)
+    if mode == FrameMode.FULL:
+        return full_frame(game).decode()
+    return snapshot_frame(game).decode()
+
+def update_frame(game: Game, mode: FrameMode, encoding: Encoding = Encoding.JSON) -> Frame:
+    """Get the frame a client receives for the game's latest update."""
+    if mode == FrameMode.FULL or game.version % config.SNAPSHOT_INTERVAL == 0:
+        return state_frame(game, mode, encoding)
+    if encoding == Encoding.BINARY:
+        return binary_delta_frame(game)
+    return delta_frame(game).decode()
@@ -1,64 +1,214 @@
+import asyncio
 import logging
-from typing import Dict, List, Optional, Tuple
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 from uuid import UUID, uuid4
-from app.models.game import Game, GameState
-from app.services.websocket_manager import manager
+from app import config
+from app.models.game import Difficulty, Game, GameState
+from app.services import ai, engine, journal, metrics
+from app.services.deadlines import DeadlineService
+from app.services.history import Position, play, replay
+from app.services.journal import Journal, create_journal
+from app.services.pubsub import Broker, create_broker
+from app.services.store import GameStore, create_store
+from app.services.timers import TimerWheel, wheel
 
 logger = logging.getLogger(__name__)
 
 class GameService:
-    def __init__(self):
-        self.games: Dict[UUID, Game] = {}
+    def __init__(
+        self,
+        store: Optional[GameStore] = None,
+        broker: Optional[Broker] = None,
+        journal: Optional[Journal] = None,
+        timers: TimerWheel = wheel,
+    ):
+        self.store = store or create_store()
+        self.broker = broker or create_broker()
+        self.journal = journal
+        # Forfeits timed games whose player to move runs out of time
+        self.deadlines = DeadlineService(self.time_out, timers)
     
-    async def create_game(self) -> Tuple[Game, UUID]:
-        """Create a new game and return the game object and player X's ID."""
+    async def create_game(
+        self,
+        ai_difficulty: Optional[Difficulty] = None,
+        rows: int = engine.SIZE,
+        cols: int = engine.SIZE,
+        win_length: int = engine.SIZE,
+        move_time: Optional[float] = None,
+        game_time: Optional[float] = None,
+    ) -> Tuple[Game, UUID]:
+        """Create a new game and return the game object and player X's ID.
+
+        With ``ai_difficulty`` the server AI takes seat O and the game starts at once.
+        ``rows``, ``cols`` and ``win_length`` make an m,n,k game such as 15x15 five-in-a-row.
+        ``move_time`` and ``game_time`` limit each move and each player's whole game, in
+        seconds; a player who runs out forfeits. They default to the configured time controls.
+        """
+        if not (3 <= rows <= config.MAX_BOARD_SIZE and 3 <= cols <= config.MAX_BOARD_SIZE):
+            raise ValueError("Invalid board size")
+        if not 3 <= win_length <= max(rows, cols):
+            raise ValueError("Invalid win length")
+        if ai_difficulty is not None and not engine.geometry(rows, cols, win_length).standard:
+            raise ValueError("The AI only plays on 3x3 boards")
+        move_time, game_time = time_controls(move_time, game_time)
         game_id = uuid4()
         player_x_id = uuid4()
         game = Game(
             id=game_id,
             player_x=player_x_id,
-            player_o=None,
-            board=[[None] * 3 for _ in range(3)],
+            player_o=None if ai_difficulty is None else uuid4(),
             current_turn="X",
-            status=GameState.WAITING,
-            winner=None
+            status=GameState.WAITING if ai_difficulty is None else GameState.IN_PROGRESS,
+            winner=None,
+            ai=ai_difficulty,
+            rows=rows,
+            cols=cols,
+            win_length=win_length,
+            move_time=move_time,
+            game_time=game_time,
+            time_left_x=game_time,
+            time_left_o=game_time
         )
-        self.games[game_id] = game
+        if game.status == GameState.IN_PROGRESS:
+            game.start_clock(time.time())
+        records = [journal.create_record(game)]
+        if ai_difficulty is not None:
+            records.append(journal.ai_record(game))
+        if not game.geometry.standard:
+            records.append(journal.board_record(game))
+        if game.timed:
+            records.append(journal.clock_record(game))
+        await self._record(*records)
+        await self.store.save(game)
+        self.deadlines.watch(game)
+        metrics.games_created.inc("open" if ai_difficulty is None else "ai")
         logger.info(f"Created new game {game_id} for player {player_x_id}")
+        if game.status == GameState.WAITING:
+            # Lets every worker's lobby feed announce the open game
+            await self.broker.publish(game)
         return game, player_x_id
     
+    async def create_match(self, player_x_id: UUID, player_o_id: UUID) -> Game:
+        """Create a game that starts with both players already seated, under the default time controls."""
+        move_time, game_time = time_controls()
+        game = Game(
+            id=uuid4(),
+            player_x=player_x_id,
+            player_o=player_o_id,
+            current_turn="X",
+            status=GameState.IN_PROGRESS,
+            winner=None,
+            move_time=move_time,
+            game_time=game_time,
+            time_left_x=game_time,
+            time_left_o=game_time
+        )
+        game.start_clock(time.time())
+        records = [journal.create_record(game)]
+        if game.timed:
+            records.append(journal.clock_record(game))
+        await self._record(*records)
+        await self.store.save(game)
+        self.deadlines.watch(game)
+        metrics.games_created.inc("match")
+        logger.info(f"Matched players {player_x_id} and {player_o_id} in game {game.id}")
+        return game
+    
     async def join_game(self, game_id: UUID) -> Tuple[Game, UUID]:
         """Join an existing game and return the game object and player O's ID."""
-        if game_id not in self.games:
-            raise ValueError("Game not found")
-        
-        game = self.games[game_id]
-        if game.status != GameState.WAITING:
-            raise ValueError("Game is not in waiting state")
-        
         player_o_id = uuid4()
-        game.player_o = player_o_id
-        game.status = GameState.IN_PROGRESS
         
-        logger.info(f"Player {player_o_id} joined game {game_id}")
-        
-        # Broadcast game update to all connected clients
-        await manager.broadcast_to_game(game_id, {
-            "game_id": game.id,
-            "board": game.board,
-            "current_turn": game.current_turn,
-            "status": game.status,
-            "winner": game.winner
-        })
+        def seat(game: Game) -> List[bytes]:
+            if game.status != GameState.WAITING:
+                raise ValueError("Game is not in waiting state")
+            game.player_o = player_o_id
+            game.status = GameState.IN_PROGRESS
+            game.start_clock(time.time())
+            game.bump_version(joined=True)
+            return [journal.join_record(game)]
         
+        game = await self._mutate(game_id, seat)
+        metrics.games_joined.inc()
+        logger.info(f"Player {player_o_id} joined game {game_id}")
         return game, player_o_id
     
     async def make_move(self, game_id: UUID, player_id: UUID, position: List[int]) -> Game:
         """Make a move in the game."""
-        if game_id not in self.games:
-            raise ValueError("Game not found")
+        start = time.perf_counter()
+        game = await self._mutate(game_id, lambda game: self._take_turn(game, player_id, position))
+        metrics.move_seconds.observe(time.perf_counter() - start)
+        return game
+    
+    async def make_moves(self, moves: List[Tuple[UUID, UUID, List[int]]]) -> List[Union[int, ValueError]]:
+        """Apply many (game_id, player_id, position) moves, returning each one's resulting version or error.
+
+        Moves are applied in order within each game, holding its lock once, and
+        each game is saved and broadcast once however many of its moves succeed.
+        """
+        results: List[Union[int, ValueError]] = [None] * len(moves)
+        by_game: Dict[UUID, List[int]] = {}
+        for index, (game_id, _, _) in enumerate(moves):
+            by_game.setdefault(game_id, []).append(index)
+        
+        async def apply(game_id: UUID, indexes: List[int]):
+            def take_turns(game: Game) -> List[bytes]:
+                records = []
+                for index in indexes:
+                    _, player_id, position = moves[index]
+                    try:
+                        records += self._take_turn(game, player_id, position)
+                        results[index] = game.version
+                    except ValueError as e:
+                        results[index] = e
+                return records
+            
+            try:
+                await self._mutate(game_id, take_turns)
+            except ValueError as e:
+                for index in indexes:
+                    results[index] = e
+        
+        await asyncio.gather(*(apply(game_id, indexes) for game_id, indexes in by_game.items()))
+        return results
+    
+    async def _mutate(self, game_id: UUID, mutate: Callable[[Game], List[bytes]]) -> Game:
+        """Change a game under its lock, then journal, save and broadcast it; returns the changed game.
+
+        ``mutate`` changes the game in place and returns the journal records
+        for what it did; with none, nothing is saved. Its ValueErrors leave the
+        game as it was.
+        """
+        # Fail fast on unknown games before taking their lock
+        await self.get_game(game_id)
         
-        game = self.games[game_id]
+        # Per-game lock: serializes mutations of one game without a global lock
+        async with self.store.lock(game_id):
+            # Mutate a draft: if journaling fails, the stored game is untouched
+            game = (await self.get_game(game_id)).draft()
+            records = mutate(game)
+            if records:
+                await self._record(*records)
+                await self.store.save(game)
+                self.deadlines.watch(game)
+                
+                # Broadcast game update to all connected clients
+                await self.broker.publish(game)
+        return game
+    
+    def _take_turn(self, game: Game, player_id: UUID, position: List[int]) -> List[bytes]:
+        """Apply a player's move and, against the AI, its reply; returns their journal records."""
+        mark = game.current_turn
+        self._apply_move(game, player_id, position)
+        records = move_records(game, mark)
+        if game.ai is not None and game.status == GameState.IN_PROGRESS:
+            self._apply_move(game, game.player_o, ai.choose(game))
+            records += move_records(game, "O")
+        return records
+    
+    def _apply_move(self, game: Game, player_id: UUID, position: List[int]):
+        """Validate a move against the rules and apply it to the game in place."""
+        game_id = game.id
         if game.status != GameState.IN_PROGRESS:
             raise ValueError("Game is not in progress")
         
@@ -69,63 +219,227 @@ async def make_move(self, game_id: UUID, player_id: UUID, position: List[int]) -
         if game.current_turn == "O" and player_id != game.player_o:
             logger.warning(f"Player {player_id} attempted to move out of turn in game {game_id}")
             raise ValueError("Not your turn")
+        now = time.time()
+        deadline = game.deadline
+        if deadline is not None and now >= deadline:
+            # The deadline service forfeits the game momentarily
+            raise ValueError("Time is up")
         
         # Validate position
+        geometry = game.geometry
         row, col = position
-        if not (0 <= row < 3 and 0 <= col < 3):
+        if not geometry.in_bounds(row, col):
             raise ValueError("Invalid position")
-        if game.board[row][col] is not None:
+        cell = geometry.cell_index(row, col)
+        if engine.is_occupied(game.x_mask, game.o_mask, 1 << cell):
             raise ValueError("Position already taken")
         
-        # Make the move
-        game.board[row][col] = game.current_turn
-        
-        # Check for win
-        if self._check_win(game.board, game.current_turn):
-            game.status = GameState.FINISHED
-            game.winner = game.current_turn
-        # Check for draw
-        elif all(cell is not None for row in game.board for cell in row):
+        game.stop_clock(now)
+        game.x_mask, game.o_mask, game.current_turn, game.winner, game.status = play(
+            game.x_mask, game.o_mask, game.current_turn, cell, geometry
+        )
+        if game.status == GameState.IN_PROGRESS:
+            game.start_clock(now)
+        game.moves += bytes((cell,))
+        game.bump_version(move=cell)
+        if game.status == GameState.FINISHED:
+            metrics.games_finished.inc(game.winner or "draw")
+    
+    async def time_out(self, game_id: UUID, version: int) -> Optional[Game]:
+        """Forfeit a game for the player to move if it is still at ``version`` and their time is up.
+
+        Called by the deadline service; returns the finished game, or None if it moved on or is gone.
+        """
+        if await self.store.get(game_id) is None:
+            return None
+        async with self.store.lock(game_id):
+            game = await self.store.get(game_id)
+            if game is None or game.version != version or game.status != GameState.IN_PROGRESS:
+                return None
+            game = game.draft()
+            now = time.time()
+            deadline = game.deadline
+            if deadline is None:
+                return None
+            if now < deadline:
+                # The wall clock is behind the timer's clock; check again at the deadline
+                self.deadlines.watch(game)
+                return None
+            game.stop_clock(now)
+            game.timed_out = game.current_turn
+            game.winner = "O" if game.current_turn == "X" else "X"
             game.status = GameState.FINISHED
-        else:
-            # Switch turns
-            game.current_turn = "O" if game.current_turn == "X" else "X"
-        
-        # Broadcast game update
-        await manager.broadcast_to_game(game_id, {
-            "game_id": game.id,
-            "board": game.board,
-            "current_turn": game.current_turn,
-            "status": game.status,
-            "winner": game.winner
-        })
-        
+            
+            game.bump_version()
+            records = [journal.timeout_record(game)]
+            if game.game_time is not None:
+                records.append(journal.time_record(game, game.timed_out))
+            await self._record(*records)
+            await self.store.save(game)
+            metrics.games_timed_out.inc()
+            metrics.games_finished.inc(game.winner)
+            logger.info(f"Player {game.timed_out} ran out of time in game {game_id}")
+            
+            # Broadcast the forfeit
+            await self.broker.publish(game)
         return game
     
-    def get_game(self, game_id: UUID) -> Game:
+    async def get_game(self, game_id: UUID) -> Game:
         """Get the current state of a game."""
-        if game_id not in self.games:
+        game = await self.store.get(game_id)
+        if game is None:
             raise ValueError("Game not found")
-        return self.games[game_id]
+        return game
     
-    def _check_win(self, board: List[List[Optional[str]]], player: str) -> bool:
-        """Check if the given player has won."""
-        # Check rows
-        for row in board:
-            if all(cell == player for cell in row):
-                return True
-        
-        # Check columns
-        for col in range(3):
-            if all(board[row][col] == player for row in range(3)):
-                return True
-        
-        # Check diagonals
-        if all(board[i][i] == player for i in range(3)):
-            return True
-        if all(board[i][2-i] == player for i in range(3)):
-            return True
+    async def restore(self):
+        """Rebuild the games from the journal's snapshot and records, then compact the journal."""
+        snapshot, records = await asyncio.to_thread(self.journal.load)
+        # Replay into plain field dicts; assigning to model fields once per record would dominate recovery
+        games: Dict[bytes, Dict[str, Any]] = {game.id.bytes: game.model_dump() for game in snapshot}
+        for kind, raw_id, version, body in records:
+            if kind == journal.CREATE:
+                if raw_id not in games:
+                    games[raw_id] = restored_fields(raw_id, version, *body)
+                continue
+            if kind == journal.DELETE:
+                games.pop(raw_id, None)
+                continue
+            if kind == journal.AI:
+                if raw_id in games:
+                    games[raw_id]["ai"] = journal.DIFFICULTIES[body[0]]
+                continue
+            if kind == journal.BOARD:
+                if raw_id in games:
+                    games[raw_id]["rows"], games[raw_id]["cols"], games[raw_id]["win_length"] = body
+                continue
+            if kind == journal.TIME:
+                fields = games.get(raw_id)
+                # Only right after the move it follows; a newer snapshot already has a later time
+                if fields is not None and version == fields["version"]:
+                    fields["time_left_x" if journal.MARKS[body[0]] == "X" else "time_left_o"] = body[1]
+                continue
+            if kind == journal.CLOCK:
+                fields = games.get(raw_id)
+                # Only on the game as created; a snapshot taken after a move has time already spent
+                if fields is not None and version == fields["version"]:
+                    move_time, game_time = (limit or None for limit in body)
+                    fields.update(
+                        move_time=move_time, game_time=game_time, time_left_x=game_time, time_left_o=game_time
+                    )
+                continue
+            fields = games.get(raw_id)
+            # Records already reflected in the snapshot are skipped
+            if fields is None or version <= fields["version"]:
+                continue
+            if kind == journal.JOIN:
+                fields["player_o"] = UUID(bytes=body[0])
+                fields["status"] = GameState.IN_PROGRESS
+                fields["last_move"] = None
+            elif kind == journal.TIMEOUT:
+                fields["timed_out"] = fields["current_turn"]
+                fields["winner"] = "O" if fields["current_turn"] == "X" else "X"
+                fields["status"] = GameState.FINISHED
+                fields["last_move"] = None
+                fields["turn_started"] = None
+            else:
+                cell = body[0]
+                if fields["status"] != GameState.IN_PROGRESS or engine.is_occupied(fields["x_mask"], fields["o_mask"], 1 << cell):
+                    logger.error(f"Skipping invalid journaled move {version} of game {UUID(bytes=raw_id)}")
+                    continue
+                geometry = engine.geometry(fields["rows"], fields["cols"], fields["win_length"])
+                (
+                    fields["x_mask"], fields["o_mask"], fields["current_turn"], fields["winner"], fields["status"]
+                ) = play(fields["x_mask"], fields["o_mask"], fields["current_turn"], cell, geometry)
+                fields["last_move"] = cell
+                fields["moves"] += bytes((cell,))
+            fields["joined"] = kind == journal.JOIN
+            fields["version"] = version
         
-        return False
+        now = time.time()
+        for fields in games.values():
+            game = Game.model_construct(**fields)
+            if game.status == GameState.IN_PROGRESS:
+                # Downtime is charged to nobody: the player to move starts a fresh turn
+                game.turn_started = None
+                game.start_clock(now)
+            await self.store.save(game)
+            self.deadlines.watch(game)
+        logger.info(f"Restored {len(games)} games from {len(snapshot)} snapshot games and {len(records)} journal records")
+        await self.journal.checkpoint(self.store.all())
+    
+    async def _record(self, *records: bytes):
+        """Journal mutations and wait until they are written, when a journal is configured."""
+        if self.journal is None:
+            return
+        for record in records:
+            written = self.journal.append(record)
+        # Batches are written in order, so the last record's write covers the others
+        await written
+    
+    async def replay(self, game_id: UUID, ply: Optional[int] = None) -> Tuple[Game, int, Position]:
+        """Get a game with the position after its first ``ply`` moves (all of them by default)."""
+        game = await self.get_game(game_id)
+        if ply is None:
+            ply = len(game.moves)
+        elif ply > len(game.moves):
+            raise ValueError("Ply out of range")
+        return game, ply, replay(game.moves, ply, game.geometry)
+    
+    async def get_games(self, game_ids: List[UUID]) -> List[Optional[Game]]:
+        """Get many games at once; missing games are None."""
+        return await self.store.get_many(game_ids)
+    
+    async def list_games(
+        self, status: GameState, after: Optional[str] = None, limit: int = config.LOBBY_PAGE_SIZE
+    ) -> Tuple[List[Game], Optional[str]]:
+        """Get a page of games in a state, oldest first, and the cursor for the next one (None after a short page)."""
+        return await self.store.list_games(status, after, limit)
+
+def restored_fields(raw_id: bytes, version: int, player_x: bytes, player_o: bytes) -> Dict[str, Any]:
+    """Get the fields of a game as created by a journaled CREATE record."""
+    waiting = player_o == journal.NO_PLAYER
+    return {
+        "id": UUID(bytes=raw_id),
+        "player_x": UUID(bytes=player_x),
+        "player_o": None if waiting else UUID(bytes=player_o),
+        "x_mask": 0,
+        "o_mask": 0,
+        "current_turn": "X",
+        "status": GameState.WAITING if waiting else GameState.IN_PROGRESS,
+        "winner": None,
+        "version": version,
+        "last_move": None,
+        "joined": False,
+        "moves": b"",
+        "ai": None,
+        "rows": engine.SIZE,
+        "cols": engine.SIZE,
+        "win_length": engine.SIZE,
+        "move_time": None,
+        "game_time": None,
+        "time_left_x": None,
+        "time_left_o": None,
+        "turn_started": None,
+        "timed_out": None,
+    }
+
+def move_records(game: Game, mark: str) -> List[bytes]:
+    """Get the journal records of the move ``mark`` just made, with the game time it left them."""
+    if game.game_time is None:
+        return [journal.move_record(game)]
+    return [journal.move_record(game), journal.time_record(game, mark)]
+
+def time_controls(
+    move_time: Optional[float] = None, game_time: Optional[float] = None
+) -> Tuple[Optional[float], Optional[float]]:
+    """Validate a game's time controls, falling back to the configured defaults; None is untimed."""
+    if move_time is None:
+        move_time = config.DEFAULT_MOVE_TIME or None
+    if game_time is None:
+        game_time = config.DEFAULT_GAME_TIME or None
+    for limit in (move_time, game_time):
+        if limit is not None and not 0 < limit <= config.MAX_TIME_CONTROL:
+            raise ValueError("Invalid time control")
+    return move_time, game_time
 
-game_service = GameService() 
\ No newline at end of file
+game_service = GameService(journal=create_journal()) 
\ No newline at end of file
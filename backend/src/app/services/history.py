@@ -0,0 +1,90 @@
+"""Move histories: applying moves to raw state, replaying them, and compact finished games.
+
+A game's history is ``Game.moves``, one byte per move holding the cell index,
+with X always moving first. That is enough to rebuild any position, so a
+finished game can be held as its IDs, version and history alone::
+
+    16s  game ID
+    16s  player X
+    16s  player O
+    I    version
+    B    AI difficulty (0 none, 1 easy, 2 medium, 3 hard)
+    B    rows
+    B    columns
+    B    win length
+    ...  moves
+"""
+import struct
+from typing import Optional, Tuple
+from uuid import UUID
+from app.models.game import Game, GameState
+from app.services import engine
+from app.services.journal import DIFFICULTIES
+
+_HEADER = struct.Struct(">16s16s16sIBBBB")
+
+# (x_mask, o_mask, current_turn, winner, status)
+Position = Tuple[int, int, str, Optional[str], GameState]
+
+def play(
+    x_mask: int,
+    o_mask: int,
+    current_turn: str,
+    cell: int,
+    geometry: engine.Geometry = engine.STANDARD,
+) -> Position:
+    """Apply a legal move to raw game state; returns the masks, next turn, winner and status."""
+    bit = 1 << cell
+    # Make the move
+    if current_turn == "X":
+        x_mask |= bit
+        mask = x_mask
+    else:
+        o_mask |= bit
+        mask = o_mask
+
+    # Check for win along the lines through this move
+    if geometry.is_win(mask, cell):
+        return x_mask, o_mask, current_turn, current_turn, GameState.FINISHED
+    # Check for draw
+    if geometry.is_full(x_mask, o_mask):
+        return x_mask, o_mask, current_turn, None, GameState.FINISHED
+    # Switch turns
+    return x_mask, o_mask, "O" if current_turn == "X" else "X", None, GameState.IN_PROGRESS
+
+def replay(moves: bytes, ply: Optional[int] = None, geometry: engine.Geometry = engine.STANDARD) -> Position:
+    """Get the position after the first ``ply`` moves (all of them by default)."""
+    position = (0, 0, "X", None, GameState.IN_PROGRESS)
+    for cell in moves[:ply]:
+        position = play(position[0], position[1], position[2], cell, geometry)
+    return position
+
+def pack(game: Game) -> bytes:
+    """Encode a finished game as its IDs, version and move history."""
+    return _HEADER.pack(
+        game.id.bytes, game.player_x.bytes, game.player_o.bytes, game.version, DIFFICULTIES.index(game.ai),
+        game.rows, game.cols, game.win_length,
+    ) + game.moves
+
+def unpack(data: bytes) -> Game:
+    """Rebuild a game packed by ``pack`` by replaying its moves."""
+    game_id, player_x, player_o, version, ai, rows, cols, win_length = _HEADER.unpack_from(data)
+    moves = data[_HEADER.size:]
+    x_mask, o_mask, current_turn, winner, status = replay(moves, geometry=engine.geometry(rows, cols, win_length))
+    return Game.model_construct(
+        id=UUID(bytes=game_id),
+        player_x=UUID(bytes=player_x),
+        player_o=UUID(bytes=player_o),
+        x_mask=x_mask,
+        o_mask=o_mask,
+        current_turn=current_turn,
+        status=status,
+        winner=winner,
+        version=version,
+        last_move=moves[-1] if moves else None,
+        moves=moves,
+        ai=DIFFICULTIES[ai],
+        rows=rows,
+        cols=cols,
+        win_length=win_length,
+    )
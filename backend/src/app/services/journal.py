@@ -0,0 +1,234 @@
+"""Durable append-only journal of game mutations for the in-memory store.
+
+Every mutation is appended as a small binary record; appends made while a
+write is in flight are group-committed as one write (and one fsync) on a
+worker thread, so throughput is bounded by batch size rather than disk IOPS.
+On startup the games are rebuilt from the last snapshot plus the journal, then
+compacted into a fresh snapshot and an empty journal.
+
+Records are big-endian, starting with a kind byte, the raw 16-byte game ID
+and the game version the mutation produced::
+
+    CREATE  + 16s player X + 16s player O (zeros while waiting)
+    JOIN    + 16s player O
+    MOVE    + B cell index
+    DELETE  (version 0)
+    AI      + B difficulty (1 easy, 2 medium, 3 hard), right after its CREATE
+    BOARD   + B rows + B columns + B win length, right after a CREATE not on 3x3
+    CLOCK   + d move time + d game time (0 for none), right after the CREATE of a timed game
+    TIMEOUT (the player to move lost on time)
+    TIME    + B mark (1 X, 2 O) + d its game time left, after each MOVE or TIMEOUT charged to a game time
+
+Replay skips records at or below a game's current version, so replaying a
+journal over a snapshot that already contains it is harmless.
+"""
+import asyncio
+import logging
+import os
+import struct
+from typing import Iterable, List, Optional, Tuple
+from uuid import UUID
+from app import config
+from app.models.game import Difficulty, Game
+
+logger = logging.getLogger(__name__)
+
+CREATE = 1
+JOIN = 2
+MOVE = 3
+DELETE = 4
+AI = 5
+BOARD = 6
+CLOCK = 7
+TIMEOUT = 8
+TIME = 9
+
+_HEADER = struct.Struct(">B16sI")
+_PLAYERS = struct.Struct("16s16s")
+_PLAYER = struct.Struct("16s")
+_CELL = struct.Struct("B")
+_SHAPE = struct.Struct("BBB")
+_TIMES = struct.Struct("dd")
+_EMPTY = struct.Struct("")
+_TIME_LEFT = struct.Struct("Bd")
+_BODIES = {
+    CREATE: _PLAYERS, JOIN: _PLAYER, MOVE: _CELL, DELETE: _EMPTY, AI: _CELL, BOARD: _SHAPE, CLOCK: _TIMES, TIMEOUT: _EMPTY,
+    TIME: _TIME_LEFT,
+}
+
+# Difficulty codes in AI records; 0 means no AI
+DIFFICULTIES = (None, *Difficulty)
+
+# Mark codes in TIME records
+MARKS = (None, "X", "O")
+
+# Stands in for player O in CREATE records of games still waiting for one
+NO_PLAYER = bytes(16)
+
+# (kind, raw game ID, version, body fields)
+Record = Tuple[int, bytes, int, tuple]
+
+def create_record(game: Game) -> bytes:
+    player_o = NO_PLAYER if game.player_o is None else game.player_o.bytes
+    return _HEADER.pack(CREATE, game.id.bytes, game.version) + _PLAYERS.pack(game.player_x.bytes, player_o)
+
+def ai_record(game: Game) -> bytes:
+    return _HEADER.pack(AI, game.id.bytes, game.version) + _CELL.pack(DIFFICULTIES.index(game.ai))
+
+def board_record(game: Game) -> bytes:
+    return _HEADER.pack(BOARD, game.id.bytes, game.version) + _SHAPE.pack(game.rows, game.cols, game.win_length)
+
+def clock_record(game: Game) -> bytes:
+    return _HEADER.pack(CLOCK, game.id.bytes, game.version) + _TIMES.pack(game.move_time or 0, game.game_time or 0)
+
+def join_record(game: Game) -> bytes:
+    return _HEADER.pack(JOIN, game.id.bytes, game.version) + _PLAYER.pack(game.player_o.bytes)
+
+def move_record(game: Game) -> bytes:
+    return _HEADER.pack(MOVE, game.id.bytes, game.version) + _CELL.pack(game.last_move)
+
+def timeout_record(game: Game) -> bytes:
+    return _HEADER.pack(TIMEOUT, game.id.bytes, game.version)
+
+def time_record(game: Game, mark: str) -> bytes:
+    time_left = game.time_left_x if mark == "X" else game.time_left_o
+    return _HEADER.pack(TIME, game.id.bytes, game.version) + _TIME_LEFT.pack(MARKS.index(mark), time_left)
+
+def delete_record(game_id: UUID) -> bytes:
+    return _HEADER.pack(DELETE, game_id.bytes, 0)
+
+def parse_records(data: bytes) -> Tuple[List[Record], int]:
+    """Parse as many whole records as ``data`` holds; returns them and the bytes consumed.
+
+    A torn record at the end (from a crash mid-write) is left unconsumed.
+    """
+    records = []
+    offset = 0
+    end = len(data)
+    header_size = _HEADER.size
+    while offset + header_size <= end:
+        kind, game_id, version = _HEADER.unpack_from(data, offset)
+        body = _BODIES.get(kind)
+        if body is None:
+            logger.error(f"Unknown journal record kind {kind} at offset {offset}; ignoring the rest")
+            break
+        if offset + header_size + body.size > end:
+            break
+        records.append((kind, game_id, version, body.unpack_from(data, offset + header_size)))
+        offset += header_size + body.size
+    return records, offset
+
+class Journal:
+    def __init__(self, path: str, fsync: bool = config.JOURNAL_FSYNC):
+        self.path = path
+        self.snapshot_path = path + ".snapshot"
+        self.fsync = fsync
+        self._file = None
+        self._pending: List[bytes] = []
+        self._waiters: List[asyncio.Future] = []
+        self._ready = asyncio.Event()
+        self._writer: Optional[asyncio.Task] = None
+
+    def load(self) -> Tuple[List[Game], List[Record]]:
+        """Read the snapshot games and the journal records written after it, dropping any torn tail."""
+        games = []
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "rb") as f:
+                games = [Game.model_validate_json(line) for line in f if line.strip()]
+        records: List[Record] = []
+        if os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                data = f.read()
+            records, consumed = parse_records(data)
+            if consumed != len(data):
+                logger.warning(f"Dropping {len(data) - consumed} torn bytes at the end of {self.path}")
+                with open(self.path, "r+b") as f:
+                    f.truncate(consumed)
+        return games, records
+
+    def start(self):
+        """Open the journal for appending and start the group-commit writer."""
+        self._file = open(self.path, "ab")
+        self._writer = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Write everything appended so far, then close the journal."""
+        if self._writer is None:
+            return
+        await self.flush()
+        self._writer.cancel()
+        try:
+            await self._writer
+        except asyncio.CancelledError:
+            pass
+        self._writer = None
+        self._file.close()
+
+    def append(self, record: bytes) -> asyncio.Future:
+        """Queue a record for the next batch; the future resolves once the batch is written."""
+        waiter = asyncio.get_running_loop().create_future()
+        self._pending.append(record)
+        self._waiters.append(waiter)
+        self._ready.set()
+        return waiter
+
+    async def flush(self):
+        """Wait until every record appended so far is written."""
+        # Batches are written in order, so an empty record's batch comes after all of them
+        await self.append(b"")
+
+    async def delete(self, game_id: UUID):
+        """Journal the removal of an evicted game."""
+        await self.append(delete_record(game_id))
+
+    async def checkpoint(self, games: Iterable[Game]):
+        """Write a snapshot of ``games`` and start an empty journal after it.
+
+        Call with the writer stopped, so nothing is appended in between.
+        """
+        lines = [game.model_dump_json().encode() + b"\n" for game in games]
+        await asyncio.to_thread(self._write_snapshot, lines)
+        logger.info(f"Checkpointed {len(lines)} games to {self.snapshot_path}")
+
+    def _write_snapshot(self, lines: List[bytes]):
+        tmp_path = self.snapshot_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.writelines(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_path)
+        # Replaying the old journal over the new snapshot would be harmless, so a crash here is safe
+        with open(self.path, "wb") as f:
+            os.fsync(f.fileno())
+
+    async def _run(self):
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            # Everything appended while the previous batch was being written goes out together
+            batch, self._pending = self._pending, []
+            waiters, self._waiters = self._waiters, []
+            try:
+                await asyncio.to_thread(self._write, b"".join(batch))
+            except Exception as e:
+                logger.error(f"Journal write of {len(batch)} records failed: {str(e)}")
+                for waiter in waiters:
+                    if not waiter.done():
+                        waiter.set_exception(e)
+                continue
+            for waiter in waiters:
+                if not waiter.done():
+                    waiter.set_result(None)
+
+    def _write(self, data: bytes):
+        self._file.write(data)
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+
+def create_journal() -> Optional[Journal]:
+    """Create the journal configured by TTT_JOURNAL_PATH, if any; only the memory backend needs one."""
+    if not config.JOURNAL_PATH or config.BACKEND != "memory":
+        return None
+    logger.info(f"Journaling games to {config.JOURNAL_PATH} (fsync {'on' if config.JOURNAL_FSYNC else 'off'})")
+    return Journal(config.JOURNAL_PATH)
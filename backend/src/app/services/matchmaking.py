@@ -0,0 +1,109 @@
+"""Pairing of players who want any opponent.
+
+Waiting players sit in a FIFO queue per bucket (a skill band, a board variant,
+or just ``"default"``). A new arrival is paired with the oldest player waiting
+in its bucket in O(1), and only then is the game created, so searches that are
+abandoned never leave WAITING games behind. Queues live in this worker's
+memory, so with a shared backend, where players on different workers would
+never meet, matchmaking is refused rather than left to wait out every search.
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from uuid import UUID, uuid4
+from app import config
+from app.models.game import Game
+from app.services.game_service import GameService, game_service
+
+logger = logging.getLogger(__name__)
+
+class Ticket:
+    """A player waiting in a bucket; ``match`` resolves to their game once paired."""
+
+    def __init__(self, ticket_id: UUID, bucket: str):
+        self.id = ticket_id
+        self.bucket = bucket
+        self.player_id = uuid4()
+        self.match: asyncio.Future = asyncio.get_running_loop().create_future()
+
+class Matchmaker:
+    def __init__(self, service: GameService, enabled: bool = config.BACKEND == "memory"):
+        self.service = service
+        self.enabled = enabled
+        # bucket -> waiting tickets, oldest first
+        self.queues: Dict[str, "OrderedDict[UUID, Ticket]"] = {}
+        self.tickets: Dict[UUID, Ticket] = {}
+
+    def waiting(self, bucket: str) -> int:
+        """Get the number of players waiting in a bucket."""
+        return len(self.queues.get(bucket, ()))
+
+    async def find_match(
+        self,
+        bucket: str = "default",
+        ticket_id: Optional[UUID] = None,
+        timeout: float = config.MATCHMAKING_TIMEOUT,
+    ) -> Tuple[Game, UUID]:
+        """Pair with the oldest waiting player or wait for one; return the game and this player's ID.
+
+        The player who waited plays X. ``ticket_id`` lets the caller cancel the
+        search from elsewhere with ``cancel``.
+        """
+        if not self.enabled:
+            raise ValueError("Matchmaking needs the memory backend")
+        ticket_id = ticket_id or uuid4()
+        if ticket_id in self.tickets:
+            raise ValueError("Ticket already queued")
+
+        queue = self.queues.get(bucket)
+        if queue:
+            _, opponent = queue.popitem(last=False)
+            if not queue:
+                del self.queues[bucket]
+            del self.tickets[opponent.id]
+            player_id = uuid4()
+            try:
+                game = await self.service.create_match(opponent.player_id, player_id)
+            except Exception as e:
+                opponent.match.set_exception(e)
+                raise
+            opponent.match.set_result(game)
+            return game, player_id
+
+        ticket = Ticket(ticket_id, bucket)
+        self.queues.setdefault(bucket, OrderedDict())[ticket_id] = ticket
+        self.tickets[ticket_id] = ticket
+        logger.info(f"Ticket {ticket_id} waiting for a match in bucket {bucket!r}")
+        try:
+            # Shielded so a timeout that races a pairing still gets the game being created
+            game = await asyncio.wait_for(asyncio.shield(ticket.match), timeout)
+        except asyncio.TimeoutError:
+            if not self._dequeue(ticket):
+                return await ticket.match, ticket.player_id
+            raise ValueError("Matchmaking timed out")
+        finally:
+            self._dequeue(ticket)
+        return game, ticket.player_id
+
+    def cancel(self, ticket_id: UUID) -> bool:
+        """Withdraw a waiting ticket; its ``find_match`` call fails. Returns False if it is not waiting."""
+        ticket = self.tickets.get(ticket_id)
+        if ticket is None:
+            return False
+        self._dequeue(ticket)
+        ticket.match.set_exception(ValueError("Matchmaking cancelled"))
+        logger.info(f"Ticket {ticket_id} cancelled")
+        return True
+
+    def _dequeue(self, ticket: Ticket) -> bool:
+        """Remove a ticket that is still waiting; returns False if it was already paired or removed."""
+        if self.tickets.pop(ticket.id, None) is None:
+            return False
+        queue = self.queues[ticket.bucket]
+        del queue[ticket.id]
+        if not queue:
+            del self.queues[ticket.bucket]
+        return True
+
+matchmaker = Matchmaker(game_service)
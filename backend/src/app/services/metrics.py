@@ -0,0 +1,136 @@
+"""Process-local metrics, exposed in the Prometheus text format at /metrics.
+
+Everything runs on the event loop thread, so instruments are plain dicts
+updated without locks. Recording is a dict update (plus a bisect for
+histograms); all formatting, including cumulative bucket counts, happens at
+scrape time.
+"""
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+        REGISTRY.append(self)
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+class Gauge:
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.values: Dict[Tuple[str, ...], float] = {}
+        REGISTRY.append(self)
+
+    def inc(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, *labels: str, value: float):
+        self.values[labels] = value
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        for labels, value in self.values.items():
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+# Upper bounds in seconds, from sub-millisecond in-memory work to slow journal fsyncs
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Tuple[str, ...] = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = labelnames
+        self.buckets = buckets
+        # labels -> per-bucket counts (not cumulative), the last one for values above every bound
+        self.counts: Dict[Tuple[str, ...], List[int]] = {}
+        self.sums: Dict[Tuple[str, ...], float] = {}
+        REGISTRY.append(self)
+
+    def observe(self, value: float, *labels: str):
+        counts = self.counts.get(labels)
+        if counts is None:
+            counts = self.counts[labels] = [0] * (len(self.buckets) + 1)
+            self.sums[labels] = 0.0
+        counts[bisect_left(self.buckets, value)] += 1
+        self.sums[labels] += value
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        for labels, counts in self.counts.items():
+            total = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                total += count
+                bucket_labels = _format_labels((*self.labelnames, "le"), (*labels, str(bound)))
+                lines.append(f"{self.name}_bucket{bucket_labels} {total}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {self.sums[labels]}")
+            lines.append(f"{self.name}_count{label_text} {total}")
+        return lines
+
+REGISTRY: List[object] = []
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def render() -> str:
+    """Render every registered instrument in the Prometheus text format."""
+    lines = []
+    for instrument in REGISTRY:
+        lines.extend(instrument.collect())
+    return "\n".join(lines) + "\n"
+
+games_evicted = Counter(
+    "ttt_games_evicted_total", "Games removed from memory by the reaper", ("reason",)
+)
+games_created = Counter(
+    "ttt_games_created_total", "Games created, by how they were started", ("kind",)
+)
+games_joined = Counter(
+    "ttt_games_joined_total", "Second players seated by joining a waiting game"
+)
+games_finished = Counter(
+    "ttt_games_finished_total", "Games that ended, by result", ("result",)
+)
+games_timed_out = Counter(
+    "ttt_games_timed_out_total", "Games forfeited by a player running out of time"
+)
+games_live = Gauge(
+    "ttt_games", "Games held in this worker's memory store, by status", ("status",)
+)
+websockets_open = Gauge(
+    "ttt_websockets_open", "WebSocket clients connected to this worker, by role", ("role",)
+)
+websockets_timed_out = Counter(
+    "ttt_websockets_timed_out_total", "WebSocket clients evicted for not answering a heartbeat ping"
+)
+move_seconds = Histogram(
+    "ttt_move_seconds", "Time to apply, persist and publish a single move"
+)
+broadcast_seconds = Histogram(
+    "ttt_broadcast_seconds", "Time to fan a game update out to its connected clients' queues"
+)
@@ -0,0 +1,88 @@
+"""Game update fan-out between workers.
+
+``GameService`` publishes each update once; every worker subscribes its
+``ConnectionManager`` so the update reaches sockets wherever they are connected.
+"""
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, List, Optional
+from app import config
+from app.models.game import Game
+from app.services.store import redis_client
+
+logger = logging.getLogger(__name__)
+
+Handler = Callable[[Game], Awaitable[None]]
+
+class Broker(ABC):
+    def __init__(self):
+        self.handlers: List[Handler] = []
+
+    def subscribe(self, handler: Handler):
+        """Register a coroutine called with the updated game for every update."""
+        self.handlers.append(handler)
+
+    async def deliver(self, game: Game):
+        for handler in self.handlers:
+            await handler(game)
+
+    @abstractmethod
+    async def publish(self, game: Game) -> None:
+        """Send an update to the subscribers of every worker."""
+
+    async def start(self) -> None:
+        """Begin receiving updates published by other workers."""
+
+    async def stop(self) -> None:
+        """Stop receiving updates."""
+
+class MemoryBroker(Broker):
+    """Delivers updates straight to this process's subscribers."""
+
+    async def publish(self, game: Game) -> None:
+        await self.deliver(game)
+
+class RedisBroker(Broker):
+    """Publishes updates on ``<prefix>:updates:<game_id>`` and listens on the pattern."""
+
+    def __init__(self, client, prefix: str = "ttt"):
+        super().__init__()
+        self.client = client
+        self.prefix = prefix
+        self._listener: Optional[asyncio.Task] = None
+
+    async def publish(self, game: Game) -> None:
+        await self.client.publish(f"{self.prefix}:updates:{game.id}", game.model_dump_json())
+
+    async def start(self) -> None:
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.psubscribe(f"{self.prefix}:updates:*")
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def _listen(self, pubsub):
+        try:
+            async for item in pubsub.listen():
+                try:
+                    await self.deliver(Game.model_validate_json(item["data"]))
+                except Exception as e:
+                    logger.error(f"Error delivering update from {item['channel']}: {str(e)}")
+        finally:
+            await pubsub.aclose()
+
+def create_broker() -> Broker:
+    """Create the broker selected by TTT_BACKEND."""
+    if config.BACKEND == "memory":
+        return MemoryBroker()
+    if config.BACKEND == "redis":
+        return RedisBroker(redis_client(), prefix=config.REDIS_PREFIX)
+    raise ValueError(f"Unknown backend: {config.BACKEND}")
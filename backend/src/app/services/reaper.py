@@ -0,0 +1,59 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+from app import config
+from app.models.game import GameState
+from app.services.store import DEFAULT_TTLS, MemoryGameStore
+
+logger = logging.getLogger(__name__)
+
+class GameReaper:
+    """Background task that evicts in-memory games idle for longer than their state's TTL."""
+
+    def __init__(
+        self,
+        store: MemoryGameStore,
+        ttls: Optional[Dict[GameState, float]] = None,
+        interval: float = config.REAPER_INTERVAL,
+    ):
+        self.store = store
+        self.ttls = ttls or DEFAULT_TTLS
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self, now: Optional[float] = None) -> int:
+        """Evict every expired game and return how many were removed."""
+        now = time.monotonic() if now is None else now
+        evicted = 0
+        for game_id in self.store.expired(self.ttls, now):
+            # Under the game's lock, so a mutation in flight cannot save it back after it is evicted;
+            # one that finished meanwhile has used the game, so check it is still idle
+            async with self.store.lock(game_id):
+                status = self.store.status(game_id)
+                if status is not None and self.store.is_expired(game_id, self.ttls, now):
+                    await self.store.evict(game_id, f"{status.value}_ttl")
+                    evicted += 1
+        if evicted:
+            logger.info(f"Reaper evicted {evicted} idle games, {len(self.store.games)} remain")
+        return evicted
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Error while reaping games: {str(e)}")
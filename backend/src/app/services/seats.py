@@ -0,0 +1,34 @@
+"""Seat tokens: the secret that proves a WebSocket client holds a game's seat.
+
+Player IDs are not secret (``GET /games/{id}`` shows player X's), so they
+cannot tell players from spectators. A seat's token is an HMAC of the game and
+player IDs under ``TTT_SEAT_SECRET``, handed only to whoever takes the seat, so
+nothing needs storing and any worker sharing the secret can check it.
+"""
+import hashlib
+import hmac
+import secrets
+from typing import Optional
+from uuid import UUID
+from app import config
+from app.models.game import Game
+from app.services.serialization import dumps
+
+_key = config.SEAT_SECRET.encode() or secrets.token_bytes(32)
+
+def seat_token(game_id: UUID, player_id: UUID) -> str:
+    """Get the token of a player's seat in a game."""
+    return hmac.new(_key, game_id.bytes + player_id.bytes, hashlib.sha256).hexdigest()
+
+def seat_holder(game: Game, token: Optional[str]) -> Optional[UUID]:
+    """Get the player whose seat ``token`` is for, or None if it is for neither seat."""
+    if not token:
+        return None
+    for player_id in (game.player_x, game.player_o):
+        if player_id is not None and hmac.compare_digest(token.encode(), seat_token(game.id, player_id).encode()):
+            return player_id
+    return None
+
+def seated(game: Game, player_id: UUID) -> bytes:
+    """Get the snapshot for the player who just took a seat, with the seat's token spliced in."""
+    return game.encoded(player_id)[:-1] + b',"seat_token":' + dumps(seat_token(game.id, player_id)) + b"}"
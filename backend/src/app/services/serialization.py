@@ -0,0 +1,48 @@
+"""JSON encoding for REST responses and WebSocket frames.
+
+Uses orjson when it is installed and falls back to the standard library
+otherwise; both produce compact UTF-8 bytes.
+"""
+import json
+from enum import Enum
+from typing import Any
+from uuid import UUID
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, UUID):
+        return str(obj)
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, BaseModel):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        """Encode an object as compact JSON bytes."""
+        return orjson.dumps(obj, default=_default)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=_default)
+
+    def dumps(obj: Any) -> bytes:
+        """Encode an object as compact JSON bytes."""
+        return _encoder.encode(obj).encode()
+
+    loads = json.loads
+
+class FastJSONResponse(JSONResponse):
+    """JSON response rendered with ``dumps``; bytes are taken as already-encoded JSON."""
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
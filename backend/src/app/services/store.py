@@ -0,0 +1,339 @@
+"""Game state storage backends.
+
+``GameService`` reads and writes games only through a ``GameStore``. The
+in-memory store keeps everything in this process; the Redis store lets any
+number of workers or pods share the same games.
+"""
+import asyncio
+import itertools
+import logging
+import time
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import AsyncContextManager, Awaitable, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from uuid import UUID
+from app import config
+from app.models.game import Game, GameState
+from app.services import history, metrics
+
+try:
+    import redis.asyncio as redis
+except ImportError:  # pragma: no cover - optional dependency
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds an untouched game is kept in each state
+DEFAULT_TTLS: Dict[GameState, float] = {
+    GameState.WAITING: config.GAME_TTL_WAITING,
+    GameState.IN_PROGRESS: config.GAME_TTL_IN_PROGRESS,
+    GameState.FINISHED: config.GAME_TTL_FINISHED,
+}
+
+class GameStore(ABC):
+    @abstractmethod
+    async def get(self, game_id: UUID) -> Optional[Game]:
+        """Get a game, or None if it does not exist."""
+
+    async def get_many(self, game_ids: List[UUID]) -> List[Optional[Game]]:
+        """Get several games in order, with None for those that do not exist."""
+        return [await self.get(game_id) for game_id in game_ids]
+
+    @abstractmethod
+    async def save(self, game: Game) -> None:
+        """Create or overwrite a game."""
+
+    @abstractmethod
+    async def delete(self, game_id: UUID) -> None:
+        """Remove a game if it exists."""
+
+    @abstractmethod
+    def lock(self, game_id: UUID) -> AsyncContextManager:
+        """Get a lock that serializes mutations of one game across every worker sharing the store."""
+
+    @abstractmethod
+    async def list_games(
+        self, status: GameState, after: Optional[str] = None, limit: int = config.LOBBY_PAGE_SIZE
+    ) -> Tuple[List[Game], Optional[str]]:
+        """Get up to ``limit`` games in a state, in the order they entered it, and the cursor after them.
+
+        ``after`` is the cursor returned with the previous page; it stays valid
+        when the games on that page change state. Raises ValueError for a
+        malformed cursor.
+        """
+
+# Sorts after every entry with the same sequence number
+_MAX_UUID = UUID(int=(1 << 128) - 1)
+
+class StatusIndex:
+    """IDs of the games in one state, in the order they entered it.
+
+    Entries get increasing sequence numbers and are appended, so the list stays
+    sorted and a page after any sequence number starts with a bisection.
+    Removal only drops the ID from ``seqs``, leaving a tombstone in ``entries``
+    that reads skip; tombstones are swept out once they outnumber live entries,
+    keeping removal O(1) amortized.
+    """
+
+    def __init__(self):
+        self.seqs: Dict[UUID, int] = {}
+        self.entries: List[Tuple[int, UUID]] = []
+
+    def __len__(self) -> int:
+        return len(self.seqs)
+
+    def __contains__(self, game_id: UUID) -> bool:
+        return game_id in self.seqs
+
+    def add(self, game_id: UUID, seq: int):
+        self.seqs[game_id] = seq
+        self.entries.append((seq, game_id))
+
+    def discard(self, game_id: UUID):
+        if self.seqs.pop(game_id, None) is None:
+            return
+        if len(self.entries) > 2 * len(self.seqs) + 64:
+            seqs = self.seqs
+            self.entries = [entry for entry in self.entries if seqs.get(entry[1]) == entry[0]]
+
+    def page(self, after: int, limit: int) -> List[Tuple[int, UUID]]:
+        """Get up to ``limit`` live (seq, ID) entries with sequence numbers above ``after``."""
+        seqs = self.seqs
+        entries = self.entries
+        found = []
+        for position in range(bisect_right(entries, (after, _MAX_UUID)), len(entries)):
+            entry = entries[position]
+            if seqs.get(entry[1]) == entry[0]:
+                found.append(entry)
+                if len(found) == limit:
+                    break
+        return found
+
+class MemoryGameStore(GameStore):
+    """Games held in a dict, private to this process.
+
+    The dict is kept in least-recently-used order so that the ``max_games`` cap
+    and the reaper can find the oldest games without scanning everything. With
+    ``compact_finished``, finished games are held packed as their move history
+    and rebuilt on each read. A ``StatusIndex`` per state, updated on every save
+    and delete, answers status reads and lobby listings without touching the
+    games.
+    """
+
+    def __init__(self, max_games: Optional[int] = None, compact_finished: bool = False):
+        self.games: "OrderedDict[UUID, Union[Game, bytes]]" = OrderedDict()
+        self.compact_finished = compact_finished
+        self.indexes: Dict[GameState, StatusIndex] = {status: StatusIndex() for status in GameState}
+        self._seq = itertools.count(1)
+        self.last_used: Dict[UUID, float] = {}
+        self.max_games = max_games
+        self.eviction_handlers: List[Callable[[UUID], Awaitable[None]]] = []
+        self._locks: Dict[UUID, asyncio.Lock] = {}
+
+    def _touch(self, game_id: UUID):
+        self.games.move_to_end(game_id)
+        self.last_used[game_id] = time.monotonic()
+
+    async def get(self, game_id: UUID) -> Optional[Game]:
+        game = self.games.get(game_id)
+        if game is None:
+            return None
+        self._touch(game_id)
+        return self._unpacked(game)
+
+    @staticmethod
+    def _unpacked(game: Union[Game, bytes]) -> Game:
+        return history.unpack(game) if isinstance(game, bytes) else game
+
+    async def save(self, game: Game) -> None:
+        # A packed game is just its moves, which cannot say a player lost on time
+        if self.compact_finished and game.status == GameState.FINISHED and not game.timed:
+            self.games[game.id] = history.pack(game)
+        else:
+            self.games[game.id] = game
+        previous = self.status(game.id)
+        if previous != game.status:
+            if previous is not None:
+                self.indexes[previous].discard(game.id)
+                metrics.games_live.dec(previous.value)
+            self.indexes[game.status].add(game.id, next(self._seq))
+            metrics.games_live.inc(game.status.value)
+        self._touch(game.id)
+        if self.max_games is not None:
+            while len(self.games) > self.max_games:
+                await self.evict(self._least_recently_used(), "capacity")
+
+    async def delete(self, game_id: UUID) -> None:
+        self.games.pop(game_id, None)
+        status = self.status(game_id)
+        if status is not None:
+            self.indexes[status].discard(game_id)
+            metrics.games_live.dec(status.value)
+        self.last_used.pop(game_id, None)
+        self._locks.pop(game_id, None)
+
+    def _least_recently_used(self) -> UUID:
+        # Skip games being mutated: their save would bring them back once they are evicted
+        for game_id in self.games:
+            lock = self._locks.get(game_id)
+            if lock is None or not lock.locked():
+                return game_id
+        return next(iter(self.games))
+
+    def lock(self, game_id: UUID) -> asyncio.Lock:
+        lock = self._locks.get(game_id)
+        if lock is None:
+            lock = self._locks[game_id] = asyncio.Lock()
+        return lock
+
+    async def list_games(
+        self, status: GameState, after: Optional[str] = None, limit: int = config.LOBBY_PAGE_SIZE
+    ) -> Tuple[List[Game], Optional[str]]:
+        entries = self.indexes[status].page(0 if after is None else _parse_cursor(after, int), limit)
+        # Listed games are not touched, so browsing the lobby does not keep them alive
+        games = [self._unpacked(self.games[game_id]) for _, game_id in entries]
+        return games, str(entries[-1][0]) if len(entries) == limit else None
+
+    def all(self) -> Iterator[Game]:
+        """Iterate over every game, least recently used first."""
+        for game in self.games.values():
+            yield self._unpacked(game)
+
+    def status(self, game_id: UUID) -> Optional[GameState]:
+        """Get a game's status without rebuilding it if it is packed."""
+        for status, index in self.indexes.items():
+            if game_id in index:
+                return status
+        return None
+
+    def on_evict(self, handler: Callable[[UUID], Awaitable[None]]):
+        """Register a coroutine called with the game ID whenever a game is evicted."""
+        self.eviction_handlers.append(handler)
+
+    async def evict(self, game_id: UUID, reason: str):
+        """Delete a game, count why, and let handlers release what they hold for it."""
+        await self.delete(game_id)
+        metrics.games_evicted.inc(reason)
+        for handler in self.eviction_handlers:
+            await handler(game_id)
+
+    def expired(self, ttls: Dict[GameState, float], now: float) -> List[UUID]:
+        """Find games idle for longer than their state's TTL, scanning oldest first."""
+        shortest = min(ttls.values())
+        found = []
+        for game_id in self.games:
+            idle = now - self.last_used[game_id]
+            if idle < shortest:
+                break
+            if idle >= ttls[self.status(game_id)]:
+                found.append(game_id)
+        return found
+
+    def is_expired(self, game_id: UUID, ttls: Dict[GameState, float], now: float) -> bool:
+        """Check whether a game has been idle for longer than its state's TTL."""
+        last_used = self.last_used.get(game_id)
+        return last_used is not None and now - last_used >= ttls[self.status(game_id)]
+
+def _parse_cursor(cursor: str, parse: Callable[[str], Union[int, float]]) -> Union[int, float]:
+    try:
+        return parse(cursor)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+class RedisGameStore(GameStore):
+    """Games stored as JSON under ``<prefix>:game:<id>``, locked with Redis locks.
+
+    Each save sets the key to expire after its state's TTL, so Redis itself
+    drops idle games and no reaper is needed. Each state also has a sorted set
+    ``<prefix>:status:<state>`` of game IDs scored by when they entered it;
+    entries whose games have expired are dropped when a listing finds them.
+    """
+
+    def __init__(
+        self,
+        client: "redis.Redis",
+        prefix: str = "ttt",
+        lock_timeout: float = 5.0,
+        ttls: Optional[Dict[GameState, float]] = None,
+    ):
+        self.client = client
+        self.prefix = prefix
+        self.lock_timeout = lock_timeout
+        self.ttls = ttls
+
+    def _key(self, game_id: UUID) -> str:
+        return f"{self.prefix}:game:{game_id}"
+
+    async def get(self, game_id: UUID) -> Optional[Game]:
+        data = await self.client.get(self._key(game_id))
+        if data is None:
+            return None
+        return Game.model_validate_json(data)
+
+    async def get_many(self, game_ids: List[UUID]) -> List[Optional[Game]]:
+        if not game_ids:
+            return []
+        # One round trip for the whole batch
+        values = await self.client.mget([self._key(game_id) for game_id in game_ids])
+        return [None if data is None else Game.model_validate_json(data) for data in values]
+
+    def _status_key(self, status: GameState) -> str:
+        return f"{self.prefix}:status:{status.value}"
+
+    async def save(self, game: Game) -> None:
+        ttl = self.ttls[game.status] if self.ttls else None
+        member = str(game.id)
+        # One round trip: the game, plus moving it to its state's index if it just changed state
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.set(self._key(game.id), game.model_dump_json(), ex=int(ttl) if ttl else None)
+            pipe.zadd(self._status_key(game.status), {member: time.time()}, nx=True)
+            for status in GameState:
+                if status != game.status:
+                    pipe.zrem(self._status_key(status), member)
+            await pipe.execute()
+
+    async def delete(self, game_id: UUID) -> None:
+        async with self.client.pipeline(transaction=False) as pipe:
+            pipe.delete(self._key(game_id))
+            for status in GameState:
+                pipe.zrem(self._status_key(status), str(game_id))
+            await pipe.execute()
+
+    async def list_games(
+        self, status: GameState, after: Optional[str] = None, limit: int = config.LOBBY_PAGE_SIZE
+    ) -> Tuple[List[Game], Optional[str]]:
+        key = self._status_key(status)
+        low = "-inf" if after is None else f"({_parse_cursor(after, float)!r}"
+        entries = await self.client.zrangebyscore(key, low, "+inf", start=0, num=limit, withscores=True)
+        if not entries:
+            return [], None
+        games = await self.get_many([UUID(member.decode()) for member, _ in entries])
+        expired = [member for (member, _), game in zip(entries, games) if game is None]
+        if expired:
+            await self.client.zrem(key, *expired)
+        # Another worker may have moved a game out of the state since the index was read
+        found = [game for game in games if game is not None and game.status == status]
+        return found, repr(entries[-1][1]) if len(entries) == limit else None
+
+    def lock(self, game_id: UUID) -> AsyncContextManager:
+        return self.client.lock(
+            f"{self.prefix}:lock:{game_id}",
+            timeout=self.lock_timeout,
+            blocking_timeout=self.lock_timeout,
+        )
+
+def redis_client() -> "redis.Redis":
+    """Create a client for TTT_REDIS_URL, failing clearly if redis-py is missing."""
+    if redis is None:
+        raise RuntimeError("TTT_BACKEND=redis requires the 'redis' package (pip install redis)")
+    return redis.from_url(config.REDIS_URL)
+
+def create_store() -> GameStore:
+    """Create the game store selected by TTT_BACKEND."""
+    if config.BACKEND == "memory":
+        return MemoryGameStore(max_games=config.MAX_GAMES, compact_finished=config.COMPACT_FINISHED)
+    if config.BACKEND == "redis":
+        logger.info(f"Using Redis game store at {config.REDIS_URL}")
+        return RedisGameStore(redis_client(), prefix=config.REDIS_PREFIX, ttls=DEFAULT_TTLS)
+    raise ValueError(f"Unknown backend: {config.BACKEND}")
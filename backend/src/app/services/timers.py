@@ -0,0 +1,117 @@
+"""A hashed timer wheel: many cheap timers driven by one background task.
+
+Timers are hashed into ``slots`` buckets by the tick they are due at, so
+scheduling and cancelling are O(1) dict operations and each tick only looks at
+one bucket, whatever the number of live timers. A timer further out than one
+turn of the wheel sits in its bucket until the turn it is due. Deadlines are
+rounded up to the next tick, so a timer never fires early and fires at most
+one tick late.
+
+The task runs only while timers are scheduled, and callbacks run on the event
+loop, so they must not block; ones with I/O to do start a task for it.
+"""
+import asyncio
+import logging
+import math
+from typing import Any, Callable, Dict, List, Optional
+from app import config
+
+logger = logging.getLogger(__name__)
+
+class Timer:
+    """A scheduled callback; ``cancel`` it to stop it from firing."""
+
+    __slots__ = ("wheel", "tick", "callback", "args")
+
+    def __init__(self, wheel: "TimerWheel", tick: int, callback: Callable[..., Any], args: tuple):
+        self.wheel = wheel
+        self.tick = tick
+        self.callback = callback
+        self.args = args
+
+    def cancel(self):
+        self.wheel.cancel(self)
+
+class TimerWheel:
+    def __init__(self, tick: float = config.TIMER_TICK, slots: int = config.TIMER_SLOTS):
+        self.tick = tick
+        # Timers by the tick they are due at, modulo the number of slots; dicts keep insertion order
+        self.slots: List[Dict[Timer, None]] = [{} for _ in range(slots)]
+        # Last tick processed, counted from the loop time the wheel started at
+        self.position = 0
+        self.count = 0
+        self._origin: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def schedule(self, delay: float, callback: Callable[..., Any], *args) -> Timer:
+        """Call ``callback(*args)`` after at least ``delay`` seconds."""
+        loop = asyncio.get_running_loop()
+        if self._origin is None:
+            self._origin = loop.time()
+        if self._task is None or self._task.done() or self._task.get_loop() is not loop:
+            # Started on first use, or again on a new loop (each test client has its own); nothing
+            # was scheduled while it was stopped, so skip the ticks it missed
+            self.position = max(self.position, self._elapsed_ticks(loop.time()))
+            self._task = loop.create_task(self._run())
+            self._task.add_done_callback(self._finished)
+        due = max(self.position + 1, math.ceil((loop.time() + delay - self._origin) / self.tick))
+        timer = Timer(self, due, callback, args)
+        self.slots[due % len(self.slots)][timer] = None
+        self.count += 1
+        return timer
+
+    def cancel(self, timer: Timer):
+        """Stop a timer from firing; cancelling one that fired or was cancelled does nothing."""
+        if self.slots[timer.tick % len(self.slots)].pop(timer, 0) is None:
+            self.count -= 1
+
+    def advance(self, tick: int):
+        """Fire every timer due up to and including ``tick``."""
+        while self.position < tick:
+            self.position += 1
+            slot = self.slots[self.position % len(self.slots)]
+            if not slot:
+                continue
+            due = [timer for timer in slot if timer.tick <= self.position]
+            for timer in due:
+                del slot[timer]
+            self.count -= len(due)
+            for timer in due:
+                try:
+                    timer.callback(*timer.args)
+                except Exception as e:
+                    logger.error(f"Timer callback {timer.callback.__qualname__} failed: {str(e)}")
+
+    async def stop(self):
+        """Stop the task and drop every timer."""
+        for slot in self.slots:
+            slot.clear()
+        self.count = 0
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            if task.get_loop() is asyncio.get_running_loop():
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+
+    def _elapsed_ticks(self, now: float) -> int:
+        return int((now - self._origin) / self.tick)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self.count:
+            await asyncio.sleep(max(0.0, self._origin + (self.position + 1) * self.tick - loop.time()))
+            # Catch up on every tick that passed, if the loop was busy
+            self.advance(self._elapsed_ticks(loop.time()))
+
+    def _finished(self, task: asyncio.Task):
+        # A done callback rather than a finally: a task dropped with its closed loop must not touch it
+        if self._task is task:
+            self._task = None
+
+wheel = TimerWheel()
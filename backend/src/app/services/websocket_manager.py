@@ -1,77 +1,532 @@
+import asyncio
 import logging
-from typing import Dict, Set
+import time
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
 from fastapi import WebSocket
 from uuid import UUID
-import json
+from app import config
+from app.models.game import Game, GameState
+from app.services import engine, metrics, seats
+from app.services.frames import Encoding, Frame, FrameMode, encode_delta, state_frame, update_frame
+from app.services.serialization import dumps
+from app.services.timers import Timer, TimerWheel, wheel
 
 logger = logging.getLogger(__name__)
 
-class UUIDEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, UUID):
-            return str(obj)
-        return json.JSONEncoder.default(self, obj)
+class OverflowPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"  # Discard the oldest queued frame
+    COALESCE = "coalesce"        # Replace the backlog with the newest state
+    DISCONNECT = "disconnect"    # Evict the client
+
+class Role(str, Enum):
+    PLAYER = "player"          # Connected with the token of one of the game's seats
+    SPECTATOR = "spectator"    # Anyone else watching a game
+    LOBBY = "lobby"            # Watching the lobby feed
+
+# Stands in for the game ID of lobby feed clients, which are kept apart from every game's clients
+LOBBY: Optional[UUID] = None
+
+# Sent to a client that has been silent for the heartbeat interval; any message back proves it is alive
+PING = '{"type":"ping"}'
+
+class Connection:
+    """A WebSocket with a bounded outbound queue drained by its own writer task."""
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        max_queue: int,
+        overflow_policy: OverflowPolicy,
+        frames: FrameMode = FrameMode.FULL,
+        encoding: Encoding = Encoding.JSON,
+        role: Role = Role.SPECTATOR,
+    ):
+        self.websocket = websocket
+        # The seat this client proved when it connected, if any
+        self.player_id: Optional[UUID] = None
+        self.frames = frames
+        self.encoding = encoding
+        self.role = role
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        self.queue: Deque[Frame] = deque()
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        # When the client last sent anything, whether it has been pinged since, and its next heartbeat check
+        self.last_seen = time.monotonic()
+        self.pinged = False
+        self.heartbeat: Optional[Timer] = None
+
+    def touch(self):
+        """Record that the client just sent something."""
+        self.last_seen = time.monotonic()
+        self.pinged = False
+
+    def enqueue(self, frame: Frame, snapshot: Optional[Frame] = None) -> bool:
+        """Queue a frame without blocking. Returns False if the client should be evicted.
+
+        ``snapshot`` is the full state to send instead of ``frame`` when the
+        backlog is coalesced, for frames that only make sense after their
+        predecessors.
+        """
+        if len(self.queue) >= self.max_queue:
+            if self.overflow_policy == OverflowPolicy.DISCONNECT:
+                return False
+            if self.overflow_policy == OverflowPolicy.COALESCE:
+                # The newest full state supersedes the backlog
+                self.queue.clear()
+                frame = snapshot or frame
+            else:
+                self.queue.popleft()
+        self.queue.append(frame)
+        self.ready.set()
+        return True
+
+    def stop(self):
+        """Cancel the writer task unless it is the caller, and the heartbeat check."""
+        if self.writer is not None and self.writer is not asyncio.current_task():
+            self.writer.cancel()
+        if self.heartbeat is not None:
+            self.heartbeat.cancel()
+            self.heartbeat = None
 
 class ConnectionManager:
-    def __init__(self):
-        # game_id -> set of websocket connections
-        self.game_connections: Dict[UUID, Set[WebSocket]] = {}
-        
-    async def connect(self, websocket: WebSocket, game_id: UUID):
-        """Connect a WebSocket client to a game and send the current game state."""
-        await websocket.accept()
+    """Game and lobby WebSocket clients, and the fan-out of updates to them.
+
+    Players (clients that connect with one of the game's seat tokens) get every
+    update as it happens. Spectators are capped per game and overall, and with
+    a ``spectator_interval`` their updates are deferred and coalesced: one
+    background task sends each watched game's latest state at most once per
+    interval, so a popular game costs its players nothing extra per move.
+
+    A game's buffer of recent deltas outlives its last client by
+    ``reconnect_grace`` seconds and keeps recording updates meanwhile, so a
+    player who reconnects with ``last_seq`` gets only the updates they missed.
+
+    Every client has a heartbeat check on one shared timer wheel rather than a
+    task of its own: a client silent for ``heartbeat_interval`` seconds is
+    pinged, and one still silent ``heartbeat_timeout`` seconds later is
+    evicted, so half-open connections do not linger until a send fails.
+    """
+
+    def __init__(
+        self,
+        send_timeout: float = config.BROADCAST_SEND_TIMEOUT,
+        max_queue: int = config.OUTBOUND_QUEUE_SIZE,
+        overflow_policy: OverflowPolicy = OverflowPolicy(config.OUTBOUND_OVERFLOW_POLICY),
+        max_spectators_per_game: int = config.MAX_SPECTATORS_PER_GAME,
+        max_spectators: int = config.MAX_SPECTATORS,
+        spectator_interval: float = config.SPECTATOR_UPDATE_INTERVAL,
+        reconnect_grace: float = config.RECONNECT_GRACE,
+        heartbeat_interval: float = config.HEARTBEAT_INTERVAL,
+        heartbeat_timeout: float = config.HEARTBEAT_TIMEOUT,
+        timers: TimerWheel = wheel,
+    ):
+        # game_id -> websocket -> connection, for every client of the game
+        self.game_connections: Dict[UUID, Dict[WebSocket, Connection]] = {}
+        # game_id -> websocket -> connection, for just the players
+        self.players: Dict[UUID, Dict[WebSocket, Connection]] = {}
+        # websocket -> connection, for the lobby feed
+        self.lobby: Dict[WebSocket, Connection] = {}
+        self.spectator_count = 0
+        self.max_spectators_per_game = max_spectators_per_game
+        self.max_spectators = max_spectators
+        self.spectator_interval = spectator_interval
+        # game_id -> (game, version it was published at, whether spectators miss a version),
+        # for updates waiting for the next spectator flush
+        self.pending: Dict[UUID, Tuple[Game, int, bool]] = {}
+        self._flusher: Optional[asyncio.Task] = None
+        # game_id -> recent (seq, Game.delta()) pairs, for games with connections or
+        # within the reconnect grace period; the delta is None for a version that was seen but never broadcast
+        self.recent_deltas: Dict[UUID, Deque[Tuple[int, Optional[Dict[str, Any]]]]] = {}
+        self.reconnect_grace = reconnect_grace
+        # game_id -> timer dropping the delta buffer of a game nobody is connected to
+        self._buffer_expiry: Dict[UUID, asyncio.TimerHandle] = {}
+        self.heartbeat_interval = heartbeat_interval
+        self.heartbeat_timeout = heartbeat_timeout
+        self.timers = timers
+        self.send_timeout = send_timeout
+        self.max_queue = max_queue
+        self.overflow_policy = overflow_policy
+        # Keep references to fire-and-forget evictions until they finish
+        self._evictions: Set[asyncio.Task] = set()
+
+    async def connect(
+        self,
+        websocket: WebSocket,
+        game_id: UUID,
+        frames: FrameMode = FrameMode.FULL,
+        encoding: Encoding = Encoding.JSON,
+        subprotocol: Optional[str] = None,
+        seat_token: Optional[str] = None,
+        last_seq: Optional[int] = None,
+    ) -> Optional[Connection]:
+        """Connect a WebSocket client to a game and send the current game state.
+
+        The client is a player if ``seat_token`` is one of the game's seat tokens,
+        else a spectator. A player resuming with the ``last_seq`` it saw gets
+        just the missed deltas when they are still buffered. Returns None,
+        having closed the socket, when the spectator caps are reached.
+        """
+        await websocket.accept(subprotocol=subprotocol)
+        game = await self._current(game_id)
+        player_id = None if game is None else seats.seat_holder(game, seat_token)
+        role = Role.PLAYER if player_id is not None else Role.SPECTATOR
+        if role == Role.SPECTATOR and (
+            self.spectator_count >= self.max_spectators
+            or self.spectators(game_id) >= self.max_spectators_per_game
+        ):
+            logger.warning(f"Refused a spectator for game {game_id}: spectator limit reached")
+            await self._close(websocket, code=1013, reason="Too many spectators")
+            return None
+        connection = Connection(websocket, self.max_queue, self.overflow_policy, frames, encoding, role)
+        connection.player_id = player_id
+        connection.writer = asyncio.create_task(self._write(connection, game_id))
         if game_id not in self.game_connections:
-            self.game_connections[game_id] = set()
-        self.game_connections[game_id].add(websocket)
-        logger.info(f"WebSocket connected for game {game_id}")
+            self.game_connections[game_id] = {}
+        self.game_connections[game_id][websocket] = connection
+        self._add_role(connection, game_id)
+        self._watch(connection, game_id)
+        logger.info(f"WebSocket connected for game {game_id} as {role.value}")
         logger.info(f"Active connections for game {game_id}: {len(self.game_connections[game_id])}")
-        
-        # Send current game state to the new client
+
+        expiry = self._buffer_expiry.pop(game_id, None)
+        if expiry is not None:
+            expiry.cancel()
+
+        # Send current game state to the new client, or what it missed if it is resuming
+        if game is not None:
+            # Read the state again now that broadcasts reach the client, so none made meanwhile is missed
+            game = await self._current(game_id) or game
+            missed = None
+            if player_id is not None and last_seq is not None:
+                missed = self.resume(game, last_seq, frames, encoding)
+            if missed is None:
+                connection.enqueue(state_frame(game, frames, encoding))
+            else:
+                logger.info(f"Player {player_id} resumed game {game_id} from seq {last_seq}, {len(missed)} updates missed")
+                for frame in missed:
+                    connection.enqueue(frame)
+            if game_id not in self.recent_deltas:
+                # Record the version the client starts from, so the next broadcast can tell if it skips any
+                self.recent_deltas[game_id] = deque([(game.version, None)], maxlen=config.DELTA_BUFFER_SIZE)
+        return connection
+
+    async def _current(self, game_id: UUID) -> Optional[Game]:
         from app.services.game_service import game_service
         try:
-            game = game_service.get_game(game_id)
-            await websocket.send_text(json.dumps({
-                "game_id": game.id,
-                "board": game.board,
-                "current_turn": game.current_turn,
-                "status": game.status,
-                "winner": game.winner,
-                "player_count": game.player_count
-            }, cls=UUIDEncoder))
+            return await game_service.get_game(game_id)
         except ValueError:
             logger.warning(f"Game {game_id} not found when connecting WebSocket")
-    
-    async def disconnect(self, websocket: WebSocket, game_id: UUID):
+            return None
+
+    def resume(self, game: Game, last_seq: int, frames: FrameMode, encoding: Encoding) -> Optional[List[Frame]]:
+        """Get the frames a client that last saw ``last_seq`` needs to catch up, or None if it needs the full state."""
+        if last_seq > game.version:
+            return None
+        if frames == FrameMode.FULL:
+            # Every full-mode update is the whole state, so only an up-to-date client can skip it
+            return [] if last_seq == game.version else None
+        return self.replay(game.id, last_seq, game.version, encoding, game.cols)
+
+    def spectators(self, game_id: UUID) -> int:
+        """Get the number of spectators connected to a game."""
+        return len(self.game_connections.get(game_id, ())) - len(self.players.get(game_id, ()))
+
+    def promote(self, connection: Connection, game_id: UUID, player_id: UUID):
+        """Make a spectator a player, once it has taken a seat over its socket."""
+        if connection.role != Role.SPECTATOR or connection.websocket not in self.game_connections.get(game_id, {}):
+            return
+        self._remove_role(connection, game_id)
+        connection.role = Role.PLAYER
+        connection.player_id = player_id
+        self._add_role(connection, game_id)
+
+    def _add_role(self, connection: Connection, game_id: Optional[UUID]):
+        if connection.role == Role.PLAYER:
+            self.players.setdefault(game_id, {})[connection.websocket] = connection
+        elif connection.role == Role.SPECTATOR:
+            self.spectator_count += 1
+        metrics.websockets_open.inc(connection.role.value)
+
+    def _remove_role(self, connection: Connection, game_id: Optional[UUID]):
+        if connection.role == Role.PLAYER:
+            players = self.players.get(game_id, {})
+            players.pop(connection.websocket, None)
+            if not players:
+                self.players.pop(game_id, None)
+        elif connection.role == Role.SPECTATOR:
+            self.spectator_count -= 1
+        metrics.websockets_open.dec(connection.role.value)
+
+    async def connect_lobby(self, websocket: WebSocket) -> Connection:
+        """Connect a client to the lobby feed of open games being added and removed.
+
+        A lobby client that falls behind is disconnected rather than coalesced,
+        since dropping events would leave its list wrong; it reconnects for a
+        fresh page.
+        """
+        await websocket.accept()
+        connection = Connection(websocket, self.max_queue, OverflowPolicy.DISCONNECT, role=Role.LOBBY)
+        connection.writer = asyncio.create_task(self._write(connection, LOBBY))
+        self.lobby[websocket] = connection
+        self._add_role(connection, LOBBY)
+        self._watch(connection, LOBBY)
+        logger.info(f"Lobby feed connected, {len(self.lobby)} watching")
+
+        # Send the first page of open games, ahead of any events queued while it was read;
+        # clients apply events by game ID, so ones the page already reflects are harmless
+        from app.services.game_service import game_service
+        games, cursor = await game_service.list_games(GameState.WAITING)
+        connection.queue.appendleft((b'{"type":"lobby",' + lobby_page(games, cursor) + b"}").decode())
+        connection.ready.set()
+        return connection
+
+    def _watch(self, connection: Connection, game_id: Optional[UUID], delay: Optional[float] = None):
+        """Schedule the connection's next heartbeat check, a full interval away by default."""
+        if self.heartbeat_interval > 0:
+            connection.heartbeat = self.timers.schedule(
+                self.heartbeat_interval if delay is None else delay, self._check_heartbeat, connection, game_id
+            )
+
+    def _check_heartbeat(self, connection: Connection, game_id: Optional[UUID]):
+        """Ping a client gone silent, or evict it if it ignored the ping; runs on the timer wheel."""
+        connection.heartbeat = None
+        if self._clients(game_id).get(connection.websocket) is not connection:
+            return
+        idle = time.monotonic() - connection.last_seen
+        deadline = self.heartbeat_interval + self.heartbeat_timeout
+        if idle >= deadline:
+            logger.warning(f"A client of game {game_id} did not answer its heartbeat within {self.heartbeat_timeout}s")
+            metrics.websockets_timed_out.inc()
+            self._evict_later(connection.websocket, game_id)
+            return
+        if idle < self.heartbeat_interval:
+            # It spoke since the last check; look again once it has been silent a full interval
+            self._watch(connection, game_id, self.heartbeat_interval - idle)
+            return
+        # A client whose queue is full is already behind; a ping must not coalesce its backlog away
+        if not connection.pinged and len(connection.queue) < connection.max_queue:
+            connection.pinged = True
+            connection.enqueue(PING)
+        self._watch(connection, game_id, deadline - idle)
+
+    def publish_lobby(self, frame: Frame):
+        """Queue an event for every lobby feed client."""
+        for websocket, connection in list(self.lobby.items()):
+            if not connection.enqueue(frame):
+                logger.warning("Lobby feed client fell behind")
+                self._evict_later(websocket, LOBBY)
+
+    def _clients(self, game_id: Optional[UUID]) -> Dict[WebSocket, Connection]:
+        """Get the clients of a game, or of the lobby feed for ``LOBBY``."""
+        if game_id is LOBBY:
+            return self.lobby
+        return self.game_connections.get(game_id, {})
+
+    async def disconnect(self, websocket: WebSocket, game_id: Optional[UUID]):
+        if game_id is LOBBY:
+            connection = self.lobby.pop(websocket, None)
+            if connection is not None:
+                connection.stop()
+                self._remove_role(connection, LOBBY)
+                logger.info(f"Lobby feed disconnected, {len(self.lobby)} watching")
+            return
         if game_id in self.game_connections and websocket in self.game_connections[game_id]:
-            self.game_connections[game_id].remove(websocket)
+            connection = self.game_connections[game_id].pop(websocket)
+            connection.stop()
+            self._remove_role(connection, game_id)
             logger.info(f"WebSocket disconnected from game {game_id}")
             if not self.game_connections[game_id]:
                 del self.game_connections[game_id]
                 logger.info(f"No more connections for game {game_id}")
-    
-    async def broadcast_to_game(self, game_id: UUID, message: dict):
-        """Broadcast a message to all clients connected to a game."""
-        if game_id in self.game_connections:
-            logger.info(f"Broadcasting to game {game_id}: {message}")
-            
-            # Convert GameState enum to string for JSON serialization
-            if "status" in message and hasattr(message["status"], "value"):
-                message["status"] = message["status"].value
-            
-            # Create a single JSON string to ensure all clients receive the same data
-            json_str = json.dumps(message, cls=UUIDEncoder)
-            disconnected = set()
-            
-            # Send the same JSON string to all clients
-            for connection in self.game_connections[game_id]:
-                try:
-                    await connection.send_text(json_str)
-                except Exception as e:
-                    logger.error(f"Error broadcasting to client: {str(e)}")
-                    disconnected.add(connection)
-            
-            # Clean up disconnected clients
-            for connection in disconnected:
-                await self.disconnect(connection, game_id)
-
-manager = ConnectionManager() 
\ No newline at end of file
+                if self.reconnect_grace > 0 and game_id in self.recent_deltas:
+                    # Keep the updates buffered for players who come back
+                    self._buffer_expiry[game_id] = asyncio.get_running_loop().call_later(
+                        self.reconnect_grace, self._expire_buffer, game_id
+                    )
+                else:
+                    self.recent_deltas.pop(game_id, None)
+
+    def _expire_buffer(self, game_id: UUID):
+        """Drop a game's delta buffer once its grace period ends with nobody back."""
+        self._buffer_expiry.pop(game_id, None)
+        if game_id not in self.game_connections:
+            self.recent_deltas.pop(game_id, None)
+
+    def send(self, websocket: WebSocket, game_id: Optional[UUID], frame: Frame) -> bool:
+        """Queue a frame for one client, in order with its broadcasts."""
+        connection = self._clients(game_id).get(websocket)
+        if connection is None:
+            return False
+        if not connection.enqueue(frame):
+            self._evict_later(websocket, game_id)
+            return False
+        return True
+
+    async def close_game(self, game_id: UUID):
+        """Disconnect every client of a game that no longer exists."""
+        connections = self.game_connections.pop(game_id, {})
+        self.recent_deltas.pop(game_id, None)
+        self.pending.pop(game_id, None)
+        expiry = self._buffer_expiry.pop(game_id, None)
+        if expiry is not None:
+            expiry.cancel()
+        for connection in connections.values():
+            connection.stop()
+            self._remove_role(connection, game_id)
+        await asyncio.gather(*(
+            self._close(websocket, code=1001, reason="Game expired") for websocket in connections
+        ))
+        if connections:
+            logger.info(f"Closed {len(connections)} connections for evicted game {game_id}")
+        if self.lobby:
+            self.publish_lobby(lobby_removed(game_id))
+
+    async def broadcast_to_game(self, game: Game):
+        """Queue a game's current state for all clients connected to it.
+
+        Only enqueues; each connection's writer task does the network I/O, so
+        callers never wait on client sockets.
+        """
+        if self.lobby:
+            if game.status == GameState.WAITING:
+                self.publish_lobby(lobby_added(game))
+            elif game.joined:
+                self.publish_lobby(lobby_removed(game.id))
+        if game.id in self._buffer_expiry:
+            # Nobody is connected, but players may resume within the grace period
+            # A gap left by a batch makes replay fall back to the full state, as it does for connected clients
+            self.recent_deltas[game.id].append((game.version, game.delta()))
+        if game.id in self.game_connections:
+            start = time.perf_counter()
+            logger.info(f"Broadcasting version {game.version} of game {game.id}")
+
+            recent = self.recent_deltas.get(game.id)
+            if recent is None:
+                recent = self.recent_deltas[game.id] = deque(maxlen=config.DELTA_BUFFER_SIZE)
+            # Batched moves publish only their last version; deltas cannot bridge the gap
+            skipped = bool(recent) and recent[-1][0] != game.version - 1
+            recent.append((game.version, game.delta()))
+
+            if self.spectator_interval <= 0:
+                self._fan_out(game, list(self.game_connections[game.id].values()), skipped)
+            else:
+                self._fan_out(game, list(self.players.get(game.id, {}).values()), skipped)
+                if self.spectators(game.id):
+                    # A second update before the flush means spectators skip a version
+                    self.pending[game.id] = (game, game.version, skipped or game.id in self.pending)
+                    if self._flusher is None:
+                        self._flusher = asyncio.create_task(self._flush_spectators())
+            metrics.broadcast_seconds.observe(time.perf_counter() - start)
+
+    def _fan_out(self, game: Game, connections: List[Connection], skipped: bool):
+        """Queue a game's update for some of its clients."""
+        # Each frame kind is encoded once per version and shared by every client
+        frames: Dict[Tuple[FrameMode, Encoding], Tuple[Frame, Optional[Frame]]] = {}
+        for connection in connections:
+            kind = (connection.frames, connection.encoding)
+            pair = frames.get(kind)
+            if pair is None:
+                # Delta clients whose backlog is coalesced get the full state instead
+                fallback = None
+                frame = update_frame(game, *kind)
+                if connection.frames == FrameMode.DELTA:
+                    fallback = state_frame(game, *kind)
+                    if skipped:
+                        frame = fallback
+                pair = frames[kind] = (frame, fallback)
+            if not connection.enqueue(*pair):
+                logger.warning(f"Outbound queue full for a client of game {game.id}")
+                self._evict_later(connection.websocket, game.id)
+
+    async def _flush_spectators(self):
+        """Send each deferred game's latest state to its spectators, once per interval, until none are left."""
+        try:
+            while self.pending:
+                await asyncio.sleep(self.spectator_interval)
+                pending, self.pending = self.pending, {}
+                for game_id, (game, version, skipped) in pending.items():
+                    connections = self.game_connections.get(game_id)
+                    if not connections:
+                        continue
+                    spectators = [c for c in connections.values() if c.role == Role.SPECTATOR]
+                    # The game may have moved on since it was published; its frames are for the newer version
+                    self._fan_out(game, spectators, skipped or game.version != version)
+        except Exception as e:
+            logger.error(f"Error flushing spectator updates: {str(e)}")
+        finally:
+            self._flusher = None
+
+    def replay(
+        self,
+        game_id: UUID,
+        last_seq: int,
+        current_seq: int,
+        encoding: Encoding = Encoding.JSON,
+        cols: int = engine.SIZE,
+    ) -> Optional[List[Frame]]:
+        """Get the delta frames after ``last_seq``, or None if they are no longer all buffered."""
+        if last_seq >= current_seq:
+            return []
+        recent = self.recent_deltas.get(game_id)
+        if not recent or recent[-1][0] != current_seq:
+            return None
+        missed = [delta for seq, delta in recent if seq > last_seq]
+        # Every version in between must be present for the deltas to apply cleanly
+        if len(missed) != current_seq - last_seq or None in missed:
+            return None
+        return [encode_delta(delta, encoding, cols) for delta in missed]
+
+    def _evict_later(self, websocket: WebSocket, game_id: Optional[UUID]):
+        """Evict a client from a background task so the caller never waits on its socket."""
+        task = asyncio.create_task(self._evict(websocket, game_id))
+        self._evictions.add(task)
+        task.add_done_callback(self._evictions.discard)
+
+    async def _write(self, connection: Connection, game_id: Optional[UUID]):
+        """Drain a connection's outbound queue, evicting the client if a send fails or stalls."""
+        try:
+            while True:
+                await connection.ready.wait()
+                while connection.queue:
+                    frame = connection.queue.popleft()
+                    if isinstance(frame, bytes):
+                        send = connection.websocket.send_bytes(frame)
+                    else:
+                        send = connection.websocket.send_text(frame)
+                    await asyncio.wait_for(send, self.send_timeout)
+                connection.ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"Client did not accept a frame within {self.send_timeout}s")
+        except Exception as e:
+            logger.error(f"Error broadcasting to client: {str(e)}")
+        await self._evict(connection.websocket, game_id)
+
+    async def _evict(self, websocket: WebSocket, game_id: Optional[UUID]):
+        """Drop a failed or slow client and close its socket, bounded by the send timeout."""
+        await self.disconnect(websocket, game_id)
+        await self._close(websocket, code=1013)
+
+    async def _close(self, websocket: WebSocket, code: int, reason: Optional[str] = None):
+        """Close a socket, bounded by the send timeout and ignoring errors."""
+        try:
+            await asyncio.wait_for(websocket.close(code=code, reason=reason), self.send_timeout)
+        except Exception:
+            pass
+
+def lobby_page(games: List[Game], cursor: Optional[str]) -> bytes:
+    """Encode the members of a page of games, reusing each one's cached snapshot."""
+    return b'"games":[' + b",".join(game.encoded() for game in games) + b'],"next":' + dumps(cursor)
+
+def lobby_added(game: Game) -> str:
+    return (b'{"type":"added","game":' + game.encoded() + b"}").decode()
+
+def lobby_removed(game_id: UUID) -> str:
+    return dumps({"type": "removed", "game_id": game_id}).decode()
+
+manager = ConnectionManager()
\ No newline at end of file
@@ -65,7 +65,10 @@ async def async_client(test_server) -> AsyncGenerator:
 @pytest.fixture(autouse=True)
 async def clear_game_service():
     """Clear the game service state before each test."""
-    game_service.games.clear()
+    game_service.store.games.clear()
+    for index in game_service.store.indexes.values():
+        index.seqs.clear()
+        index.entries.clear()
     yield
 
 @pytest.fixture
@@ -0,0 +1,83 @@
+import pytest
+from src.app.models.game import Difficulty, GameState
+from src.app.services import ai, engine
+from src.app.services.game_service import GameService
+from src.app.services.journal import Journal
+from src.app.services.pubsub import MemoryBroker
+from src.app.services.store import MemoryGameStore
+
+def test_table_covers_reachable_positions():
+    table = ai.build()
+    assert len(table) == 4520
+    assert ai.build() is table
+    # Against a corner opening, only the centre holds the draw
+    assert table[1][0] == (4,)
+
+def test_hard_ai_never_loses():
+    """Test every line X can play against every perfect reply the table offers."""
+    table = ai.build()
+
+    def x_to_move(x_mask, o_mask):
+        for cell in table[x_mask | o_mask << engine.CELLS][1]:
+            x = x_mask | 1 << cell
+            assert not engine.is_win(x)
+            if not engine.STANDARD.is_full(x, o_mask):
+                o_to_move(x, o_mask)
+
+    def o_to_move(x_mask, o_mask):
+        for cell in table[x_mask | o_mask << engine.CELLS][0]:
+            o = o_mask | 1 << cell
+            if not engine.is_win(o) and not engine.STANDARD.is_full(x_mask, o):
+                x_to_move(x_mask, o)
+
+    x_to_move(0, 0)
+
+@pytest.mark.asyncio
+async def test_ai_replies_in_the_same_step():
+    """Test that the AI's reply is applied and published together with the player's move."""
+    broker = MemoryBroker()
+    published = []
+    async def record(game):
+        published.append(game.version)
+    broker.subscribe(record)
+    service = GameService(MemoryGameStore(), broker)
+
+    game, player_x = await service.create_game(Difficulty.HARD)
+    assert game.status == GameState.IN_PROGRESS
+    game = await service.make_move(game.id, player_x, [0, 0])
+    assert game.moves[0] == 0 and game.moves[1] == 4
+    assert game.current_turn == "X"
+    assert game.version == 2
+    assert published == [2]
+
+@pytest.mark.asyncio
+async def test_ai_games_survive_restore(tmp_path):
+    service = GameService(MemoryGameStore(), MemoryBroker(), Journal(str(tmp_path / "journal"), fsync=False))
+    service.journal.start()
+    game, player_x = await service.create_game(Difficulty.EASY)
+    await service.make_move(game.id, player_x, [1, 1])
+    await service.journal.stop()
+
+    restored = GameService(MemoryGameStore(), MemoryBroker(), Journal(str(tmp_path / "journal"), fsync=False))
+    await restored.restore()
+    game = await restored.get_game(game.id)
+    assert game.ai == Difficulty.EASY
+    assert len(game.moves) == 2
+
+@pytest.mark.asyncio
+async def test_create_ai_game_api(async_client):
+    response = await async_client.post("/api/games?ai=medium")
+    assert response.status_code == 200
+    game = response.json()
+    assert game["status"] == "in_progress"
+
+    response = await async_client.post(
+        f"/api/games/{game['game_id']}/move",
+        json={"player_id": game["player_id"], "position": [1, 1]}
+    )
+    board = response.json()["board"]
+    assert sum(cell == "O" for row in board for cell in row) == 1
+    assert response.json()["current_turn"] == "X"
+
+    response = await async_client.post("/api/games?ai=impossible")
+    assert response.status_code == 422
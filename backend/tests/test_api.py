@@ -15,6 +15,7 @@ async def test_create_game(async_client):
     
     assert "game_id" in data
     assert "player_id" in data
+    assert data["seat_token"]
     assert data["status"] == "waiting"
     assert data["board"] == [[None] * 3 for _ in range(3)]
 
@@ -28,6 +29,7 @@ async def test_join_game(async_client, game_id):
     
     assert data["game_id"] == str(game_id)
     assert "player_id" in data
+    assert data["seat_token"]
     assert data["status"] == "in_progress"
     assert data["current_turn"] == "X"
 
@@ -50,6 +52,8 @@ async def test_get_game_state(async_client, game_id):
     
     assert data["game_id"] == str(game_id)
     assert data["status"] == "waiting"
+    # Seat tokens only go to whoever takes the seat
+    assert "seat_token" not in data
 
 @pytest.mark.asyncio
 async def test_make_move(async_client, game_id):
@@ -167,4 +171,77 @@ async def test_win_condition(async_client, game_id):
     final_state = final_response.json()
     logger.info(f"Final game state: {final_state}")
     assert final_state["status"] == "finished"
-    assert final_state["winner"] == "X" 
\ No newline at end of file
+    assert final_state["winner"] == "X"
+
+@pytest.mark.asyncio
+async def test_version_increments_on_mutation(async_client, game_id):
+    """Test that each state change bumps the game version."""
+    game_response = await async_client.get(f"/api/games/{game_id}")
+    assert game_response.json()["version"] == 0
+    player_x_id = game_response.json()["player_id"]
+
+    join_response = await async_client.post(f"/api/games/{game_id}/join")
+    assert join_response.json()["version"] == 1
+
+    move_data = {"player_id": player_x_id, "position": [0, 0]}
+    move_response = await async_client.post(f"/api/games/{game_id}/move", json=move_data)
+    assert move_response.json()["version"] == 2
+
+    # A failed move leaves the version alone
+    await async_client.post(f"/api/games/{game_id}/move", json=move_data)
+    final_response = await async_client.get(f"/api/games/{game_id}")
+    assert final_response.json()["version"] == 2
+
+@pytest.mark.asyncio
+async def test_large_board_game(async_client):
+    """Test a 15x15 five-in-a-row game won along a diagonal."""
+    response = await async_client.post("/api/games", params={"rows": 15, "cols": 15})
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["rows"], data["cols"], data["win_length"]) == (15, 15, 5)
+    assert len(data["board"]) == 15 and len(data["board"][0]) == 15
+    game_id, player_x = data["game_id"], data["player_id"]
+    player_o = (await async_client.post(f"/api/games/{game_id}/join")).json()["player_id"]
+
+    for i in range(5):
+        response = await async_client.post(
+            f"/api/games/{game_id}/move", json={"player_id": player_x, "position": [10 + i, 10 + i]}
+        )
+        assert response.status_code == 200
+        if i < 4:
+            await async_client.post(f"/api/games/{game_id}/move", json={"player_id": player_o, "position": [0, i]})
+    data = response.json()
+    assert data["status"] == "finished"
+    assert data["winner"] == "X"
+
+    history = (await async_client.get(f"/api/games/{game_id}/history")).json()
+    assert history["moves"][-1]["position"] == [14, 14]
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("params", [
+    {"rows": 2},
+    {"rows": 16, "cols": 16},
+    {"rows": 4, "cols": 4, "win_length": 5},
+    {"rows": 4, "cols": 4, "ai": "hard"},
+    {"move_time": 0},
+    {"game_time": -5},
+])
+async def test_invalid_board_options(async_client, params):
+    """Test that unsupported board shapes are rejected."""
+    response = await async_client.post("/api/games", params=params)
+    assert response.status_code == 400
+    assert response.json()["detail"]["code"] == "INVALID_GAME_OPTIONS"
+
+@pytest.mark.asyncio
+async def test_timed_game(async_client):
+    """Test that a game created with time controls reports its clock once it starts."""
+    response = await async_client.post("/api/games", params={"move_time": 30, "game_time": 120})
+    assert response.status_code == 200
+    game_id = response.json()["game_id"]
+    # The clock only runs once the game starts
+    assert response.json()["clock"]["deadline"] is None
+
+    joined = (await async_client.post(f"/api/games/{game_id}/join")).json()
+    clock = joined["clock"]
+    assert (clock["move_time"], clock["game_time"], clock["time_left"]) == (30, 120, {"X": 120, "O": 120})
+    assert clock["deadline"] is not None
@@ -0,0 +1,89 @@
+import pytest
+from uuid import uuid4
+from src.app.models.game import GameState
+from src.app.services.game_service import GameService
+from src.app.services.pubsub import MemoryBroker
+from src.app.services.store import MemoryGameStore
+
+@pytest.fixture
+def service():
+    """A fresh GameService that records every published version."""
+    broker = MemoryBroker()
+    service = GameService(MemoryGameStore(), broker)
+    service.published = []
+    async def record(game):
+        service.published.append((game.id, game.version))
+    broker.subscribe(record)
+    return service
+
+async def started_game(service):
+    game, player_x = await service.create_game()
+    game, player_o = await service.join_game(game.id)
+    service.published.clear()
+    return game, player_x, player_o
+
+@pytest.mark.asyncio
+async def test_batch_moves_report_per_item_and_publish_once_per_game(service):
+    """Test in-order application within a game, per-item errors, and one broadcast per game."""
+    first, x1, o1 = await started_game(service)
+    second, x2, _ = await started_game(service)
+    missing = uuid4()
+
+    results = await service.make_moves([
+        (first.id, x1, [0, 0]),
+        (second.id, x2, [1, 1]),
+        (first.id, o1, [0, 0]),   # taken
+        (first.id, o1, [1, 0]),
+        (missing, x1, [0, 0]),
+        (first.id, x1, [0, 1]),
+        (first.id, o1, [2, 2]),
+        (first.id, x1, [0, 2]),   # X completes the top row
+        (first.id, o1, [2, 1]),   # game over
+    ])
+
+    assert results[0] == 2 and results[1] == 2
+    assert str(results[2]) == "Position already taken"
+    assert results[3] == 3
+    assert str(results[4]) == "Game not found"
+    assert results[5:8] == [4, 5, 6]
+    assert str(results[8]) == "Game is not in progress"
+
+    game = await service.get_game(first.id)
+    assert game.status == GameState.FINISHED and game.winner == "X"
+    assert sorted(service.published) == sorted([(first.id, 6), (second.id, 2)])
+
+@pytest.mark.asyncio
+async def test_batch_without_successes_publishes_nothing(service):
+    game, _, o = await started_game(service)
+    results = await service.make_moves([(game.id, o, [0, 0])])
+    assert str(results[0]) == "Not your turn"
+    assert service.published == []
+
+@pytest.mark.asyncio
+async def test_batch_api(async_client):
+    """Test the batch move and bulk state endpoints."""
+    game = (await async_client.post("/api/games")).json()
+    await async_client.post(f"/api/games/{game['game_id']}/join")
+    missing = str(uuid4())
+
+    response = await async_client.post("/api/games/batch/moves", json={"moves": [
+        {"game_id": game["game_id"], "player_id": game["player_id"], "position": [1, 1]},
+        {"game_id": game["game_id"], "player_id": game["player_id"], "position": [0, 0]},
+        {"game_id": game["game_id"], "player_id": game["player_id"], "position": [5, 5]},
+    ]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert results[0] == {"game_id": game["game_id"], "ok": True, "version": 2}
+    assert results[1]["ok"] is False
+    assert results[1]["error"]["code"] == "GAME_RULE_VIOLATION"
+    assert results[2]["error"]["code"] == "GAME_RULE_VIOLATION"
+
+    response = await async_client.post(
+        "/api/games/batch/states", json={"game_ids": [game["game_id"], missing]}
+    )
+    assert response.status_code == 200
+    games = response.json()["games"]
+    assert games[0]["board"][1][1] == "X"
+    assert games[0]["version"] == 2
+    assert games[1]["game_id"] == missing
+    assert games[1]["error"]["code"] == "GAME_NOT_FOUND"
@@ -0,0 +1,67 @@
+import json
+import pytest
+from uuid import uuid4
+from src.app.models.game import Game, GameState
+from src.app.services import binary
+
+def make_game(**fields) -> Game:
+    defaults = dict(
+        id=uuid4(), player_x=uuid4(), player_o=uuid4(),
+        x_mask=0b100010001, o_mask=0b000001010,
+        current_turn="O", status=GameState.IN_PROGRESS, version=5,
+    )
+    return Game(**{**defaults, **fields})
+
+def test_state_round_trip():
+    """Test that a state frame decodes to the JSON snapshot minus the player ID."""
+    game = make_game()
+    data = binary.encode_state(game)
+    assert len(data) == 25
+
+    expected = json.loads(game.encoded())
+    del expected["player_id"]
+    assert binary.decode_state(data) == expected
+
+@pytest.mark.parametrize("fields", [
+    dict(player_o=None, x_mask=0, o_mask=0, current_turn="X", status=GameState.WAITING, version=0),
+    dict(x_mask=0b000000111, o_mask=0b000011000, current_turn="X", status=GameState.FINISHED, winner="X"),
+    dict(x_mask=0b011100101, o_mask=0b100011010, current_turn="X", status=GameState.FINISHED),
+])
+def test_state_round_trip_flags(fields):
+    """Test status, turn, winner and player count in every combination the game produces."""
+    game = make_game(**fields)
+    decoded = binary.decode(binary.encode_state(game))
+    assert decoded.pop("type") == "state"
+    expected = game.snapshot()
+    del expected["player_id"]
+    assert decoded == expected
+
+def test_delta_round_trip():
+    """Test that delta frames decode to the JSON delta frame shape."""
+    game = make_game()
+    game.o_mask |= 1 << 7
+    game.current_turn = "X"
+    game.bump_version(move=7)
+    data = binary.encode_delta(game.delta())
+    assert len(data) == 7
+    assert binary.decode(data) == {"type": "delta", **game.delta()}
+
+    game.bump_version()
+    assert binary.decode(binary.encode_delta(game.delta()))["cell"] is None
+
+def test_board_round_trip():
+    """Test board state frames and deltas for a 15x15 game."""
+    game = make_game(rows=15, cols=15, win_length=5, x_mask=1 << 112, o_mask=1 << 224)
+    data = binary.encode_state(game)
+    assert len(data) == 25 + 57
+    expected = game.snapshot()
+    del expected["player_id"]
+    assert binary.decode_state(data) == expected
+
+    game.x_mask |= 1 << 113
+    game.bump_version(move=113)
+    assert binary.decode(binary.encode_delta(game.delta(), game.cols), game.cols) == {"type": "delta", **game.delta()}
+
+def test_unknown_kind_rejected():
+    with pytest.raises(ValueError):
+        binary.decode(b"\x09")
@@ -0,0 +1,80 @@
+import asyncio
+import random
+import pytest
+from src.app.models.game import GameState
+from src.app.services import engine
+from src.app.services.game_service import GameService
+from src.app.services.pubsub import MemoryBroker
+from src.app.services.store import MemoryGameStore
+
+GAMES = 200
+
+@pytest.fixture
+def service():
+    """A fresh GameService whose broadcasts yield to the event loop, widening race windows."""
+    async def yielding_broadcast(game):
+        await asyncio.sleep(0)
+    broker = MemoryBroker()
+    broker.subscribe(yielding_broadcast)
+    return GameService(MemoryGameStore(), broker)
+
+async def attempt(coro):
+    """Run a service call, returning its result or the rule violation it raised."""
+    try:
+        return await coro
+    except ValueError as e:
+        return e
+
+@pytest.mark.asyncio
+async def test_concurrent_joins_hand_out_one_o_player(service):
+    """Test that racing joins on the same game admit exactly one player O."""
+    games = [(await service.create_game())[0] for _ in range(GAMES)]
+    joins = [service.join_game(game.id) for game in games for _ in range(20)]
+    random.shuffle(joins)
+
+    results = await asyncio.gather(*(attempt(join) for join in joins))
+
+    winners = [result for result in results if not isinstance(result, ValueError)]
+    assert len(winners) == GAMES
+    for game, player_o in winners:
+        assert game.player_o == player_o
+        assert game.status == GameState.IN_PROGRESS
+
+@pytest.mark.asyncio
+async def test_concurrent_moves_keep_games_consistent(service):
+    """Test thousands of racing moves against the board invariants."""
+    players = {}
+    for _ in range(GAMES):
+        game, player_x = await service.create_game()
+        _, player_o = await service.join_game(game.id)
+        players[game.id] = (player_x, player_o)
+
+    applied = {game_id: 0 for game_id in players}
+    while any(service.store.games[game_id].status != GameState.FINISHED for game_id in players):
+        # Both players of every game try every cell at once
+        moves = [
+            (game_id, player, [cell // 3, cell % 3])
+            for game_id, pair in players.items()
+            for player in pair
+            for cell in range(engine.CELLS)
+        ]
+        random.shuffle(moves)
+        results = await asyncio.gather(*(
+            attempt(service.make_move(game_id, player, position))
+            for game_id, player, position in moves
+        ))
+        for (game_id, _, _), result in zip(moves, results):
+            if not isinstance(result, ValueError):
+                applied[game_id] += 1
+
+    for game_id, game in service.store.games.items():
+        x_count = bin(game.x_mask).count("1")
+        o_count = bin(game.o_mask).count("1")
+        assert game.x_mask & game.o_mask == 0
+        assert x_count - o_count in (0, 1)
+        assert x_count + o_count == applied[game_id]
+        if game.winner is not None:
+            mask = game.x_mask if game.winner == "X" else game.o_mask
+            assert engine.is_win(mask)
+        else:
+            assert engine.STANDARD.is_full(game.x_mask, game.o_mask)
@@ -0,0 +1,393 @@
+import asyncio
+import json
+import time
+import pytest
+from uuid import uuid4
+from src.app.models.game import Game, GameState
+from app import config
+from app.services import metrics  # the module instance the manager records into
+from app.services.seats import seat_token  # keyed like the manager's
+from src.app.services import binary
+from src.app.services.frames import Encoding, FrameMode
+from src.app.services.timers import TimerWheel
+from src.app.services.websocket_manager import Connection, ConnectionManager, OverflowPolicy
+
+class FakeWebSocket:
+    """Minimal stand-in for a Starlette WebSocket that records what it is sent."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.sent = []
+        self.closed = False
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data: str):
+        await asyncio.sleep(self.delay)
+        self.sent.append(data)
+
+    async def send_bytes(self, data: bytes):
+        await asyncio.sleep(self.delay)
+        self.sent.append(data)
+
+    async def close(self, code: int = 1000, reason=None):
+        self.closed = True
+
+def make_game() -> Game:
+    return Game(id=uuid4(), player_x=uuid4(), current_turn="X", status=GameState.WAITING)
+
+async def connect_all(manager, game_id, sockets):
+    for ws in sockets:
+        await manager.connect(ws, game_id)
+
+async def disconnect_all(manager, game_id, sockets):
+    for ws in sockets:
+        await manager.disconnect(ws, game_id)
+
+@pytest.mark.asyncio
+async def test_broadcast_reaches_all_clients():
+    """Test that every connected client receives the same frame."""
+    manager = ConnectionManager()
+    game = make_game()
+    game_id = game.id
+    sockets = [FakeWebSocket() for _ in range(5)]
+    await connect_all(manager, game_id, sockets)
+
+    await manager.broadcast_to_game(game)
+    await asyncio.sleep(0.01)
+
+    frames = {ws.sent[0] for ws in sockets}
+    assert len(frames) == 1
+    assert json.loads(frames.pop()) == game.snapshot()
+    await disconnect_all(manager, game_id, sockets)
+
+@pytest.mark.asyncio
+async def test_broadcast_does_not_wait_for_clients():
+    """Test that broadcasting only enqueues, even when every client is slow."""
+    manager = ConnectionManager(send_timeout=5)
+    game = make_game()
+    game_id = game.id
+    sockets = [FakeWebSocket(delay=1) for _ in range(20)]
+    await connect_all(manager, game_id, sockets)
+
+    start = time.perf_counter()
+    await manager.broadcast_to_game(game)
+    assert time.perf_counter() - start < 0.1
+    await disconnect_all(manager, game_id, sockets)
+
+@pytest.mark.asyncio
+async def test_slow_client_is_evicted_without_delaying_others():
+    """Test that a stalled client times out and is dropped while others are served."""
+    manager = ConnectionManager(send_timeout=0.05)
+    game = make_game()
+    game_id = game.id
+    slow = FakeWebSocket(delay=10)
+    fast = [FakeWebSocket(delay=0.01) for _ in range(50)]
+    await connect_all(manager, game_id, [slow, *fast])
+
+    await manager.broadcast_to_game(game)
+    await asyncio.sleep(0.2)
+
+    assert all(len(ws.sent) == 1 for ws in fast)
+    assert slow.closed
+    assert slow not in manager.game_connections[game_id]
+    await disconnect_all(manager, game_id, fast)
+
+@pytest.mark.parametrize("policy,expected", [
+    (OverflowPolicy.DROP_OLDEST, ["b", "c"]),
+    (OverflowPolicy.COALESCE, ["c"]),
+])
+def test_overflow_policies(policy, expected):
+    """Test how a full outbound queue makes room for a new frame."""
+    connection = Connection(FakeWebSocket(), max_queue=2, overflow_policy=policy)
+    for frame in ["a", "b", "c"]:
+        assert connection.enqueue(frame)
+    assert list(connection.queue) == expected
+
+@pytest.mark.asyncio
+async def test_overflow_disconnect_policy():
+    """Test that the disconnect policy evicts a client whose queue is full."""
+    manager = ConnectionManager(max_queue=1, overflow_policy=OverflowPolicy.DISCONNECT)
+    game = make_game()
+    game_id = game.id
+    stuck = FakeWebSocket(delay=10)
+    await connect_all(manager, game_id, [stuck])
+
+    for _ in range(3):
+        await manager.broadcast_to_game(game)
+    await asyncio.sleep(0.01)
+
+    assert stuck.closed
+    assert game_id not in manager.game_connections
+
+def advance(game: Game, cell: int):
+    """Mark a cell for the player to move and bump the version, as a move would."""
+    if game.current_turn == "X":
+        game.x_mask |= 1 << cell
+        game.current_turn = "O"
+    else:
+        game.o_mask |= 1 << cell
+        game.current_turn = "X"
+    game.bump_version(move=cell)
+
+@pytest.mark.asyncio
+async def test_delta_clients_get_deltas_and_periodic_snapshots(monkeypatch):
+    """Test that delta clients get seq-numbered deltas, with a snapshot every interval."""
+    monkeypatch.setattr(config, "SNAPSHOT_INTERVAL", 4)
+    manager = ConnectionManager()
+    game = make_game()
+    full, delta = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(full, game.id)
+    await manager.connect(delta, game.id, FrameMode.DELTA)
+
+    for cell in range(4):
+        advance(game, cell)
+        await manager.broadcast_to_game(game)
+        await asyncio.sleep(0.01)
+
+    frames = [json.loads(frame) for frame in delta.sent]
+    assert [frame["type"] for frame in frames] == ["delta", "delta", "delta", "snapshot"]
+    assert [frame["seq"] for frame in frames] == [1, 2, 3, 4]
+    assert frames[0]["cell"] == [0, 0] and frames[0]["mark"] == "X"
+    assert frames[3]["game"] == game.snapshot()
+    # Full-mode clients are unaffected
+    assert json.loads(full.sent[-1]) == game.snapshot()
+    await disconnect_all(manager, game.id, [full, delta])
+
+@pytest.mark.asyncio
+async def test_replay_returns_missed_deltas():
+    """Test that buffered deltas can be replayed, and gaps fall back to None."""
+    manager = ConnectionManager()
+    game = make_game()
+    ws = FakeWebSocket()
+    await manager.connect(ws, game.id, FrameMode.DELTA)
+    for cell in range(3):
+        advance(game, cell)
+        await manager.broadcast_to_game(game)
+
+    missed = manager.replay(game.id, 1, game.version)
+    assert [json.loads(frame)["seq"] for frame in missed] == [2, 3]
+    assert manager.replay(game.id, 3, game.version) == []
+    # Versions older than the buffer cannot be replayed
+    assert manager.replay(game.id, -5, game.version) is None
+    await disconnect_all(manager, game.id, [ws])
+
+def test_coalesced_delta_client_gets_snapshot():
+    """Test that coalescing a delta client's backlog keeps only the snapshot."""
+    connection = Connection(FakeWebSocket(), max_queue=2, overflow_policy=OverflowPolicy.COALESCE)
+    connection.enqueue("d1", snapshot="s1")
+    connection.enqueue("d2", snapshot="s2")
+    connection.enqueue("d3", snapshot="s3")
+    assert list(connection.queue) == ["s3"]
+
+@pytest.mark.asyncio
+async def test_binary_clients_get_bytes():
+    """Test that binary clients get binary frames while JSON clients keep text."""
+    manager = ConnectionManager()
+    game = make_game()
+    text, full, delta = FakeWebSocket(), FakeWebSocket(), FakeWebSocket()
+    await manager.connect(text, game.id)
+    await manager.connect(full, game.id, FrameMode.FULL, Encoding.BINARY)
+    await manager.connect(delta, game.id, FrameMode.DELTA, Encoding.BINARY)
+
+    advance(game, 4)
+    await manager.broadcast_to_game(game)
+    await asyncio.sleep(0.01)
+
+    assert isinstance(text.sent[0], str)
+    assert binary.decode(full.sent[0])["board"][1][1] == "X"
+    assert binary.decode(delta.sent[0]) == {"type": "delta", **game.delta()}
+    assert binary.decode(manager.replay(game.id, 0, game.version, Encoding.BINARY)[0])["seq"] == 1
+    await disconnect_all(manager, game.id, [text, full, delta])
+
+@pytest.mark.asyncio
+async def test_skipped_versions_get_a_snapshot():
+    """Test that a broadcast skipping versions sends delta clients the full state."""
+    manager = ConnectionManager()
+    game = make_game()
+    ws = FakeWebSocket()
+    await manager.connect(ws, game.id, FrameMode.DELTA)
+    advance(game, 0)
+    await manager.broadcast_to_game(game)
+    # Two moves applied as one batch are published once
+    advance(game, 1)
+    advance(game, 2)
+    await manager.broadcast_to_game(game)
+    await asyncio.sleep(0.01)
+
+    frames = [json.loads(frame) for frame in ws.sent]
+    assert [frame["type"] for frame in frames] == ["delta", "snapshot"]
+    assert frames[1]["seq"] == 3
+    assert manager.replay(game.id, 1, game.version) is None
+    await disconnect_all(manager, game.id, [ws])
+
+async def stored_game() -> Game:
+    """An in-progress game saved where ConnectionManager.connect looks games up."""
+    from app.services.game_service import game_service
+    game = Game(id=uuid4(), player_x=uuid4(), player_o=uuid4(), current_turn="X", status=GameState.IN_PROGRESS)
+    await game_service.store.save(game)
+    return game
+
+@pytest.mark.asyncio
+async def test_state_changed_during_handshake_is_sent():
+    """Test that a client whose accept is slow still starts from the state the game reached meanwhile."""
+    from app.services.game_service import game_service
+    manager = ConnectionManager()
+    game = make_game()
+    await game_service.store.save(game)
+    ws = FakeWebSocket()
+
+    async def slow_accept(subprotocol=None):
+        await asyncio.sleep(0.05)
+    ws.accept = slow_accept
+
+    connecting = asyncio.create_task(manager.connect(ws, game.id))
+    await asyncio.sleep(0.01)
+    await game_service.join_game(game.id)
+    await connecting
+    await asyncio.sleep(0.01)
+    assert json.loads(ws.sent[0])["status"] == "in_progress"
+    await disconnect_all(manager, game.id, [ws])
+
+@pytest.mark.asyncio
+async def test_spectator_caps():
+    """Test that spectators are refused past the per-game and global caps while players never are."""
+    manager = ConnectionManager(max_spectators_per_game=2, max_spectators=3)
+    game, other = await stored_game(), await stored_game()
+    sockets = [FakeWebSocket() for _ in range(4)]
+    assert await manager.connect(sockets[0], game.id) is not None
+    assert await manager.connect(sockets[1], game.id) is not None
+    assert await manager.connect(sockets[2], game.id) is None
+    assert sockets[2].closed
+    assert await manager.connect(sockets[3], other.id) is not None
+    # Global cap reached
+    late = FakeWebSocket()
+    assert await manager.connect(late, other.id) is None
+
+    # Player IDs are public, so only a seat token gets past the caps
+    assert await manager.connect(FakeWebSocket(), game.id, seat_token=str(game.player_x)) is None
+    player = FakeWebSocket()
+    connection = await manager.connect(player, game.id, seat_token=seat_token(game.id, game.player_x))
+    assert connection.role.value == "player"
+    assert connection.player_id == game.player_x
+    assert manager.spectators(game.id) == 2
+    await disconnect_all(manager, game.id, [sockets[0], sockets[1], player])
+    await disconnect_all(manager, other.id, [sockets[3]])
+    assert manager.spectator_count == 0
+
+@pytest.mark.asyncio
+async def test_throttled_spectators_get_coalesced_updates():
+    """Test that players get every update while spectators get the latest state once per interval."""
+    manager = ConnectionManager(spectator_interval=0.05)
+    game = await stored_game()
+    player, spectator = FakeWebSocket(), FakeWebSocket()
+    await manager.connect(player, game.id, FrameMode.DELTA, seat_token=seat_token(game.id, game.player_o))
+    await manager.connect(spectator, game.id, FrameMode.DELTA)
+    await asyncio.sleep(0.01)
+    player.sent.clear()
+    spectator.sent.clear()
+
+    for cell in range(3):
+        advance(game, cell)
+        await manager.broadcast_to_game(game)
+    await asyncio.sleep(0.01)
+    assert [json.loads(frame)["seq"] for frame in player.sent] == [1, 2, 3]
+    assert spectator.sent == []
+
+    await asyncio.sleep(0.1)
+    frames = [json.loads(frame) for frame in spectator.sent]
+    assert [(frame["type"], frame["seq"]) for frame in frames] == [("snapshot", 3)]
+
+    # A single update in an interval still goes out as a delta
+    advance(game, 3)
+    await manager.broadcast_to_game(game)
+    await asyncio.sleep(0.1)
+    assert json.loads(spectator.sent[-1])["type"] == "delta"
+    await disconnect_all(manager, game.id, [player, spectator])
+
+@pytest.mark.asyncio
+async def test_joining_promotes_a_spectator():
+    manager = ConnectionManager(max_spectators_per_game=1)
+    game = await stored_game()
+    first = await manager.connect(FakeWebSocket(), game.id)
+    assert await manager.connect(FakeWebSocket(), game.id) is None
+    manager.promote(first, game.id, uuid4())
+    assert manager.spectators(game.id) == 0
+    assert await manager.connect(FakeWebSocket(), game.id) is not None
+    await manager.close_game(game.id)
+
+@pytest.mark.asyncio
+async def test_player_resumes_with_missed_updates_only():
+    """Test that a player reconnecting within the grace period gets just the deltas it missed."""
+    manager = ConnectionManager(reconnect_grace=1)
+    game = await stored_game()
+    ws = FakeWebSocket()
+    await manager.connect(ws, game.id, FrameMode.DELTA, seat_token=seat_token(game.id, game.player_x))
+    advance(game, 0)
+    await manager.broadcast_to_game(game)
+    await asyncio.sleep(0.01)
+    await manager.disconnect(ws, game.id)
+
+    # Updates published while nobody is connected are still buffered
+    advance(game, 4)
+    await manager.broadcast_to_game(game)
+    advance(game, 8)
+    await manager.broadcast_to_game(game)
+
+    resumed = FakeWebSocket()
+    await manager.connect(resumed, game.id, FrameMode.DELTA, seat_token=seat_token(game.id, game.player_x), last_seq=1)
+    await asyncio.sleep(0.01)
+    frames = [json.loads(frame) for frame in resumed.sent]
+    assert [(frame["type"], frame["seq"]) for frame in frames] == [("delta", 2), ("delta", 3)]
+
+    # Spectators cannot resume; they get the full state
+    spectator = FakeWebSocket()
+    await manager.connect(spectator, game.id, FrameMode.DELTA, last_seq=1)
+    await asyncio.sleep(0.01)
+    assert json.loads(spectator.sent[0])["type"] == "snapshot"
+    await disconnect_all(manager, game.id, [resumed, spectator])
+
+@pytest.mark.asyncio
+async def test_buffer_expires_after_grace_period():
+    """Test that a game's buffer is dropped once the grace period passes with nobody back."""
+    manager = ConnectionManager(reconnect_grace=0.05)
+    game = await stored_game()
+    ws = FakeWebSocket()
+    await manager.connect(ws, game.id, FrameMode.DELTA, seat_token=seat_token(game.id, game.player_o))
+    await manager.disconnect(ws, game.id)
+    assert game.id in manager.recent_deltas
+    await asyncio.sleep(0.1)
+    assert game.id not in manager.recent_deltas
+
+    advance(game, 0)
+    await manager.broadcast_to_game(game)
+    resumed = FakeWebSocket()
+    await manager.connect(resumed, game.id, FrameMode.DELTA, seat_token=seat_token(game.id, game.player_o), last_seq=0)
+    await asyncio.sleep(0.01)
+    assert json.loads(resumed.sent[0])["type"] == "snapshot"
+    await disconnect_all(manager, game.id, [resumed])
+
+@pytest.mark.asyncio
+async def test_silent_clients_are_pinged_then_evicted():
+    """Test that a silent client is pinged, and evicted if it never answers, while one that answers stays."""
+    manager = ConnectionManager(heartbeat_interval=0.05, heartbeat_timeout=0.05, timers=TimerWheel(tick=0.01))
+    game = make_game()
+    silent, alive = FakeWebSocket(), FakeWebSocket()
+    await connect_all(manager, game.id, [silent, alive])
+    before = metrics.websockets_timed_out.values.get((), 0)
+
+    await asyncio.sleep(0.08)
+    assert json.loads(silent.sent[-1]) == {"type": "ping"}
+    assert json.loads(alive.sent[-1]) == {"type": "ping"}
+    manager.game_connections[game.id][alive].touch()
+
+    await asyncio.sleep(0.06)
+    assert silent.closed
+    assert silent not in manager.game_connections[game.id]
+    assert alive in manager.game_connections[game.id]
+    assert metrics.websockets_timed_out.values[()] == before + 1
+
+    # Disconnecting cancels the remaining heartbeat check
+    await manager.disconnect(alive, game.id)
+    assert len(manager.timers) == 0
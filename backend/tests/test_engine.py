@@ -0,0 +1,80 @@
+import random
+import pytest
+from src.app.services import engine
+
+def brute_force_win(rows, player):
+    """Reference win check over the list-of-rows board."""
+    lines = [row for row in rows]
+    lines += [[rows[r][c] for r in range(3)] for c in range(3)]
+    lines.append([rows[i][i] for i in range(3)])
+    lines.append([rows[i][2 - i] for i in range(3)])
+    return any(all(cell == player for cell in line) for line in lines)
+
+def test_win_table_matches_brute_force():
+    """Test that the precomputed win table agrees with a full board scan."""
+    for mask in range(1 << engine.CELLS):
+        rows = engine.STANDARD.to_rows(mask, 0)
+        assert engine.is_win(mask) == brute_force_win(rows, "X")
+
+def test_to_rows_layout():
+    """Test that cell bits map to row-major board positions."""
+    x_mask = 1 << engine.STANDARD.cell_index(0, 0) | 1 << engine.STANDARD.cell_index(2, 1)
+    o_mask = 1 << engine.STANDARD.cell_index(1, 2)
+    assert engine.STANDARD.to_rows(x_mask, o_mask) == [
+        ["X", None, None],
+        [None, None, "O"],
+        [None, "X", None],
+    ]
+
+def test_occupancy_and_draw():
+    """Test occupancy and full-board checks."""
+    bit = 1 << engine.STANDARD.cell_index(1, 1)
+    assert not engine.is_occupied(0, 0, bit)
+    assert engine.is_occupied(0, bit, bit)
+    assert not engine.STANDARD.is_full(0b101010101, 0b010101000)
+    assert engine.STANDARD.is_full(0b101010101, 0b010101010)
+
+@pytest.mark.parametrize("row,col", [(-1, 0), (0, 3), (3, 3)])
+def test_out_of_bounds(row, col):
+    """Test that positions off the board are rejected."""
+    assert not engine.STANDARD.in_bounds(row, col)
+
+def all_lines(geometry):
+    """Every winning line on the board, as masks."""
+    lines = []
+    for row in range(geometry.rows):
+        for col in range(geometry.cols):
+            for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                cells = [(row + i * dr, col + i * dc) for i in range(geometry.win_length)]
+                if all(geometry.in_bounds(r, c) for r, c in cells):
+                    lines.append(sum(1 << geometry.cell_index(r, c) for r, c in cells))
+    return lines
+
+def test_mnk_win_matches_full_scan():
+    """Test that checking the lines through the last move agrees with a full scan on 15x15 five-in-a-row."""
+    rng = random.Random(7)
+    geometry = engine.geometry(15, 15, 5)
+    lines = all_lines(geometry)
+    for _ in range(300):
+        mask = 0
+        for cell in rng.sample(range(geometry.cells), 60):
+            mask |= 1 << cell
+            won = any(mask & line == line for line in lines)
+            assert geometry.is_win(mask, cell) == won
+            if won:
+                # Only the first win counts; the incremental check looks at the newest stone
+                break
+
+@pytest.mark.parametrize("rows,cols,win_length", [(3, 3, 3), (4, 6, 4), (6, 4, 3)])
+def test_geometry_shapes(rows, cols, win_length):
+    """Test bounds, fullness and layout on rectangular boards."""
+    geometry = engine.geometry(rows, cols, win_length)
+    assert geometry.standard == (rows == cols == win_length == 3)
+    assert geometry.in_bounds(rows - 1, cols - 1)
+    assert not geometry.in_bounds(rows, 0) and not geometry.in_bounds(0, cols)
+    assert geometry.is_full(geometry.full_mask, 0)
+    assert not geometry.is_full(geometry.full_mask >> 1, 0)
+    x_mask = 1 << geometry.cell_index(rows - 1, cols - 1)
+    board = geometry.to_rows(x_mask, 0)
+    assert len(board) == rows and all(len(row) == cols for row in board)
+    assert board[rows - 1][cols - 1] == "X"
@@ -0,0 +1,73 @@
+import pytest
+from src.app.models.game import GameState
+from src.app.services import history
+from src.app.services.game_service import GameService
+from src.app.services.pubsub import MemoryBroker
+from src.app.services.store import MemoryGameStore
+
+# X takes the left column while O plays the centre and a corner
+MOVES = [[0, 0], [1, 1], [1, 0], [2, 2], [2, 0]]
+
+async def finished_game(service: GameService):
+    game, x = await service.create_game()
+    game, o = await service.join_game(game.id)
+    for ply, position in enumerate(MOVES):
+        game = await service.make_move(game.id, (x, o)[ply % 2], position)
+    return game
+
+@pytest.mark.asyncio
+async def test_moves_are_recorded_one_byte_each():
+    service = GameService(MemoryGameStore(), MemoryBroker())
+    game = await finished_game(service)
+    assert game.moves == bytes([0, 4, 3, 8, 6])
+    assert history.replay(game.moves) == (game.x_mask, game.o_mask, "X", "X", GameState.FINISHED)
+    x_mask, o_mask, current_turn, winner, status = history.replay(game.moves, 2)
+    assert (x_mask, o_mask, current_turn, status) == (0b1, 0b10000, "X", GameState.IN_PROGRESS)
+
+@pytest.mark.asyncio
+async def test_finished_games_are_compacted():
+    """Test that a compacting store holds finished games packed and rebuilds them on read."""
+    service = GameService(MemoryGameStore(compact_finished=True), MemoryBroker())
+    game = await finished_game(service)
+    packed = service.store.games[game.id]
+    assert isinstance(packed, bytes)
+    assert len(packed) == 56 + len(MOVES)
+    assert service.store.status(game.id) == GameState.FINISHED
+
+    restored = await service.get_game(game.id)
+    assert restored.model_dump() == game.model_dump()
+    assert restored.encoded() == game.encoded()
+    assert [g.id for g in service.store.all()] == [game.id]
+
+@pytest.mark.asyncio
+async def test_history_and_replay_api(async_client, game_id):
+    """Test the history and replay endpoints over a short game."""
+    player_x = (await async_client.get(f"/api/games/{game_id}")).json()["player_id"]
+    player_o = (await async_client.post(f"/api/games/{game_id}/join")).json()["player_id"]
+    for ply, position in enumerate(MOVES):
+        await async_client.post(
+            f"/api/games/{game_id}/move",
+            json={"player_id": (player_x, player_o)[ply % 2], "position": position}
+        )
+
+    response = await async_client.get(f"/api/games/{game_id}/history")
+    assert response.status_code == 200
+    data = response.json()
+    assert [move["position"] for move in data["moves"]] == MOVES
+    assert [move["mark"] for move in data["moves"]] == ["X", "O", "X", "O", "X"]
+    assert data["winner"] == "X"
+
+    response = await async_client.get(f"/api/games/{game_id}/replay?ply=3")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["board"] == [["X", None, None], ["X", "O", None], [None, None, None]]
+    assert data["current_turn"] == "O"
+    assert data["status"] == "in_progress"
+
+    response = await async_client.get(f"/api/games/{game_id}/replay")
+    assert response.json()["status"] == "finished"
+    assert response.json()["ply"] == len(MOVES)
+
+    response = await async_client.get(f"/api/games/{game_id}/replay?ply=6")
+    assert response.status_code == 400
+    assert response.json()["detail"]["code"] == "INVALID_PLY"
@@ -0,0 +1,176 @@
+import asyncio
+import pytest
+from src.app.models.game import GameState
+from src.app.services.game_service import GameService
+from src.app.services.journal import Journal
+from src.app.services.pubsub import MemoryBroker
+from src.app.services.store import MemoryGameStore
+
+def make_service(path) -> GameService:
+    return GameService(MemoryGameStore(), MemoryBroker(), Journal(str(path), fsync=False))
+
+async def play(service: GameService):
+    """Exercise every journaled mutation and return the games as dumped dicts."""
+    waiting, _ = await service.create_game()
+    game, x = await service.create_game()
+    game, o = await service.join_game(game.id)
+    await service.make_move(game.id, x, [0, 0])
+    await service.make_moves([(game.id, o, [1, 1]), (game.id, x, [0, 1]), (game.id, o, [2, 2])])
+    matched = await service.create_match(x, o)
+    await service.make_move(matched.id, x, [2, 0])
+    board, x = await service.create_game(rows=15, cols=15, win_length=5)
+    board, o = await service.join_game(board.id)
+    await service.make_move(board.id, x, [7, 7])
+    await service.make_move(board.id, o, [14, 14])
+    return {game_id: game.model_dump() for game_id, game in service.store.games.items()}
+
+@pytest.mark.asyncio
+async def test_restore_rebuilds_games(tmp_path):
+    """Test that a restart rebuilds every game from the journal alone."""
+    service = make_service(tmp_path / "journal")
+    service.journal.start()
+    before = await play(service)
+    await service.journal.stop()
+
+    restored = make_service(tmp_path / "journal")
+    await restored.restore()
+    assert {game_id: game.model_dump() for game_id, game in restored.store.games.items()} == before
+    # Restoring compacts everything into the snapshot
+    assert (tmp_path / "journal").stat().st_size == 0
+
+@pytest.mark.asyncio
+async def test_replay_over_snapshot_is_idempotent(tmp_path):
+    """Test that a journal already captured by the snapshot replays as a no-op."""
+    path = tmp_path / "journal"
+    service = make_service(path)
+    service.journal.start()
+    before = await play(service)
+    await service.journal.stop()
+    records = path.read_bytes()
+
+    await make_service(path).restore()
+    # Simulate a crash between writing the snapshot and emptying the journal
+    path.write_bytes(records)
+    restored = make_service(path)
+    await restored.restore()
+    assert {game_id: game.model_dump() for game_id, game in restored.store.games.items()} == before
+
+@pytest.mark.asyncio
+async def test_torn_tail_is_dropped(tmp_path):
+    """Test that a partially written last record is discarded rather than failing recovery."""
+    path = tmp_path / "journal"
+    service = make_service(path)
+    service.journal.start()
+    game, x = await service.create_game()
+    await service.join_game(game.id)
+    await service.journal.stop()
+    path.write_bytes(path.read_bytes() + b"\x03\x00\x01")
+
+    restored = make_service(path)
+    await restored.restore()
+    assert (await restored.get_game(game.id)).player_count == 2
+
+@pytest.mark.asyncio
+async def test_evictions_are_journaled(tmp_path):
+    service = make_service(tmp_path / "journal")
+    service.journal.start()
+    service.store.on_evict(service.journal.delete)
+    game, _ = await service.create_game()
+    await service.store.evict(game.id, "test")
+    await service.journal.stop()
+
+    restored = make_service(tmp_path / "journal")
+    await restored.restore()
+    assert restored.store.games == {}
+
+@pytest.mark.asyncio
+async def test_appends_are_group_committed(tmp_path):
+    """Test that concurrent appends share writes instead of one write per record."""
+    journal = Journal(str(tmp_path / "journal"), fsync=False)
+    writes = []
+    write = journal._write
+    journal._write = lambda data: (writes.append(data), write(data))
+    journal.start()
+    await asyncio.gather(*(journal.append(bytes([i % 256])) for i in range(1000)))
+    await journal.stop()
+    assert len(writes) < 10
+    assert (tmp_path / "journal").stat().st_size == 1000
+
+@pytest.mark.asyncio
+async def test_failed_journal_write_leaves_game_unchanged(tmp_path, monkeypatch):
+    """Test that a mutation whose journal write fails is not applied, saved or broadcast."""
+    service = make_service(tmp_path / "journal")
+    service.journal.start()
+    published = []
+    async def on_publish(game):
+        published.append(game.version)
+    service.broker.subscribe(on_publish)
+    game, x = await service.create_game()
+    game, o = await service.join_game(game.id)
+    encoded = game.encoded()
+
+    def fail(data):
+        raise OSError("disk full")
+    monkeypatch.setattr(service.journal, "_write", fail)
+    with pytest.raises(OSError):
+        await service.make_move(game.id, x, [0, 0])
+    with pytest.raises(OSError):
+        await service.make_moves([(game.id, x, [0, 0])])
+
+    stored = await service.get_game(game.id)
+    assert (stored.version, stored.moves, stored.x_mask) == (1, b"", 0)
+    assert stored.encoded() == encoded
+    assert published == [0, 1]
+    monkeypatch.undo()
+    await service.journal.stop()
+
+@pytest.mark.asyncio
+async def test_restore_keeps_time_controls_and_forfeits(tmp_path):
+    """Test that time controls, time left and losses on time survive a restart, with the clock restarted."""
+    service = make_service(tmp_path / "journal")
+    service.journal.start()
+    running, x = await service.create_game(move_time=60, game_time=300)
+    running, o = await service.join_game(running.id)
+    await asyncio.sleep(0.05)
+    running = await service.make_move(running.id, x, [0, 0])
+    assert running.time_left_x < 300
+    lost, _ = await service.create_game(move_time=0.01)
+    lost, _ = await service.join_game(lost.id)
+    await asyncio.sleep(0.02)
+    await service.time_out(lost.id, lost.version)
+    await service.journal.stop()
+
+    restored = make_service(tmp_path / "journal")
+    await restored.restore()
+    game = await restored.get_game(running.id)
+    assert (game.move_time, game.game_time, game.version) == (60, 300, running.version)
+    # Game time spent before the restart stays spent
+    assert (game.time_left_x, game.time_left_o) == (running.time_left_x, 300)
+    assert game.turn_started is not None
+    assert running.id in restored.deadlines.deadlines
+    game = await restored.get_game(lost.id)
+    assert (game.status, game.winner, game.timed_out) == (GameState.FINISHED, "O", "X")
+
+@pytest.mark.asyncio
+async def test_replay_over_snapshot_keeps_time_spent(tmp_path):
+    """Test that replaying a journal over its own snapshot does not refund game time."""
+    path = tmp_path / "journal"
+    service = make_service(path)
+    service.journal.start()
+    game, x = await service.create_game(game_time=100)
+    game, o = await service.join_game(game.id)
+    await asyncio.sleep(0.05)
+    game = await service.make_move(game.id, x, [0, 0])
+    await asyncio.sleep(0.05)
+    game = await service.make_move(game.id, o, [1, 1])
+    await service.journal.stop()
+    records = path.read_bytes()
+
+    await make_service(path).restore()
+    # Simulate a crash between writing the snapshot and emptying the journal
+    path.write_bytes(records)
+    restored = make_service(path)
+    await restored.restore()
+    replayed = await restored.get_game(game.id)
+    assert (replayed.time_left_x, replayed.time_left_o) == (game.time_left_x, game.time_left_o)
+    assert replayed.time_left_x < 100 and replayed.time_left_o < 100
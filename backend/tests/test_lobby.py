@@ -0,0 +1,123 @@
+import asyncio
+import json
+import pytest
+from uuid import UUID, uuid4
+from src.app.models.game import Game, GameState
+from src.app.services.game_service import GameService
+from src.app.services.pubsub import MemoryBroker, RedisBroker
+from src.app.services.store import MemoryGameStore, RedisGameStore, StatusIndex
+from src.app.services.websocket_manager import LOBBY, ConnectionManager
+from tests.test_connection_manager import FakeWebSocket
+
+def test_status_index_pages_survive_removals():
+    """Test that a cursor stays valid when games on earlier pages leave the state."""
+    index = StatusIndex()
+    ids = [uuid4() for _ in range(10)]
+    for seq, game_id in enumerate(ids, 1):
+        index.add(game_id, seq)
+
+    first = index.page(0, 3)
+    assert [game_id for _, game_id in first] == ids[:3]
+    for game_id in ids[:4]:
+        index.discard(game_id)
+    assert [game_id for _, game_id in index.page(first[-1][0], 3)] == ids[4:7]
+    assert len(index) == 6 and ids[0] not in index
+
+def test_status_index_sweeps_tombstones():
+    index = StatusIndex()
+    ids = [uuid4() for _ in range(200)]
+    for seq, game_id in enumerate(ids, 1):
+        index.add(game_id, seq)
+    for game_id in ids[:190]:
+        index.discard(game_id)
+    assert len(index.entries) < 100
+    assert [game_id for _, game_id in index.page(0, 100)] == ids[190:]
+
+async def assert_lobby_pages(service: GameService):
+    """Create five games, join two, and page through the three still waiting."""
+    created = [(await service.create_game())[0] for _ in range(5)]
+    await service.join_game(created[1].id)
+    await service.join_game(created[3].id)
+
+    games, cursor = await service.list_games(GameState.WAITING, limit=2)
+    assert [game.id for game in games] == [created[0].id, created[2].id]
+    games, cursor = await service.list_games(GameState.WAITING, cursor, limit=2)
+    assert [game.id for game in games] == [created[4].id]
+    assert cursor is None
+
+    games, _ = await service.list_games(GameState.IN_PROGRESS)
+    assert [game.id for game in games] == [created[1].id, created[3].id]
+    with pytest.raises(ValueError):
+        await service.list_games(GameState.WAITING, "not-a-cursor")
+
+@pytest.mark.asyncio
+async def test_memory_lobby_pages():
+    await assert_lobby_pages(GameService(MemoryGameStore(), MemoryBroker()))
+
+@pytest.mark.asyncio
+async def test_redis_lobby_pages():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # Redis locks are Lua scripts
+    client = fakeredis.FakeAsyncRedis()
+    await assert_lobby_pages(GameService(RedisGameStore(client), RedisBroker(client)))
+
+@pytest.mark.asyncio
+async def test_list_games_endpoint(async_client):
+    """Test the lobby listing over HTTP."""
+    first = (await async_client.post("/api/games")).json()
+    second = (await async_client.post("/api/games")).json()
+    await async_client.post(f"/api/games/{first['game_id']}/join")
+
+    response = await async_client.get("/api/games", params={"status": "waiting", "limit": 500})
+    assert response.status_code == 200
+    listed = [game["game_id"] for game in response.json()["games"]]
+    assert second["game_id"] in listed
+    assert first["game_id"] not in listed
+    assert all(game["player_id"] is None for game in response.json()["games"])
+
+    response = await async_client.get("/api/games", params={"after": "nope"})
+    assert response.status_code == 400
+    assert response.json()["detail"]["code"] == "INVALID_CURSOR"
+
+def test_lobby_feed(client):
+    """Test that the lobby feed sends a page, then additions and removals."""
+    with client.websocket_connect("/api/lobby/ws") as websocket:
+        page = websocket.receive_json()
+        assert page["type"] == "lobby"
+        assert "next" in page
+
+        game = client.post("/api/games").json()
+        added = websocket.receive_json()
+        assert added["type"] == "added"
+        assert added["game"]["game_id"] == game["game_id"]
+        assert added["game"]["player_id"] is None
+
+        client.post(f"/api/games/{game['game_id']}/join")
+        assert websocket.receive_json() == {"type": "removed", "game_id": game["game_id"]}
+
+@pytest.mark.asyncio
+async def test_lobby_feed_is_kept_apart_from_games():
+    """Test that no game ID reaches the lobby feed, and only joins take games off it."""
+    manager = ConnectionManager()
+    lobby, player = FakeWebSocket(), FakeWebSocket()
+    await manager.connect_lobby(lobby)
+    await manager.connect(player, UUID(int=0))
+
+    waiting = Game(id=uuid4(), player_x=uuid4(), current_turn="X", status=GameState.WAITING)
+    await manager.broadcast_to_game(waiting)
+    # A game that finished at version 1 without being joined, as an AI game lost on time
+    lost = Game(id=uuid4(), player_x=uuid4(), player_o=uuid4(), current_turn="X", status=GameState.FINISHED, version=1)
+    await manager.broadcast_to_game(lost)
+    waiting.player_o = uuid4()
+    waiting.status = GameState.IN_PROGRESS
+    waiting.bump_version(joined=True)
+    await manager.broadcast_to_game(waiting)
+    await asyncio.sleep(0.01)
+
+    events = [json.loads(frame) for frame in lobby.sent[1:]]
+    assert [event["type"] for event in events] == ["added", "removed"]
+    assert events[1]["game_id"] == str(waiting.id)
+    assert all(json.loads(frame).get("type") not in ("added", "removed") for frame in player.sent)
+    await manager.disconnect(lobby, LOBBY)
+    await manager.disconnect(player, UUID(int=0))
+    assert not manager.lobby and not manager.game_connections
@@ -0,0 +1,40 @@
+import logging
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from src.app.middleware.logging import LoggingMiddleware
+
+def make_client(**options) -> TestClient:
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return await request.json()
+
+    app.add_middleware(LoggingMiddleware, **options)
+    return TestClient(app)
+
+def request_logs(caplog):
+    return [r.getMessage() for r in caplog.records if r.name.endswith("middleware.logging")]
+
+def test_logs_request_and_response(caplog):
+    """Test that a sampled request logs its line and timing but not its body."""
+    caplog.set_level(logging.INFO)
+    response = make_client(sample_rate=1.0).post("/echo?x=1", json={"a": 1})
+    assert response.json() == {"a": 1}
+    messages = request_logs(caplog)
+    assert messages[0] == "Request: POST /echo?x=1"
+    assert messages[1].startswith("Response: Status 200, Processed in")
+    assert len(messages) == 2
+
+def test_unsampled_requests_are_not_logged(caplog):
+    """Test that a zero sample rate skips logging entirely."""
+    caplog.set_level(logging.INFO)
+    make_client(sample_rate=0.0).post("/echo", json={"a": 1})
+    assert request_logs(caplog) == []
+
+def test_body_logging_is_opt_in(caplog):
+    """Test that raw bodies are logged only when enabled, without breaking the handler."""
+    caplog.set_level(logging.INFO)
+    response = make_client(sample_rate=1.0, log_bodies=True).post("/echo", json={"a": 1})
+    assert response.json() == {"a": 1}
+    assert "Request Body: b'{\"a\":1}'" in request_logs(caplog)
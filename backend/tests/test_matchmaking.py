@@ -0,0 +1,132 @@
+import asyncio
+import httpx
+import pytest
+from uuid import uuid4
+from src.app.models.game import GameState
+from src.app.services.game_service import GameService
+from src.app.services.matchmaking import Matchmaker
+from src.app.services.pubsub import MemoryBroker
+from src.app.services.store import MemoryGameStore
+
+@pytest.fixture
+def matchmaker():
+    return Matchmaker(GameService(MemoryGameStore(), MemoryBroker()))
+
+@pytest.mark.asyncio
+async def test_two_players_are_paired(matchmaker):
+    """Test that the waiting player gets X, the arrival gets O, and only one game is created."""
+    first = asyncio.create_task(matchmaker.find_match())
+    await asyncio.sleep(0)
+    assert matchmaker.service.store.games == {}
+    assert matchmaker.waiting("default") == 1
+
+    game, player_o = await matchmaker.find_match()
+    waited_game, player_x = await first
+    assert waited_game is game
+    assert game.player_x == player_x
+    assert game.player_o == player_o
+    assert game.status == GameState.IN_PROGRESS
+    assert list(matchmaker.service.store.games) == [game.id]
+    assert matchmaker.queues == {}
+
+@pytest.mark.asyncio
+async def test_pairing_is_fifo_per_bucket(matchmaker):
+    """Test that arrivals pair with the oldest waiting player of their own bucket."""
+    first = asyncio.create_task(matchmaker.find_match("a"))
+    await asyncio.sleep(0)
+    other = asyncio.create_task(matchmaker.find_match("b"))
+    await asyncio.sleep(0)
+    game, _ = await matchmaker.find_match("a")
+    assert (await first)[0] is game
+    # The "b" player is still waiting, and a third "a" player waits in turn
+    third = asyncio.create_task(matchmaker.find_match("a"))
+    await asyncio.sleep(0)
+    assert matchmaker.waiting("a") == 1
+    assert matchmaker.waiting("b") == 1
+
+    game, _ = await matchmaker.find_match("b")
+    assert (await other)[0] is game
+    matchmaker.cancel(next(iter(matchmaker.tickets)))
+    with pytest.raises(ValueError):
+        await third
+
+@pytest.mark.asyncio
+async def test_timeout_leaves_the_queue(matchmaker):
+    """Test that a search that times out fails and stops blocking the bucket."""
+    with pytest.raises(ValueError, match="timed out"):
+        await matchmaker.find_match(timeout=0.01)
+    assert matchmaker.queues == {} and matchmaker.tickets == {}
+    assert matchmaker.service.store.games == {}
+
+@pytest.mark.asyncio
+async def test_cancel(matchmaker):
+    """Test that cancelling a ticket fails its search and removes it from the queue."""
+    ticket_id = uuid4()
+    search = asyncio.create_task(matchmaker.find_match(ticket_id=ticket_id))
+    await asyncio.sleep(0)
+    assert matchmaker.cancel(ticket_id)
+    with pytest.raises(ValueError, match="cancelled"):
+        await search
+    assert matchmaker.queues == {}
+    assert not matchmaker.cancel(ticket_id)
+
+@pytest.mark.asyncio
+async def test_duplicate_ticket_rejected(matchmaker):
+    ticket_id = uuid4()
+    search = asyncio.create_task(matchmaker.find_match(ticket_id=ticket_id))
+    await asyncio.sleep(0)
+    with pytest.raises(ValueError, match="already queued"):
+        await matchmaker.find_match(ticket_id=ticket_id)
+    matchmaker.cancel(ticket_id)
+    with pytest.raises(ValueError):
+        await search
+
+@pytest.mark.asyncio
+async def test_refused_with_shared_backend():
+    """Test that queues kept per worker are not used when workers share the games."""
+    matchmaker = Matchmaker(GameService(MemoryGameStore(), MemoryBroker()), enabled=False)
+    with pytest.raises(ValueError, match="memory backend"):
+        await matchmaker.find_match(timeout=0.01)
+    assert matchmaker.queues == {}
+
+@pytest.mark.asyncio
+async def test_matchmaking_api(async_client):
+    """Test long-poll pairing and cancellation over HTTP."""
+    first = asyncio.create_task(async_client.post("/api/matchmaking"))
+    await asyncio.sleep(0.1)
+    second = await async_client.post("/api/matchmaking")
+    first = await first
+    assert first.status_code == 200 and second.status_code == 200
+    assert first.json()["game_id"] == second.json()["game_id"]
+    assert first.json()["status"] == "in_progress"
+
+    game = await async_client.get(f"/api/games/{first.json()['game_id']}")
+    assert game.json()["player_id"] == first.json()["player_id"]
+
+    ticket_id = str(uuid4())
+    search = asyncio.create_task(async_client.post(f"/api/matchmaking?ticket_id={ticket_id}"))
+    await asyncio.sleep(0.1)
+    response = await async_client.delete(f"/api/matchmaking/{ticket_id}")
+    assert response.status_code == 204
+    response = await search
+    assert response.status_code == 409
+    assert response.json()["detail"]["code"] == "MATCHMAKING_CANCELLED"
+
+    response = await async_client.delete(f"/api/matchmaking/{ticket_id}")
+    assert response.status_code == 404
+
+    response = await async_client.post("/api/matchmaking?timeout=0.05")
+    assert response.status_code == 408
+    assert response.json()["detail"]["code"] == "MATCHMAKING_TIMEOUT"
+
+@pytest.mark.asyncio
+async def test_hung_up_search_leaves_the_queue(test_server):
+    """Test that a long-poll client that disconnects is not paired with the next arrival."""
+    bucket = str(uuid4())
+    async with httpx.AsyncClient(base_url=test_server, timeout=0.2) as client:
+        with pytest.raises(httpx.ReadTimeout):
+            await client.post(f"/api/matchmaking?bucket={bucket}")
+    await asyncio.sleep(1)
+    async with httpx.AsyncClient(base_url=test_server) as client:
+        response = await client.post(f"/api/matchmaking?bucket={bucket}&timeout=0.2")
+    assert response.status_code == 408
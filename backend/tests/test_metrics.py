@@ -0,0 +1,65 @@
+import pytest
+from app.services import metrics  # the module instance the services record into
+from src.app.models.game import GameState
+from src.app.services.game_service import GameService
+from src.app.services.pubsub import MemoryBroker
+from src.app.services.store import MemoryGameStore
+
+def test_histogram_renders_cumulative_buckets():
+    """Test that observations land in the right bucket and render cumulatively."""
+    histogram = metrics.Histogram("test_latency_seconds", "Test latency", buckets=(0.01, 0.1))
+    metrics.REGISTRY.remove(histogram)
+    for value in (0.005, 0.05, 0.05, 2.0):
+        histogram.observe(value)
+    assert histogram.collect() == [
+        "# HELP test_latency_seconds Test latency",
+        "# TYPE test_latency_seconds histogram",
+        'test_latency_seconds_bucket{le="0.01"} 1',
+        'test_latency_seconds_bucket{le="0.1"} 3',
+        'test_latency_seconds_bucket{le="+Inf"} 4',
+        "test_latency_seconds_sum 2.105",
+        "test_latency_seconds_count 4",
+    ]
+
+def test_gauge_moves_both_ways():
+    gauge = metrics.Gauge("test_open", "Test gauge", ("kind",))
+    metrics.REGISTRY.remove(gauge)
+    gauge.inc("a", amount=3)
+    gauge.dec("a")
+    gauge.set("b", value=7)
+    assert gauge.collect()[2:] == ['test_open{kind="a"} 2', 'test_open{kind="b"} 7']
+
+@pytest.mark.asyncio
+async def test_game_lifecycle_is_counted():
+    """Test the game counters, the live-games gauge and the move histogram over one game."""
+    service = GameService(MemoryGameStore(), MemoryBroker())
+    created = metrics.games_created.values.get(("open",), 0)
+    joined = metrics.games_joined.values.get((), 0)
+    won = metrics.games_finished.values.get(("X",), 0)
+    live = {state: metrics.games_live.values.get((state.value,), 0) for state in GameState}
+    moves = sum(metrics.move_seconds.counts.get((), []))
+
+    game, x = await service.create_game()
+    assert metrics.games_live.values[("waiting",)] == live[GameState.WAITING] + 1
+    game, o = await service.join_game(game.id)
+    for player, position in ((x, [0, 0]), (o, [1, 0]), (x, [0, 1]), (o, [1, 1]), (x, [0, 2])):
+        await service.make_move(game.id, player, position)
+
+    assert metrics.games_created.values[("open",)] == created + 1
+    assert metrics.games_joined.values[()] == joined + 1
+    assert metrics.games_finished.values[("X",)] == won + 1
+    assert sum(metrics.move_seconds.counts[()]) == moves + 5
+    assert metrics.games_live.values[("waiting",)] == live[GameState.WAITING]
+    assert metrics.games_live.values[("in_progress",)] == live[GameState.IN_PROGRESS]
+    assert metrics.games_live.values[("finished",)] == live[GameState.FINISHED] + 1
+
+    await service.store.delete(game.id)
+    assert metrics.games_live.values[("finished",)] == live[GameState.FINISHED]
+
+def test_metrics_endpoint(client):
+    """Test that /metrics serves every instrument in the text format."""
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    for name in ("ttt_games_created_total counter", "ttt_games gauge", "ttt_move_seconds histogram"):
+        assert f"# TYPE {name}" in response.text
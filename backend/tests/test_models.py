@@ -0,0 +1,49 @@
+import json
+from uuid import uuid4
+from src.app.models.game import Game, GameState
+
+def make_game() -> Game:
+    return Game(id=uuid4(), player_x=uuid4(), current_turn="X", status=GameState.WAITING)
+
+def test_encoded_snapshot_is_cached_until_mutation():
+    """Test that the encoded snapshot is reused until the version is bumped."""
+    game = make_game()
+    first = game.encoded()
+    assert game.encoded() is first
+
+    game.player_o = uuid4()
+    game.status = GameState.IN_PROGRESS
+    game.bump_version()
+
+    second = game.encoded()
+    assert second is not first
+    data = json.loads(second)
+    assert data["version"] == 1
+    assert data["status"] == "in_progress"
+    assert data["player_count"] == 2
+
+def test_encoded_snapshot_per_player():
+    """Test that snapshots naming different players are cached separately."""
+    game = make_game()
+    assert json.loads(game.encoded())["player_id"] is None
+    assert json.loads(game.encoded(game.player_x))["player_id"] == str(game.player_x)
+
+def test_delta_describes_last_move():
+    """Test that the delta names the cell and mark of the move that made the version."""
+    game = make_game()
+    game.player_o = uuid4()
+    game.status = GameState.IN_PROGRESS
+    game.bump_version()
+    assert game.delta()["cell"] is None
+
+    game.x_mask |= 1 << 5
+    game.current_turn = "O"
+    game.bump_version(move=5)
+    assert game.delta() == {
+        "seq": 2,
+        "cell": [1, 2],
+        "mark": "X",
+        "status": "in_progress",
+        "current_turn": "O",
+        "winner": None,
+    }
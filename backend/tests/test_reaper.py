@@ -0,0 +1,88 @@
+import asyncio
+import pytest
+from app.services import metrics  # the module instance the services record into
+from src.app.models.game import GameState
+from src.app.services.game_service import GameService
+from src.app.services.pubsub import MemoryBroker
+from src.app.services.reaper import GameReaper
+from src.app.services.store import MemoryGameStore
+
+TTLS = {GameState.WAITING: 10, GameState.IN_PROGRESS: 100, GameState.FINISHED: 5}
+
+@pytest.fixture
+def service():
+    return GameService(MemoryGameStore(max_games=3), MemoryBroker())
+
+@pytest.mark.asyncio
+async def test_sweep_uses_ttl_per_state(service):
+    """Test that idle games are evicted by their own state's TTL."""
+    waiting, _ = await service.create_game()
+    playing, _ = await service.create_game()
+    await service.join_game(playing.id)
+    evicted = []
+    async def on_evict(game_id):
+        evicted.append(game_id)
+    service.store.on_evict(on_evict)
+    reaper = GameReaper(service.store, ttls=TTLS)
+    now = max(service.store.last_used.values())
+    before = metrics.games_evicted.values.get(("waiting_ttl",), 0)
+
+    assert await reaper.sweep(now + 1) == 0
+    assert await reaper.sweep(now + 11) == 1
+    assert evicted == [waiting.id]
+    assert await service.store.get(playing.id) is not None
+    assert metrics.games_evicted.values[("waiting_ttl",)] == before + 1
+
+@pytest.mark.asyncio
+async def test_capacity_evicts_least_recently_used(service):
+    """Test that exceeding max_games evicts the game untouched the longest."""
+    first, _ = await service.create_game()
+    second, _ = await service.create_game()
+    third, _ = await service.create_game()
+    await service.get_game(first.id)
+
+    await service.create_game()
+
+    assert await service.store.get(second.id) is None
+    assert await service.store.get(first.id) is not None
+    assert await service.store.get(third.id) is not None
+    assert len(service.store.games) == 3
+
+@pytest.mark.asyncio
+async def test_evicted_game_is_not_found(service):
+    """Test that requests for an evicted game fail like any unknown game."""
+    game, _ = await service.create_game()
+    await service.store.evict(game.id, "capacity")
+
+    with pytest.raises(ValueError, match="Game not found"):
+        await service.join_game(game.id)
+
+@pytest.mark.asyncio
+async def test_sweep_spares_a_game_mutated_meanwhile(service, monkeypatch):
+    """Test that a game whose move is in flight is not evicted and then saved back by that move."""
+    first, _ = await service.create_game()
+    second, x = await service.create_game()
+    second, _ = await service.join_game(second.id)
+    reaper = GameReaper(service.store, ttls={state: 0.01 for state in GameState})
+    await asyncio.sleep(0.02)
+
+    journaled = asyncio.Event()
+    release = asyncio.Event()
+    async def slow_record(*records):
+        journaled.set()
+        await release.wait()
+    monkeypatch.setattr(service, "_record", slow_record)
+    moves = []
+    # While the first eviction is handled, a move on the second game starts and holds its lock
+    async def on_evict(game_id):
+        if game_id == first.id:
+            moves.append(asyncio.create_task(service.make_move(second.id, x, [0, 0])))
+            await journaled.wait()
+            asyncio.get_running_loop().call_later(0.01, release.set)
+    service.store.on_evict(on_evict)
+
+    assert await reaper.sweep() == 1
+    await moves[0]
+    game = await service.store.get(second.id)
+    assert game is not None and game.version == second.version + 1
+    assert service.store.status(second.id) == GameState.IN_PROGRESS
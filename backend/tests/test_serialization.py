@@ -0,0 +1,40 @@
+import importlib.util
+import json
+import sys
+from enum import Enum
+from uuid import uuid4
+from src.app.models.game import ErrorResponse
+from src.app.services import serialization
+from src.app.services.serialization import FastJSONResponse, dumps
+
+class Color(str, Enum):
+    RED = "red"
+
+def test_dumps_handles_uuid_and_enum():
+    """Test that UUIDs and enums encode the same way the stdlib encoder would."""
+    value = uuid4()
+    data = {"id": value, "color": Color.RED, "cells": [None, "X"]}
+    assert json.loads(dumps(data)) == {"id": str(value), "color": "red", "cells": [None, "X"]}
+
+def test_response_passes_encoded_bytes_through():
+    """Test that pre-encoded bytes are sent as-is and other content is encoded."""
+    assert FastJSONResponse(b'{"a":1}').body == b'{"a":1}'
+    assert json.loads(FastJSONResponse({"a": 1}).body) == {"a": 1}
+
+def test_stdlib_fallback_matches_orjson(monkeypatch):
+    """Test that without orjson the stdlib encoder produces the same bytes."""
+    # A None entry makes the import fail as if orjson were not installed
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    spec = importlib.util.spec_from_file_location("serialization_without_orjson", serialization.__file__)
+    fallback = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(fallback)
+    assert fallback.orjson is None and serialization.orjson is not None
+
+    data = {
+        "id": uuid4(), "color": Color.RED, "cells": [[None, "X"], ["O", None]], "name": "caf\u00e9",
+        "version": 3, "time_left": 99.5, "error": ErrorResponse(code="GAME_NOT_FOUND", message="Game not found"),
+    }
+    assert fallback.dumps(data) == dumps(data)
+    assert fallback.loads(dumps(data)) == serialization.loads(dumps(data))
+    assert fallback.FastJSONResponse(data).body == FastJSONResponse(data).body
+    assert fallback.FastJSONResponse(b'{"a":1}').body == b'{"a":1}'
@@ -0,0 +1,69 @@
+import asyncio
+import pytest
+from src.app.models.game import GameState
+from src.app.services.game_service import GameService
+from src.app.services.pubsub import MemoryBroker, RedisBroker
+from src.app.services.store import MemoryGameStore, RedisGameStore
+
+@pytest.mark.asyncio
+async def test_memory_store_round_trip():
+    """Test saving, loading and deleting a game in the in-memory store."""
+    service = GameService(MemoryGameStore(), MemoryBroker())
+    game, _ = await service.create_game()
+
+    assert await service.store.get(game.id) is game
+    await service.store.delete(game.id)
+    assert await service.store.get(game.id) is None
+
+@pytest.mark.asyncio
+async def test_memory_broker_delivers_updates():
+    """Test that published updates reach every subscriber."""
+    received = []
+    async def handler(game):
+        received.append((game.id, game.status))
+    broker = MemoryBroker()
+    broker.subscribe(handler)
+    service = GameService(MemoryGameStore(), broker)
+
+    game, _ = await service.create_game()
+    await service.join_game(game.id)
+
+    # New open games are published too, for lobby feeds
+    assert received == [(game.id, GameState.WAITING), (game.id, GameState.IN_PROGRESS)]
+
+@pytest.mark.asyncio
+async def test_redis_backend_shares_games_between_workers():
+    """Test two services on one Redis: a game created by one is played through the other."""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")  # Redis locks are Lua scripts
+    server = fakeredis.FakeServer()
+
+    def worker():
+        client = fakeredis.FakeAsyncRedis(server=server)
+        return GameService(RedisGameStore(client), RedisBroker(client))
+
+    worker_a, worker_b = worker(), worker()
+    received = asyncio.Queue()
+    async def handler(game):
+        await received.put(game)
+    worker_a.broker.subscribe(handler)
+    await worker_a.broker.start()
+    try:
+        game, player_x = await worker_a.create_game()
+        _, player_o = await worker_b.join_game(game.id)
+        await worker_b.make_move(game.id, player_x, [1, 1])
+
+        game_a = await worker_a.get_game(game.id)
+        assert game_a.player_o == player_o
+        assert game_a.board[1][1] == "X"
+
+        update = await asyncio.wait_for(received.get(), 2)
+        assert update.id == game.id
+        assert update.status == GameState.WAITING
+        update = await asyncio.wait_for(received.get(), 2)
+        assert update.status == GameState.IN_PROGRESS
+        update = await asyncio.wait_for(received.get(), 2)
+        assert update.board[1][1] == "X"
+        assert update.version == 2
+    finally:
+        await worker_a.broker.stop()
@@ -0,0 +1,85 @@
+import asyncio
+import pytest
+from app.services import metrics  # the module instance the services record into
+from src.app.models.game import GameState
+from src.app.services.game_service import GameService
+from src.app.services.pubsub import MemoryBroker
+from src.app.services.store import MemoryGameStore
+from src.app.services.timers import TimerWheel
+
+def make_service(tick: float = 0.01) -> GameService:
+    return GameService(MemoryGameStore(), MemoryBroker(), timers=TimerWheel(tick=tick))
+
+async def started_game(service: GameService, **time_controls):
+    game, x = await service.create_game(**time_controls)
+    game, o = await service.join_game(game.id)
+    return game, x, o
+
+@pytest.mark.asyncio
+async def test_player_who_runs_out_of_move_time_forfeits():
+    """Test that the player to move loses once the move time passes, and the result is broadcast."""
+    service = make_service()
+    published = []
+    async def on_publish(game):
+        published.append(game.snapshot())
+    service.broker.subscribe(on_publish)
+    game, x, o = await started_game(service, move_time=0.05)
+    before = metrics.games_timed_out.values.get((), 0)
+
+    await service.make_move(game.id, x, [0, 0])
+    await asyncio.sleep(0.03)
+    # X's move gave O a fresh move time
+    assert (await service.get_game(game.id)).status == GameState.IN_PROGRESS
+    await asyncio.sleep(0.06)
+
+    game = await service.get_game(game.id)
+    assert (game.status, game.winner, game.timed_out) == (GameState.FINISHED, "X", "O")
+    assert game.last_move is None
+    assert published[-1]["status"] == "finished"
+    assert published[-1]["timed_out"] == "O"
+    assert "clock" not in published[-1]
+    assert metrics.games_timed_out.values[()] == before + 1
+    assert len(service.deadlines) == 0
+
+@pytest.mark.asyncio
+async def test_game_time_is_charged_per_move():
+    """Test that each player's game time only runs on their own turns."""
+    service = make_service()
+    game, x, o = await started_game(service, game_time=10)
+    assert game.snapshot()["clock"]["deadline"] == game.turn_started + 10
+
+    await asyncio.sleep(0.05)
+    game = await service.make_move(game.id, x, [0, 0])
+    assert 9.9 < game.time_left_x <= 9.95
+    assert game.time_left_o == 10
+    clock = game.snapshot()["clock"]
+    assert clock["time_left"] == {"X": game.time_left_x, "O": 10}
+    assert clock["deadline"] == game.turn_started + 10
+    assert clock["move_time"] is None
+
+@pytest.mark.asyncio
+async def test_late_moves_are_rejected():
+    """Test that a move after the deadline fails even before the deadline service has forfeited the game."""
+    # A coarse wheel, so the deadline is still pending when the move arrives
+    service = make_service(tick=10)
+    game, x, o = await started_game(service, move_time=0.02)
+    await asyncio.sleep(0.03)
+    with pytest.raises(ValueError, match="Time is up"):
+        await service.make_move(game.id, x, [0, 0])
+
+    version = game.version
+    assert await service.time_out(game.id, version - 1) is None
+    finished = await service.time_out(game.id, version)
+    assert (finished.winner, finished.timed_out, finished.version) == ("O", "X", version + 1)
+    assert await service.time_out(game.id, version) is None
+
+@pytest.mark.asyncio
+async def test_untimed_and_invalid_time_controls():
+    service = make_service()
+    game, x, o = await started_game(service)
+    assert game.deadline is None
+    assert "clock" not in game.snapshot()
+    assert len(service.deadlines) == 0
+    for time_controls in ({"move_time": 0}, {"game_time": -1}, {"move_time": 1e9}):
+        with pytest.raises(ValueError, match="Invalid time control"):
+            await service.create_game(**time_controls)
@@ -0,0 +1,60 @@
+import asyncio
+import pytest
+from src.app.services.timers import TimerWheel
+
+@pytest.mark.asyncio
+async def test_timers_fire_in_deadline_order():
+    """Test that timers fire after their delay, in deadline order, and never early."""
+    wheel = TimerWheel(tick=0.01, slots=8)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    fired = []
+    for delay in (0.05, 0.01, 0.03):
+        wheel.schedule(delay, lambda d: fired.append((d, loop.time() - start)), delay)
+    assert len(wheel) == 3
+
+    await asyncio.sleep(0.1)
+    assert [delay for delay, _ in fired] == [0.01, 0.03, 0.05]
+    assert all(elapsed >= delay for delay, elapsed in fired)
+    assert len(wheel) == 0
+    assert wheel._task is None
+
+@pytest.mark.asyncio
+async def test_timers_beyond_one_turn_wait_for_their_turn():
+    """Test that a timer further out than one turn of the wheel skips the turns before it."""
+    wheel = TimerWheel(tick=0.01, slots=4)
+    fired = []
+    wheel.schedule(0.01, fired.append, "soon")
+    wheel.schedule(0.09, fired.append, "later")
+    await asyncio.sleep(0.05)
+    assert fired == ["soon"]
+    await asyncio.sleep(0.08)
+    assert fired == ["soon", "later"]
+
+@pytest.mark.asyncio
+async def test_cancelled_timers_do_not_fire():
+    """Test that cancelling is idempotent and stops the timer."""
+    wheel = TimerWheel(tick=0.01, slots=8)
+    fired = []
+    timer = wheel.schedule(0.02, fired.append, "cancelled")
+    wheel.schedule(0.02, fired.append, "kept")
+    timer.cancel()
+    timer.cancel()
+    assert len(wheel) == 1
+    await asyncio.sleep(0.05)
+    assert fired == ["kept"]
+
+@pytest.mark.asyncio
+async def test_advance_fires_due_timers_and_survives_failures():
+    """Test manual advancing, including timers scheduled from callbacks and callbacks that raise."""
+    wheel = TimerWheel(tick=1, slots=8)
+    fired = []
+    def fail():
+        raise RuntimeError("boom")
+    wheel.schedule(1, fail)
+    wheel.schedule(2, lambda: wheel.schedule(1, fired.append, "chained"))
+    wheel.advance(wheel.position + 3)
+    assert len(wheel) == 1
+    wheel.advance(wheel.position + 1)
+    assert fired == ["chained"]
+    await wheel.stop()
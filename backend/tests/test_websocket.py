@@ -3,6 +3,7 @@
 import asyncio
 import websockets
 from uuid import UUID
+from src.app.services import binary
 import logging
 
 logger = logging.getLogger(__name__)
@@ -200,4 +201,157 @@ async def test_websocket_disconnect_reconnect(async_client, test_server, game_id
         assert update["status"] == "in_progress"
     finally:
         await ws2.close()
-        logger.info("Second WebSocket connection closed") 
\ No newline at end of file
+        logger.info("Second WebSocket connection closed")
+
+@pytest.mark.asyncio
+async def test_websocket_ping(websocket_client):
+    """Test that a ping request is answered with a pong carrying the same ID."""
+    await wait_for_message(websocket_client)  # initial state
+    await websocket_client.send(json.dumps({"type": "ping", "id": 7}))
+    reply = await wait_for_message(websocket_client)
+    assert reply == {"type": "pong", "id": 7}
+
+    # Answers to the server's heartbeat pings get no reply; the next request is answered as usual
+    await websocket_client.send(json.dumps({"type": "pong"}))
+    await websocket_client.send(json.dumps({"type": "ping", "id": 8}))
+    assert await wait_for_message(websocket_client) == {"type": "pong", "id": 8}
+
+@pytest.mark.asyncio
+async def test_websocket_join_and_move(async_client, test_server):
+    """Test joining and moving over the socket instead of through REST."""
+    created = (await async_client.post("/api/games")).json()
+    game_id = created["game_id"]
+
+    ws_url = test_server.replace("http://", "ws://")
+    uri = f"{ws_url}/api/games/{game_id}/ws"
+    async with websockets.client.connect(f"{uri}?seat_token={created['seat_token']}") as player_x, \
+            websockets.client.connect(uri) as ws:
+        await wait_for_message(player_x)  # initial state
+        await wait_for_message(ws)  # initial state
+
+        await ws.send(json.dumps({"type": "join", "id": "j1"}))
+        update = await wait_for_message(ws)
+        assert update["status"] == "in_progress"
+        joined = await wait_for_message(ws)
+        assert joined["type"] == "joined"
+        assert joined["id"] == "j1"
+        assert UUID(joined["player_id"])
+        assert joined["seat_token"]
+
+        await wait_for_message(player_x)  # joined update
+        await player_x.send(json.dumps({"type": "move", "id": "m1", "position": [1, 1]}))
+        update = await wait_for_message(player_x)
+        assert update["board"][1][1] == "X"
+        ack = await wait_for_message(player_x)
+        assert ack == {"type": "ack", "id": "m1", "version": update["version"]}
+
+@pytest.mark.asyncio
+async def test_spectators_cannot_move_over_the_socket(async_client, test_server, game_id):
+    """Test that knowing a player's public ID does not let a spectator move for them."""
+    await async_client.post(f"/api/games/{game_id}/join")
+    player_x_id = (await async_client.get(f"/api/games/{game_id}")).json()["player_id"]
+
+    ws_url = test_server.replace("http://", "ws://")
+    async with websockets.client.connect(f"{ws_url}/api/games/{game_id}/ws") as ws:
+        await wait_for_message(ws)  # initial state
+        await ws.send(json.dumps({"type": "move", "id": 1, "player_id": player_x_id, "position": [0, 0]}))
+        error = await wait_for_message(ws)
+        assert error["type"] == "error"
+        assert error["code"] == "NOT_A_PLAYER"
+
+    game = (await async_client.get(f"/api/games/{game_id}")).json()
+    assert game["board"][0][0] is None
+
+@pytest.mark.asyncio
+async def test_websocket_error_frames(async_client, test_server):
+    """Test that rule violations and malformed messages produce error frames."""
+    created = (await async_client.post("/api/games")).json()
+    game_id = created["game_id"]
+    ws_url = test_server.replace("http://", "ws://")
+    uri = f"{ws_url}/api/games/{game_id}/ws?seat_token={created['seat_token']}"
+    async with websockets.client.connect(uri) as ws:
+        await wait_for_message(ws)  # initial state
+
+        # Nobody has joined yet, so X cannot move
+        await ws.send(json.dumps({"type": "move", "id": 1, "position": [0, 0]}))
+        error = await wait_for_message(ws)
+        assert error["type"] == "error"
+        assert error["id"] == 1
+        assert error["code"] == "GAME_RULE_VIOLATION"
+
+        await ws.send("not json")
+        error = await wait_for_message(ws)
+        assert error["code"] == "BAD_REQUEST"
+
+        # The socket stays usable after errors
+        await ws.send(json.dumps({"type": "resync", "id": 2}))
+        state = await wait_for_message(ws)
+        assert state["type"] == "state"
+        assert state["id"] == 2
+        assert state["game"]["game_id"] == str(game_id)
+
+@pytest.mark.asyncio
+async def test_websocket_delta_frames_and_resync(async_client, test_server, game_id):
+    """Test delta frames over the socket and resyncing from a known seq."""
+    ws_url = test_server.replace("http://", "ws://")
+    uri = f"{ws_url}/api/games/{game_id}/ws?frames=delta"
+    async with websockets.client.connect(uri) as ws:
+        snapshot = await wait_for_message(ws)
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["seq"] == 0
+
+        join_response = await async_client.post(f"/api/games/{game_id}/join")
+        assert join_response.status_code == 200
+        delta = await wait_for_message(ws)
+        assert delta == {
+            "type": "delta", "seq": 1, "cell": None, "mark": None,
+            "status": "in_progress", "current_turn": "X", "winner": None,
+        }
+
+        game_response = await async_client.get(f"/api/games/{game_id}")
+        player_x_id = game_response.json()["player_id"]
+        await async_client.post(
+            f"/api/games/{game_id}/move",
+            json={"player_id": player_x_id, "position": [2, 0]}
+        )
+        delta = await wait_for_message(ws)
+        assert delta["seq"] == 2
+        assert delta["cell"] == [2, 0]
+        assert delta["mark"] == "X"
+
+        # Resync from seq 0 replays both deltas, then acks the current version
+        await ws.send(json.dumps({"type": "resync", "id": 1, "last_seq": 0}))
+        assert (await wait_for_message(ws))["seq"] == 1
+        assert (await wait_for_message(ws))["seq"] == 2
+        assert await wait_for_message(ws) == {"type": "ack", "id": 1, "version": 2}
+
+        # Without a seq the client gets a fresh snapshot
+        await ws.send(json.dumps({"type": "resync", "id": 2}))
+        snapshot = await wait_for_message(ws)
+        assert snapshot["type"] == "snapshot"
+        assert snapshot["game"]["board"][2][0] == "X"
+        assert await wait_for_message(ws) == {"type": "ack", "id": 2, "version": 2}
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query, subprotocols", [("?encoding=binary", None), ("", ["ttt.binary.v1"])])
+async def test_websocket_binary_encoding(async_client, test_server, game_id, query, subprotocols):
+    """Test negotiating binary frames by query parameter or subprotocol."""
+    ws_url = test_server.replace("http://", "ws://")
+    uri = f"{ws_url}/api/games/{game_id}/ws{query}"
+    async with websockets.client.connect(uri, subprotocols=subprotocols) as ws:
+        if subprotocols:
+            assert ws.subprotocol == "ttt.binary.v1"
+        initial = await asyncio.wait_for(ws.recv(), timeout=2)
+        assert isinstance(initial, bytes)
+        state = binary.decode(initial)
+        assert state["game_id"] == str(game_id)
+        assert state["status"] == "waiting"
+
+        await async_client.post(f"/api/games/{game_id}/join")
+        state = binary.decode(await asyncio.wait_for(ws.recv(), timeout=2))
+        assert state["status"] == "in_progress"
+        assert state["player_count"] == 2
+
+        # Requests and replies stay JSON text
+        await ws.send(json.dumps({"type": "ping", "id": 1}))
+        assert await wait_for_message(ws) == {"type": "pong", "id": 1}
@@ -5,11 +5,16 @@ export type Board = (PlayerSymbol | null)[][];
 export interface GameState {
     game_id: string;
     player_id?: string;
+    seat_token?: string;
     board: Board;
     current_turn?: PlayerSymbol;
     status: GameStatus;
     winner?: PlayerSymbol | null;
     player_count: number;
+    version?: number;
+    rows?: number;
+    cols?: number;
+    win_length?: number;
 }
 
 export interface GameMove {